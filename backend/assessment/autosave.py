@@ -0,0 +1,117 @@
+"""
+Autosave buffer of assessment sessions.
+
+Autosaves merge item results into a buffer in the shared cache instead
+of writing to the database, and commit_session writes the buffer to
+Records with a single bulk insert when the session is finished.
+
+Merges and commits of a session hold a lock taken with cache.add, so
+they run one at a time and no merge is lost to a commit. A committed
+session leaves a closed marker in place of its buffer, so later merges
+are refused without a query.
+"""
+
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core import audit
+from core.events import publish
+from core.models import AssessmentSession, AuditEvent, Records
+
+CLOSED = 'closed'
+# Seconds a lock is held at most, and waited for before giving up.
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+
+
+class SessionBusy(Exception):
+    """The session's buffer stayed locked for LOCK_WAIT seconds."""
+
+
+def buffer_key(session_id):
+    return f'session_buffer:{session_id}'
+
+
+@contextmanager
+def session_lock(session_id):
+    """Hold the lock of the session's buffer."""
+    key = f'{buffer_key(session_id)}:lock'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(key, token, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            raise SessionBusy(session_id)
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        # Unless it expired and was taken by another request.
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def pending_results(session_id):
+    """Return the buffered {item id: is_complete} of a session."""
+    buffer = cache.get(buffer_key(session_id))
+    return {} if buffer in (None, CLOSED) else buffer
+
+
+def merge_results(session_id, results):
+    """Merge {item id: is_complete or None} into the buffer.
+
+    None removes the item's result. Returns the number of pending
+    results, or None if the session was committed.
+    """
+    with session_lock(session_id):
+        buffer = cache.get(buffer_key(session_id), {})
+        if buffer == CLOSED:
+            return None
+        for item_id, is_complete in results.items():
+            if is_complete is None:
+                buffer.pop(item_id, None)
+            else:
+                buffer[item_id] = is_complete
+        cache.set(buffer_key(session_id), buffer,
+                  settings.SESSION_BUFFER_TIMEOUT)
+        return len(buffer)
+
+
+def commit_session(session):
+    """Finish the session and write its buffer to Records.
+
+    Returns the number of records written, or None if the session was
+    already finished.
+    """
+    now = timezone.now()
+    with session_lock(session.id):
+        results = pending_results(session.id)
+        with transaction.atomic():
+            finished = AssessmentSession.objects.filter(
+                id=session.id, finished__isnull=True).update(finished=now)
+            if not finished:
+                return None
+            records = Records.objects.bulk_create([
+                Records(child_id=session.child_id, item_id=item_id,
+                        is_complete=is_complete, session=session,
+                        clinic_id=session.clinic_id)
+                for item_id, is_complete in results.items()
+            ])
+            # bulk_create sends no post_save for the records.
+            audit.record_on_commit([
+                (AuditEvent.CREATE, 'records', record.pk, session.child_id,
+                 session.clinic_id)
+                for record in records
+            ])
+            publish({'type': 'session.committed', 'id': session.id,
+                     'child': session.child_id},
+                    session.child_id, session.clinic_id)
+        cache.set(buffer_key(session.id), CLOSED,
+                  settings.SESSION_BUFFER_TIMEOUT)
+    session.finished = now
+    return len(results)
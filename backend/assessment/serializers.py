@@ -7,6 +7,7 @@ from core.models import (
     Tests,
     Categories,
     Items,
+    AssessmentSession,
     )
 
 
@@ -44,3 +45,36 @@ class AssessmentDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tests
         fields = ['id', 'name', 'categories']
+
+
+class BulkAssignmentSerializer(serializers.Serializer):
+    """Serializer for assigning tests to many children at once."""
+
+    child_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=5000)
+    test_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=100)
+
+
+class AssessmentSessionSerializer(serializers.ModelSerializer):
+    """Serializer for assessment sessions."""
+
+    class Meta:
+        model = AssessmentSession
+        fields = ['id', 'child', 'test', 'tester', 'started', 'finished']
+        read_only_fields = ['tester', 'started', 'finished']
+
+
+class AutosaveSerializer(serializers.Serializer):
+    """Serializer for a diff of item results, null clears a result."""
+
+    results = serializers.DictField(
+        child=serializers.BooleanField(allow_null=True), allow_empty=False)
+
+    def validate_results(self, value):
+        if len(value) > 1000:
+            raise serializers.ValidationError('Too many results.')
+        try:
+            return {int(item_id): result for item_id, result in value.items()}
+        except ValueError:
+            raise serializers.ValidationError('Keys must be item ids.')
@@ -0,0 +1,151 @@
+"""
+Pre-rendered snapshots of the assessment list and details.
+
+publish_snapshots renders the payloads of the list and detail endpoints
+into JSON files named by a hash of their content, with gzip and brotli
+copies, under SNAPSHOTS_DIR in the default storage. Since a file never
+changes once written, the files can be cached forever by clients and
+served directly by a front proxy. manifest.json, replaced last with an
+atomic rename, maps the list and each test to its current file. Files
+left out of the manifest are pruned SNAPSHOTS_KEEP after the publish
+that left them out, so clients holding an earlier manifest can still
+fetch them. The manifest's "retired" map records when that was.
+
+The live endpoints stay the source of truth; publish again after edits.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework.settings import api_settings
+
+from core.models import Tests
+
+from .serializers import AssesmentsListSerializer, AssessmentDetailSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = 'manifest.json'
+# Content-Encoding -> file suffix, in order of preference.
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+# Versioned files and compressed copies, and temporary manifests.
+re_versioned = re.compile(r'^[\w-]+\.[0-9a-f]+\.json(\.gz|\.br)?$')
+re_temporary = re.compile(r'^manifest\.json\.[0-9a-f]+\.tmp$')
+
+
+def snapshot_path(name):
+    return f'{settings.SNAPSHOTS_DIR}/{name}'
+
+
+def write(name, content):
+    """Write content unless the file exists, with compressed copies."""
+    files = {name: content, name + '.gz': gzip.compress(content, mtime=0)}
+    if brotli is not None:
+        files[name + '.br'] = brotli.compress(content, quality=11)
+    for filename, data in files.items():
+        path = snapshot_path(filename)
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(data))
+
+
+def replace(name, content):
+    """Replace the file atomically, so readers never miss it.
+
+    The content is saved under a temporary name and renamed over the
+    file. Storages without local paths must overwrite on save, like
+    S3 storages with file_overwrite.
+    """
+    path = snapshot_path(name)
+    temporary = default_storage.save(
+        f'{path}.{uuid.uuid4().hex}.tmp', ContentFile(content))
+    try:
+        os.replace(default_storage.path(temporary),
+                   default_storage.path(path))
+    except NotImplementedError:
+        default_storage.delete(temporary)
+        saved = default_storage.save(path, ContentFile(content))
+        if saved != path:
+            default_storage.delete(saved)
+            raise ImproperlyConfigured(
+                'Snapshots need a local storage or one overwriting files.')
+
+
+def read_manifest():
+    """Return the published manifest, or None."""
+    path = snapshot_path(MANIFEST)
+    if not default_storage.exists(path):
+        return None
+    with default_storage.open(path) as manifest:
+        return json.load(manifest)
+
+
+def prune(manifest, retired):
+    """Delete the files left out of the manifest for SNAPSHOTS_KEEP.
+
+    retired maps the files left out to when they were first found left
+    out, and is returned updated with the manifest's publish time for
+    files left out now. Files back in the manifest or deleted are
+    dropped from it.
+    """
+    current = {manifest['list'], *manifest['tests'].values()}
+    keep = {name + suffix for name in current
+            for suffix in ('', '.gz', '.br')}
+    published = datetime.fromisoformat(manifest['published'])
+    cutoff = published - timedelta(seconds=settings.SNAPSHOTS_KEEP)
+    remaining = {}
+    for name in default_storage.listdir(settings.SNAPSHOTS_DIR)[1]:
+        if name in keep or not (re_versioned.match(name)
+                                or re_temporary.match(name)):
+            continue
+        since = retired.get(name, manifest['published'])
+        if datetime.fromisoformat(since) <= cutoff:
+            default_storage.delete(snapshot_path(name))
+        else:
+            remaining[name] = since
+    return remaining
+
+
+def publish(prefix, payload, renderer):
+    """Write the rendered payload and return its file name."""
+    content = renderer.render(payload)
+    version = hashlib.sha256(content).hexdigest()[:12]
+    name = f'{prefix}.{version}.json'
+    write(name, content)
+    return name
+
+
+def publish_snapshots():
+    """Publish the list and every test, returning the manifest."""
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    tests = Tests.objects.prefetch_related('categories__items')
+
+    manifest = {
+        'list': publish('list', AssesmentsListSerializer(
+            Tests.objects.all(), many=True).data, renderer),
+        'tests': {
+            str(test.id): publish(
+                f'test-{test.id}', AssessmentDetailSerializer(test).data,
+                renderer)
+            for test in tests
+        },
+    }
+    manifest['version'] = hashlib.sha256(json.dumps(
+        manifest, sort_keys=True).encode()).hexdigest()[:12]
+    manifest['published'] = datetime.now(timezone.utc).isoformat()
+    previous = read_manifest() or {}
+    manifest['retired'] = prune(manifest, previous.get('retired', {}))
+
+    replace(MANIFEST, json.dumps(manifest).encode())
+    return manifest
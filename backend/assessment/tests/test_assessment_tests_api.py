@@ -13,6 +13,7 @@ from core.models import (
     Tests,
     Categories,
     Items,)
+from core.querylog import NPlusOneTestMixin
 from assessment.serializers import (
     AssesmentsListSerializer,
     AssessmentDetailSerializer)
@@ -58,7 +59,7 @@ def create_test_details(test1, test2):
     )
 
 
-class AssessmentRetrivingTests(TestCase):
+class AssessmentRetrivingTests(NPlusOneTestMixin, TestCase):
 
     def setUp(self):
         self.client = APIClient()
@@ -97,6 +98,26 @@ class AssessmentRetrivingTests(TestCase):
         self.assertEqual(len(response.data['categories'][0]['items']), 2)
         self.assertEqual(response.data, serializer.data)
 
+    def test_retrieve_assessment_details_no_n_plus_one(self):
+        """Test for rebuilding details without a query per category."""
+        self.client.force_authenticate(user=self.user)
+        counts = []
+        for first, last in ((0, 5), (5, 10)):
+            # Each change makes the next GET rebuild the instruments.
+            for number in range(first, last):
+                category = Categories.objects.create(test=self.test1,
+                                                     name=f"Cat{number}")
+                Items.objects.create(test=self.test1, category=category,
+                                     step=1, instruction="testing item")
+
+            with self.assertNoNPlusOne() as queries:
+                response = self.client.get(detail_url(self.test1.id))
+            counts.append(len(queries.queries))
+
+            self.assertEqual(len(response.data['categories']), last)
+        self.assertGreater(counts[0], 0)
+        self.assertEqual(counts[0], counts[1])
+
     def test_retrieve_assessment_detail_not_authenticated(self):
         """Test for retrieving tests/tools detail for not auths."""
 
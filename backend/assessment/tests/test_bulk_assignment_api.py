@@ -0,0 +1,117 @@
+"""
+Tests for bulk assigning tests to children.
+"""
+
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import audit
+from core.audit import AuditQueue
+from core.models import Child, Tests
+import datetime
+
+ASSIGN_URL = reverse('assessment:assign')
+UNASSIGN_URL = reverse('assessment:unassign')
+
+
+class BulkAssignmentTests(TestCase):
+    """Tests for the bulk assign and unassign endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            name='newuser',
+            email='test123@example.com',
+            password='testpassword',
+            role='Tester'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.children = [
+            Child.objects.create(name=f"Child{n}",
+                                 birthday=datetime.date(2022, 1, 1))
+            for n in range(3)
+        ]
+        self.user.child.add(*self.children)
+        self.tests = [Tests.objects.create(name=f"Test{n}")
+                      for n in range(2)]
+        self.payload = {
+            'child_ids': [c.id for c in self.children],
+            'test_ids': [t.id for t in self.tests],
+        }
+
+    def test_bulk_assign(self):
+        """Test assigning skips pairs that already exist."""
+        self.children[0].tests.add(self.tests[0])
+
+        with self.assertNumQueries(6):
+            response = self.client.post(ASSIGN_URL, self.payload,
+                                        format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data,
+                         {'assigned': 5, 'already_assigned': 1})
+        for child in self.children:
+            self.assertEqual(child.tests.count(), 2)
+
+    def test_bulk_unassign(self):
+        for child in self.children:
+            child.tests.add(*self.tests)
+
+        response = self.client.post(UNASSIGN_URL, {
+            'child_ids': [self.children[0].id, self.children[1].id],
+            'test_ids': [self.tests[0].id],
+        }, format='json')
+
+        self.assertEqual(response.data, {'unassigned': 2})
+        self.assertEqual(self.children[0].tests.count(), 1)
+        self.assertEqual(self.children[2].tests.count(), 2)
+
+    def test_assignments_audited(self):
+        """Test each new or removed assignment is in the audit trail."""
+        queue = AuditQueue(maxsize=100, batch_size=50, interval=60,
+                           overflow='flush')
+        self.children[0].tests.add(self.tests[0])
+        payload = {'child_ids': [self.children[0].id],
+                   'test_ids': [t.id for t in self.tests]}
+
+        with mock.patch.object(audit, '_queue', queue):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(ASSIGN_URL, payload, format='json')
+                self.client.post(UNASSIGN_URL, payload, format='json')
+
+        self.assertEqual(
+            [(e.action, e.model, e.object_id, e.child_id, e.user_id)
+             for e in queue.events],
+            [('create', 'assignment', self.tests[1].id,
+              self.children[0].id, self.user.id)] + [
+             ('delete', 'assignment', test.id, self.children[0].id,
+              self.user.id) for test in self.tests])
+
+    def test_other_users_children_rejected(self):
+        other = Child.objects.create(name="Other",
+                                     birthday=datetime.date(2022, 1, 1))
+        self.payload['child_ids'].append(other.id)
+
+        response = self.client.post(ASSIGN_URL, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['child_ids'], [other.id])
+        self.assertEqual(self.children[0].tests.count(), 0)
+
+    def test_staff_assigns_any_child(self):
+        self.user.is_staff = True
+        self.user.save()
+        other = Child.objects.create(name="Other",
+                                     birthday=datetime.date(2022, 1, 1))
+
+        response = self.client.post(ASSIGN_URL, {
+            'child_ids': [other.id], 'test_ids': [self.tests[0].id],
+        }, format='json')
+
+        self.assertEqual(response.data['assigned'], 1)
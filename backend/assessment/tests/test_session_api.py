@@ -0,0 +1,196 @@
+"""
+Tests for assessment sessions and autosave.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from assessment import autosave
+from assessment.autosave import merge_results, pending_results, session_lock
+from core import audit
+from core.audit import AuditQueue
+from core.models import (AssessmentSession, Child, Tests, Categories, Items,
+                         Records)
+import datetime
+
+SESSION_URL = reverse('assessment:session-create')
+
+
+def detail_url(session_id):
+    return reverse('assessment:session-detail', args=[session_id])
+
+
+def autosave_url(session_id):
+    return reverse('assessment:session-autosave', args=[session_id])
+
+
+def commit_url(session_id):
+    return reverse('assessment:session-commit', args=[session_id])
+
+
+class AssessmentSessionTests(TestCase):
+    """Tests for the session endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            name='newuser',
+            email='test123@example.com',
+            password='testpassword',
+            role='Tester'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.child = Child.objects.create(name="Mike",
+                                          birthday=datetime.date(2022, 1, 1))
+        self.user.child.add(self.child)
+        self.test = Tests.objects.create(name="Denver II")
+        self.child.tests.add(self.test)
+        category = Categories.objects.create(test=self.test, name="Motor")
+        self.items = [
+            Items.objects.create(test=self.test, category=category,
+                                 step=step, instruction=f"item{step}")
+            for step in range(1, 4)
+        ]
+
+    def start(self):
+        response = self.client.post(SESSION_URL, {
+            'child': self.child.id, 'test': self.test.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_autosave_buffers_until_commit(self):
+        """Test autosaves merge in the cache and commit writes once."""
+        session_id = self.start()
+        first, second, third = (str(item.id) for item in self.items)
+
+        self.client.post(autosave_url(session_id),
+                         {'results': {first: True, second: False}},
+                         format='json')
+        # The session and the items check, the merge is in the cache.
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                autosave_url(session_id),
+                {'results': {second: True, third: True}}, format='json')
+        self.assertEqual(response.data['pending'], 3)
+        self.client.post(autosave_url(session_id),
+                         {'results': {third: None}}, format='json')
+        self.assertFalse(Records.objects.exists())
+
+        response = self.client.get(detail_url(session_id))
+        self.assertEqual(response.data['pending'],
+                         {self.items[0].id: True, self.items[1].id: True})
+
+        response = self.client.post(commit_url(session_id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['records'], 2)
+        self.assertIsNotNone(response.data['finished'])
+        records = Records.objects.filter(session_id=session_id)
+        self.assertEqual(records.count(), 2)
+        self.assertTrue(all(r.is_complete for r in records))
+
+    def test_commit_audits_records(self):
+        """Test the bulk inserted records are in the audit trail."""
+        session_id = self.start()
+        merge_results(session_id, {self.items[0].id: True,
+                                   self.items[1].id: False})
+        queue = AuditQueue(maxsize=100, batch_size=50, interval=60,
+                           overflow='flush')
+
+        with mock.patch.object(audit, '_queue', queue):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(commit_url(session_id))
+
+        records = Records.objects.filter(session_id=session_id)
+        self.assertCountEqual(
+            [(e.action, e.model, e.object_id) for e in queue.events],
+            [('create', 'records', record.id) for record in records])
+
+    def test_autosave_after_commit_rejected(self):
+        """Test merges into a finished session are refused atomically."""
+        session_id = self.start()
+        self.client.post(commit_url(session_id))
+
+        self.assertIsNone(merge_results(session_id, {self.items[0].id: True}))
+        self.assertEqual(pending_results(session_id), {})
+
+    def test_locked_session_busy(self):
+        """Test merges and commits wait for the lock, then give up."""
+        session_id = self.start()
+
+        with mock.patch.object(autosave, 'LOCK_WAIT', 0), \
+                session_lock(session_id):
+            response = self.client.post(
+                autosave_url(session_id),
+                {'results': {str(self.items[0].id): True}}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(response['Retry-After'], '1')
+            response = self.client.post(commit_url(session_id))
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(merge_results(session_id, {self.items[0].id: True}),
+                         1)
+        self.assertIsNone(AssessmentSession.objects.get(
+            id=session_id).finished)
+
+    def test_commit_once(self):
+        """Test a finished session takes no more autosaves or commits."""
+        session_id = self.start()
+        self.client.post(commit_url(session_id))
+
+        response = self.client.post(commit_url(session_id))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(
+            autosave_url(session_id),
+            {'results': {str(self.items[0].id): True}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_autosave_rejects_other_test_items(self):
+        """Test results for items outside the session's test fail."""
+        session_id = self.start()
+        other = Tests.objects.create(name="Other")
+        category = Categories.objects.create(test=other, name="Motor")
+        item = Items.objects.create(test=other, category=category, step=1,
+                                    instruction="walks")
+
+        response = self.client.post(autosave_url(session_id),
+                                    {'results': {str(item.id): True}},
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'], [item.id])
+
+    def test_start_requires_own_child_and_assigned_test(self):
+        """Test sessions need the user's child and an assigned test."""
+        other = Child.objects.create(name="Other",
+                                     birthday=datetime.date(2022, 1, 1))
+        response = self.client.post(SESSION_URL, {
+            'child': other.id, 'test': self.test.id})
+        self.assertEqual(response.status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+        test = Tests.objects.create(name="Unassigned")
+        response = self.client.post(SESSION_URL, {
+            'child': self.child.id, 'test': test.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AssessmentSession.objects.exists())
+
+    def test_sessions_of_other_testers_hidden(self):
+        """Test a tester can't reach another tester's session."""
+        session_id = self.start()
+        other = get_user_model().objects.create_user(
+            name='other', email='other@example.com', password='pass',
+            role='Tester')
+        self.client.force_authenticate(user=other)
+
+        response = self.client.post(commit_url(session_id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
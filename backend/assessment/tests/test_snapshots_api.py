@@ -0,0 +1,204 @@
+"""
+Tests for published assessment snapshots.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from assessment.snapshots import brotli, publish_snapshots, snapshot_path
+from core.models import Tests, Categories, Items
+
+
+def snapshot_url(name):
+    return reverse('assessment:snapshot', args=[name])
+
+
+class SnapshotTests(TestCase):
+    """Tests for publishing and serving snapshots."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', name='newuser', password='testpass',
+            role='Tester')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}')
+        self.test = Tests.objects.create(name='Denver II')
+        category = Categories.objects.create(test=self.test, name='Motor')
+        Items.objects.create(test=self.test, category=category, step=1,
+                             instruction='walks')
+
+    def test_snapshots_match_live_payloads(self):
+        """Test the published files hold the live API payloads."""
+        manifest = publish_snapshots()
+
+        response = self.client.get(snapshot_url(
+            manifest['tests'][str(self.test.id)]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.user)
+        live = self.client.get(reverse('assessment:detail',
+                                       args=[self.test.id]))
+        self.assertEqual(json.loads(response.content), live.data)
+
+        response = self.client.get(snapshot_url(manifest['list']))
+        live = self.client.get(reverse('assessment:list'))
+        self.assertEqual(json.loads(response.content), live.data)
+
+    def test_served_compressed_and_immutable(self):
+        """Test versioned files are served pre-compressed for a year."""
+        manifest = publish_snapshots()
+        name = manifest['tests'][str(self.test.id)]
+
+        response = self.client.get(snapshot_url(name),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        plain = self.client.get(snapshot_url(name))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        if brotli is not None:
+            response = self.client.get(snapshot_url(name),
+                                       HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(brotli.decompress(response.content),
+                             plain.content)
+
+    def test_versions_follow_content(self):
+        """Test unchanged tests keep their file and edits get a new one."""
+        first = publish_snapshots()
+        self.assertEqual(publish_snapshots()['tests'], first['tests'])
+
+        self.test.name = 'Denver III'
+        self.test.save()
+        second = publish_snapshots()
+
+        self.assertNotEqual(second['tests'], first['tests'])
+        response = self.client.get(snapshot_url('manifest.json'))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(json.loads(response.content)['version'],
+                         second['version'])
+        old = self.client.get(snapshot_url(first['tests'][str(self.test.id)]))
+        self.assertEqual(old.status_code, status.HTTP_200_OK)
+
+    def test_manifest_replaced_by_rename(self):
+        """Test the manifest is renamed over, never deleted or saved under
+        another name."""
+        publish_snapshots()
+        self.test.name = 'Denver III'
+        self.test.save()
+
+        with mock.patch('assessment.snapshots.os.replace',
+                        wraps=os.replace) as replace, \
+                mock.patch.object(default_storage, 'delete',
+                                  wraps=default_storage.delete) as delete:
+            second = publish_snapshots()
+
+        manifest = default_storage.path(snapshot_path('manifest.json'))
+        self.assertEqual(replace.call_args.args[1], manifest)
+        self.assertNotIn(mock.call(snapshot_path('manifest.json')),
+                         delete.call_args_list)
+        files = default_storage.listdir(settings.SNAPSHOTS_DIR)[1]
+        self.assertEqual([f for f in files if f.startswith('manifest')],
+                         ['manifest.json'])
+        with open(manifest) as published:
+            self.assertEqual(json.load(published)['version'],
+                             second['version'])
+
+    def test_old_versions_pruned(self):
+        """Test files left out of the manifest are deleted once older
+        than SNAPSHOTS_KEEP."""
+        first = publish_snapshots()
+        self.test.name = 'Denver III'
+        self.test.save()
+
+        with override_settings(SNAPSHOTS_KEEP=0):
+            second = publish_snapshots()
+
+        files = default_storage.listdir(settings.SNAPSHOTS_DIR)[1]
+        old = first['tests'][str(self.test.id)]
+        self.assertNotIn(old, files)
+        self.assertNotIn(old + '.gz', files)
+        self.assertIn(second['tests'][str(self.test.id)], files)
+        self.assertIn(second['tests'][str(self.test.id)] + '.gz', files)
+        self.assertIn(second['list'], files)
+
+    def test_pruned_by_retirement_time(self):
+        """Test files are kept SNAPSHOTS_KEEP after they left the
+        manifest, however long ago they were written."""
+        first = publish_snapshots()
+        old = first['tests'][str(self.test.id)]
+        week_ago = time.time() - 7 * 86400
+        for suffix in ('', '.gz'):
+            path = default_storage.path(snapshot_path(old + suffix))
+            os.utime(path, (week_ago, week_ago))
+        self.test.name = 'Denver III'
+        self.test.save()
+
+        second = publish_snapshots()
+
+        files = default_storage.listdir(settings.SNAPSHOTS_DIR)[1]
+        self.assertIn(old, files)
+        self.assertEqual(second['retired'][old], second['published'])
+        self.test.name = 'Denver IV'
+        self.test.save()
+
+        third = publish_snapshots()
+
+        self.assertEqual(third['retired'][old], second['published'])
+        with override_settings(SNAPSHOTS_KEEP=0):
+            publish_snapshots()
+        files = default_storage.listdir(settings.SNAPSHOTS_DIR)[1]
+        self.assertNotIn(old, files)
+
+    def test_token_required(self):
+        """Test snapshots need a token unless they are public."""
+        publish_snapshots()
+        self.client.credentials()
+
+        response = self.client.get(snapshot_url('manifest.json'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(SNAPSHOTS_PUBLIC=True):
+            response = self.client.get(snapshot_url('manifest.json'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_snapshot(self):
+        """Test missing or invalid names are not found."""
+        response = self.client.get(snapshot_url('test-1.abc.json'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(snapshot_url('..%2Fsecret.json'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_publish_command(self):
+        """Test the command publishes the snapshots."""
+        out = StringIO()
+
+        call_command('publishsnapshots', stdout=out)
+
+        self.assertIn('with 1 tests', out.getvalue())
+        response = self.client.get(snapshot_url('manifest.json'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -11,4 +11,16 @@ urlpatterns = [
     path('view/', views.AssessmentsListViews.as_view(), name='list'),
     path('view/<int:pk>/', views.AssessmentDetailViews.as_view(),
          name='detail'),
+    path('assign/', views.BulkAssignmentView.as_view(), name='assign'),
+    path('unassign/', views.BulkUnassignmentView.as_view(),
+         name='unassign'),
+    path('snapshots/<str:name>', views.snapshot_view, name='snapshot'),
+    path('session/', views.SessionCreateView.as_view(),
+         name='session-create'),
+    path('session/<int:pk>/', views.SessionDetailView.as_view(),
+         name='session-detail'),
+    path('session/<int:pk>/autosave/', views.SessionAutosaveView.as_view(),
+         name='session-autosave'),
+    path('session/<int:pk>/commit/', views.SessionCommitView.as_view(),
+         name='session-commit'),
 ]
@@ -2,15 +2,40 @@
 Views for Asssessment APIs.
 """
 
+import re
+
+from django.db import transaction
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
 from django.shortcuts import get_object_or_404
 
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from .serializers import AssesmentsListSerializer, AssessmentDetailSerializer
+from .autosave import (SessionBusy, commit_session, merge_results,
+                       pending_results)
+from .snapshots import ENCODINGS, MANIFEST, snapshot_path
+from .serializers import (
+    AssesmentsListSerializer,
+    AssessmentDetailSerializer,
+    BulkAssignmentSerializer,
+    AssessmentSessionSerializer,
+    AutosaveSerializer,
+)
 from .permissions import IsStaffOrReadOnly
-from core.models import Tests
+from core import audit
+from core.archive import restore_records
+from core.instruments import get_instrument
+from core.models import AssessmentSession, AuditEvent, Child, Items, Tests
+from core.views import token_user
+
+ChildTests = Child.tests.through
+
+re_snapshot = re.compile(r'^[\w-]+(\.[0-9a-f]+)?\.json$')
 
 
 class AssessmentsListViews(generics.ListAPIView):
@@ -25,7 +50,7 @@ class AssessmentsListViews(generics.ListAPIView):
 class AssessmentDetailViews(generics.RetrieveUpdateDestroyAPIView):
     """View for retriving tests' details."""
 
-    queryset = Tests.objects.all()
+    queryset = Tests.objects.prefetch_related('categories__items')
     serializer_class = AssessmentDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
@@ -35,3 +60,243 @@ class AssessmentDetailViews(generics.RetrieveUpdateDestroyAPIView):
         pk = self.kwargs.get('pk')
         obj = get_object_or_404(queryset, pk=pk)
         return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        # Served from the in-process instruments, without queries.
+        instrument = get_instrument(self.kwargs.get('pk'))
+        if instrument is None:
+            raise Http404
+        return Response(instrument.as_dict())
+
+
+class BulkAssignmentView(generics.GenericAPIView):
+    """Assign tests to many children with set based writes.
+
+    Staff users may assign any child, other users only their own.
+    """
+    serializer_class = BulkAssignmentSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_pairs(self, request):
+        """Validate the payload and return ({child id: clinic id}, test
+        ids) or an error response."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        child_ids = set(serializer.validated_data['child_ids'])
+        test_ids = set(serializer.validated_data['test_ids'])
+
+        children = Child.objects.all() if request.user.is_staff \
+            else request.user.child.all()
+        clinics = dict(children.filter(id__in=child_ids).values_list(
+            'id', 'clinic_id'))
+        if clinics.keys() != child_ids:
+            return None, Response(
+                {'child_ids': sorted(child_ids - clinics.keys())},
+                status=status.HTTP_400_BAD_REQUEST)
+        found = set(Tests.objects.filter(id__in=test_ids).values_list(
+            'id', flat=True))
+        if found != test_ids:
+            return None, Response(
+                {'test_ids': sorted(test_ids - found)},
+                status=status.HTTP_400_BAD_REQUEST)
+        return (clinics, test_ids), None
+
+    def audit(self, action, pairs, clinics):
+        """Record an assignment event per (child id, test id) pair."""
+        audit.record_on_commit([
+            (action, 'assignment', test_id, child_id, clinics[child_id])
+            for child_id, test_id in pairs
+        ])
+
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        pairs, error = self.get_pairs(request)
+        if error:
+            return error
+        clinics, test_ids = pairs
+
+        existing = set(ChildTests.objects.filter(
+            child_id__in=clinics, tests_id__in=test_ids,
+        ).values_list('child_id', 'tests_id'))
+        assigned = [(child_id, test_id) for child_id in clinics
+                    for test_id in test_ids
+                    if (child_id, test_id) not in existing]
+        ChildTests.objects.bulk_create(
+            [ChildTests(child_id=child_id, tests_id=test_id)
+             for child_id, test_id in assigned],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        # bulk_create sends no signals for the assignments.
+        self.audit(AuditEvent.CREATE, assigned, clinics)
+        return Response({'assigned': len(assigned),
+                         'already_assigned': len(existing)},
+                        status=status.HTTP_200_OK)
+
+
+class BulkUnassignmentView(BulkAssignmentView):
+    """Remove tests from many children with a single delete."""
+
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        pairs, error = self.get_pairs(request)
+        if error:
+            return error
+        clinics, test_ids = pairs
+
+        assignments = ChildTests.objects.filter(
+            child_id__in=clinics, tests_id__in=test_ids)
+        removed = list(assignments.values_list('child_id', 'tests_id'))
+        deleted, _ = assignments.delete()
+        self.audit(AuditEvent.DELETE, removed, clinics)
+        return Response({'unassigned': deleted}, status=status.HTTP_200_OK)
+
+
+class SessionCreateView(generics.CreateAPIView):
+    """Start administering a test to a child.
+
+    Archived records of the child are moved back to Records.
+    """
+    serializer_class = AssessmentSessionSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        child = serializer.validated_data['child']
+        test = serializer.validated_data['test']
+
+        children = Child.objects.all() if request.user.is_staff \
+            else request.user.child.all()
+        if not children.filter(id=child.id).exists():
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if not child.tests.filter(id=test.id).exists():
+            return Response({'test': ['Test is not assigned to the child.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            serializer.save(tester=request.user)
+            # Readers of the child's history only query Records.
+            restore_records(child.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def busy_response():
+    return Response({'detail': 'Session is busy, retry shortly.'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': '1'})
+
+
+class SessionMixin:
+    """Sessions of the requesting tester."""
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AssessmentSession.objects.filter(tester=self.request.user)
+
+
+class SessionDetailView(SessionMixin, generics.RetrieveAPIView):
+    """Session with its autosaved, not yet committed results."""
+    serializer_class = AssessmentSessionSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        data = self.get_serializer(session).data
+        data['pending'] = pending_results(session.id)
+        return Response(data)
+
+
+class SessionAutosaveView(SessionMixin, generics.GenericAPIView):
+    """Merge a diff of item results into the session's buffer.
+
+    The buffer is kept in the cache; nothing is written to the database
+    until the session is committed.
+    """
+    serializer_class = AutosaveSerializer
+
+    def post(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.finished:
+            return Response({'detail': 'Session is finished.'},
+                            status=status.HTTP_409_CONFLICT)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.validated_data['results']
+
+        found = set(Items.objects.filter(
+            test_id=session.test_id, id__in=results,
+        ).values_list('id', flat=True))
+        if found != set(results):
+            return Response({'results': sorted(set(results) - found)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pending = merge_results(session.id, results)
+        except SessionBusy:
+            return busy_response()
+        if pending is None:
+            return Response({'detail': 'Session is finished.'},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'pending': pending}, status=status.HTTP_200_OK)
+
+
+class SessionCommitView(SessionMixin, generics.GenericAPIView):
+    """Finish a session and write its results to Records at once."""
+    serializer_class = AssessmentSessionSerializer
+
+    def post(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            written = commit_session(session)
+        except SessionBusy:
+            return busy_response()
+        if written is None:
+            return Response({'detail': 'Session is finished.'},
+                            status=status.HTTP_409_CONFLICT)
+        data = self.get_serializer(session).data
+        data['records'] = written
+        return Response(data, status=status.HTTP_200_OK)
+
+
+def snapshot_view(request, name):
+    """Serve a published snapshot file, see assessment.snapshots.
+
+    Versioned files are cached for a year as immutable, pre-compressed
+    with the best encoding the client accepts. The manifest is
+    revalidated on every use. Unless SNAPSHOTS_PUBLIC is set, a token is
+    required like on the detail endpoint.
+    """
+    if not settings.SNAPSHOTS_PUBLIC and token_user(request) is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED)
+    if not re_snapshot.match(name):
+        raise Http404
+
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encodings = [] if name == MANIFEST else [
+        (encoding, suffix) for encoding, suffix in ENCODINGS.items()
+        if re.search(rf'\b{encoding}\b', accept)]
+    for encoding, suffix in encodings + [(None, '')]:
+        path = snapshot_path(name + suffix)
+        if default_storage.exists(path):
+            break
+    else:
+        raise Http404
+
+    with default_storage.open(path) as snapshot:
+        response = HttpResponse(snapshot.read(),
+                                content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if name == MANIFEST:
+        response['Cache-Control'] = 'no-cache'
+    else:
+        visibility = 'public' if settings.SNAPSHOTS_PUBLIC else 'private'
+        response['Cache-Control'] = \
+            f'{visibility}, max-age=31536000, immutable'
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
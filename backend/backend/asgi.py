@@ -3,6 +3,10 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The server-sent event streams (api/user/events/ and
+api/user/child/<pk>/events/) are only served by this application, e.g.
+with WEB_WORKER_CLASS=uvicorn.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -14,3 +18,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+from core import audit  # noqa: E402
+
+audit.start()
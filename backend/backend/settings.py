@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,15 +25,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config("DEBUG", default=True, cast=bool)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="", cast=Csv())
 
 
 # Application definition
 
+# The admin site can be turned off in production.
+ADMIN_ENABLED = config("ADMIN_ENABLED", default=True, cast=bool)
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -45,19 +47,36 @@ INSTALLED_APPS = [
     'core',
     'assessment',
     'user',
+    'jobs',
+    'search',
 
 ]
 
+if ADMIN_ENABLED:
+    INSTALLED_APPS.insert(0, 'django.contrib.admin')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.TenantMiddleware',
+    'core.middleware.IdempotencyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Logs N+1 patterns and slow queries per request, meant for staging.
+QUERY_INSPECTION = config("QUERY_INSPECTION", default=False, cast=bool)
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=100, cast=int)
+
+if QUERY_INSPECTION:
+    MIDDLEWARE.append('core.middleware.QueryInspectionMiddleware')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -90,8 +109,64 @@ DATABASES = {
         'PASSWORD': config("DB_PASSWORD"),
         'HOST': config("DB_HOST"),
         'PORT': config("DB_PORT"),
+        # Persistent connections, reused across requests of a worker.
+        'CONN_MAX_AGE': config("DB_CONN_MAX_AGE", default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config("DB_CONN_HEALTH_CHECKS", default=True,
+                                     cast=bool),
+    }
+}
+
+# Optional psycopg2 connection pool, PostgreSQL only.
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+
+if DB_POOL and DATABASES['default']['ENGINE'] == \
+        'django.db.backends.postgresql':
+    DATABASES['default'].update({
+        'ENGINE': 'core.db.backends.postgresql_pool',
+        # Connections go back to the pool at the end of each request.
+        'CONN_MAX_AGE': 0,
+        'POOL_OPTIONS': {
+            'MIN_SIZE': config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            'MAX_SIZE': config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        },
+    })
+
+# Read replicas, one alias per host. For SQLite each entry is a file name.
+DB_REPLICA_HOSTS = config("DB_REPLICA_HOSTS", default="", cast=Csv())
+
+for index, host in enumerate(DB_REPLICA_HOSTS):
+    replica = {**DATABASES['default'], 'HOST': host,
+               'TEST': {'MIRROR': 'default'}}
+    if 'sqlite3' in replica['ENGINE']:
+        replica['NAME'] = host
+    DATABASES[f'replica_{index}'] = replica
+
+REPLICA_DATABASES = [alias for alias in DATABASES
+                     if alias.startswith('replica_')]
+# Seconds a client reads from the primary after a write.
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=5, cast=int)
+REPLICA_PIN_COOKIE = config("REPLICA_PIN_COOKIE", default="replica_pin")
+
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+
+# Cache shared by every worker, e.g. Redis:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://localhost:6379/0
+# or the database (run createcachetable first):
+#   CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+#   CACHE_LOCATION=cache_table
+# The default is per process, fine for development only.
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': config("CACHE_LOCATION", default=""),
     }
 }
+# Fail the system checks when the default cache is per process.
+REQUIRE_SHARED_CACHE = config("REQUIRE_SHARED_CACHE", default=False,
+                              cast=bool)
 
 
 # Password validation
@@ -130,6 +205,56 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Local storage for generated files such as job results.
+MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR / 'media'))
+
+JOBS_RESULT_DIR = 'jobs'
+# Published assessment snapshots, see assessment.snapshots. Public
+# snapshots are served without a token and may be cached by proxies.
+SNAPSHOTS_DIR = 'snapshots/assessments'
+SNAPSHOTS_PUBLIC = config("SNAPSHOTS_PUBLIC", default=False, cast=bool)
+# Seconds files left out of the manifest are kept, from the publish that
+# left them out, for clients holding an earlier manifest.
+SNAPSHOTS_KEEP = config("SNAPSHOTS_KEEP", default=86400, cast=int)
+# Seconds a stored response is replayed for retries with its
+# Idempotency-Key; expired keys are deleted by clearidempotencykeys.
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=86400, cast=int)
+# Seconds after which a request that claimed a key and never stored its
+# response loses the claim to a retry.
+IDEMPOTENCY_CLAIM_TIMEOUT = config("IDEMPOTENCY_CLAIM_TIMEOUT", default=60,
+                                   cast=int)
+# Audit trail, see core.audit. AUDIT_OVERFLOW is "flush" (requests wait
+# for a write when the queue is full) or "drop".
+AUDIT_ENABLED = config("AUDIT_ENABLED", default=True, cast=bool)
+AUDIT_QUEUE_SIZE = config("AUDIT_QUEUE_SIZE", default=10000, cast=int)
+AUDIT_BATCH_SIZE = config("AUDIT_BATCH_SIZE", default=500, cast=int)
+AUDIT_FLUSH_INTERVAL = config("AUDIT_FLUSH_INTERVAL", default=2.0,
+                              cast=float)
+AUDIT_OVERFLOW = config("AUDIT_OVERFLOW", default="flush")
+# Pub/sub of change events for event streams, see core.events.
+EVENTS_BACKEND = config("EVENTS_BACKEND",
+                        default="core.events.LocalBackend")
+# Seconds between keepalive comments on idle event streams.
+EVENTS_KEEPALIVE = config("EVENTS_KEEPALIVE", default=15, cast=int)
+# Seconds a stream ticket can be used to open an event stream.
+EVENTS_TICKET_MAX_AGE = config("EVENTS_TICKET_MAX_AGE", default=60, cast=int)
+# Seconds after which workers rebuild their item index and instruments
+# even without a change signal.
+CATALOG_MAX_AGE = config("CATALOG_MAX_AGE", default=300, cast=int)
+# Seconds autosaved results of an open assessment session are kept.
+SESSION_BUFFER_TIMEOUT = config("SESSION_BUFFER_TIMEOUT", default=86400,
+                                cast=int)
+# Records of children inactive for this many days are moved out by the
+# archiverecords command.
+RECORDS_ARCHIVE_DAYS = config("RECORDS_ARCHIVE_DAYS", default=730, cast=int)
+RECORDS_ARCHIVE_DIR = 'archive/records'
+# Seconds the worker waits between polls of an empty queue.
+JOBS_POLL_INTERVAL = config("JOBS_POLL_INTERVAL", default=1.0, cast=float)
+# Seconds without a heartbeat after which a running job is requeued, and
+# how many times a job is run before it is failed instead.
+JOBS_LEASE_SECONDS = config("JOBS_LEASE_SECONDS", default=60, cast=int)
+JOBS_MAX_ATTEMPTS = config("JOBS_MAX_ATTEMPTS", default=3, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -144,4 +269,49 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'token_ip': config("THROTTLE_TOKEN_IP", default="30/min"),
+        'token_email': config("THROTTLE_TOKEN_EMAIL", default="10/min"),
+        'create_user_ip': config("THROTTLE_CREATE_USER_IP",
+                                 default="20/hour"),
+        'create_user_email': config("THROTTLE_CREATE_USER_EMAIL",
+                                    default="5/hour"),
+    },
+    # Proxies in front of the app whose X-Forwarded-For is trusted for
+    # client IPs. With 0 the header is ignored and REMOTE_ADDR is used.
+    'NUM_PROXIES': config("NUM_PROXIES", default=0, cast=int),
 }
+
+# API docs can be turned off in production.
+API_DOCS_ENABLED = config("API_DOCS_ENABLED", default=True, cast=bool)
+# Schema pre-generated at build time, served by /api/schema/ if present:
+#   python manage.py spectacular --file schema.yml
+API_SCHEMA_FILE = config("API_SCHEMA_FILE", default=str(BASE_DIR / 'schema.yml'))
+
+# JSON encoding backend: "stdlib" or "orjson" (needs the orjson package).
+JSON_BACKEND = config("JSON_BACKEND", default="stdlib")
+
+if JSON_BACKEND == "orjson":
+    REST_FRAMEWORK.update({
+        'DEFAULT_RENDERER_CLASSES': [
+            'core.renderers.ORJSONRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ],
+        'DEFAULT_PARSER_CLASSES': [
+            'core.renderers.ORJSONParser',
+            'rest_framework.parsers.FormParser',
+            'rest_framework.parsers.MultiPartParser',
+        ],
+    })
+
+# Responses at least this many bytes are compressed (brotli if installed).
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config("COMPRESSION_BROTLI_QUALITY", default=5,
+                                    cast=int)
+
+# Throttle bucket store: "local" (per process) or "cache" (shared).
+THROTTLE_BUCKET_STORE = config("THROTTLE_BUCKET_STORE", default="local")
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default")
+# Most buckets a worker keeps with the local store.
+THROTTLE_LOCAL_MAX_BUCKETS = config("THROTTLE_LOCAL_MAX_BUCKETS",
+                                    default=10000, cast=int)
@@ -0,0 +1,53 @@
+"""
+Production settings for backend project.
+
+Use with DJANGO_SETTINGS_MODULE=backend.settings_production, which the
+gunicorn config sets by default.
+"""
+
+from decouple import config, Csv
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK, JSON_BACKEND, BASE_DIR
+
+DEBUG = False
+
+ALLOWED_HOSTS = config("ALLOWED_HOSTS", cast=Csv())
+
+# TLS is terminated by the proxy in front of gunicorn.
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+
+# Profiles, norms generations and autosaves must be seen by all workers.
+REQUIRE_SHARED_CACHE = config("REQUIRE_SHARED_CACHE", default=True,
+                              cast=bool)
+
+# Change events must reach streams served by every worker.
+EVENTS_BACKEND = config("EVENTS_BACKEND",
+                        default="core.events.PostgresBackend")
+
+STATIC_ROOT = config("STATIC_ROOT", default=str(BASE_DIR / 'staticfiles'))
+
+# No browsable API, JSON only.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer' if JSON_BACKEND == 'orjson'
+        else 'rest_framework.renderers.JSONRenderer',
+    ],
+    # Client IPs for throttling come from the proxy's X-Forwarded-For.
+    'NUM_PROXIES': config("NUM_PROXIES", default=1, cast=int),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': config("LOG_LEVEL", default="INFO"),
+    },
+}
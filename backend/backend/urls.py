@@ -14,19 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView
-)
+
+from core.views import lazy_view, schema_view
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path('api/docs',
-         SpectacularSwaggerView.as_view(url_name='api-schema'),
-         name='api-docs'),
     path('api/user/', include('user.urls')),
     path('api/assessment/', include('assessment.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/search/', include('search.urls')),
 ]
+
+if settings.API_DOCS_ENABLED:
+    urlpatterns += [
+        path('api/schema/', schema_view, name='api-schema'),
+        path('api/docs',
+             lazy_view('drf_spectacular.views.SpectacularSwaggerView',
+                       url_name='api-schema'),
+             name='api-docs'),
+    ]
+
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -3,10 +3,12 @@ Admin Site Registerations
 """
 
 from django.contrib import admin
-from .models import (CustomUser, Child, Comments,
+from .models import (Clinic, CustomUser, Child, Comments,
                      Tests, Categories, Items,
-                     Percentages, Records)
+                     Percentages, Records, Job, AssessmentSession,
+                     AuditEvent)
 
+admin.site.register(Clinic)
 admin.site.register(Child)
 admin.site.register(Comments)
 admin.site.register(Tests)
@@ -14,9 +16,29 @@ admin.site.register(Percentages)
 admin.site.register(Records)
 
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["name", "status", "owner", "created", "finished"]
+    list_filter = ["status", "name"]
+
+
+@admin.register(AssessmentSession)
+class AssessmentSessionAdmin(admin.ModelAdmin):
+    list_display = ["child", "test", "tester", "started", "finished"]
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ["created", "user_id", "action", "model", "object_id",
+                    "child_id"]
+    list_filter = ["action", "model"]
+    date_hierarchy = "created"
+    search_fields = ["=child_id", "=user_id"]
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
-    list_display = ["name", "email", "role"]
+    list_display = ["name", "email", "role", "clinic"]
     readonly_fields = ['password']
 
 
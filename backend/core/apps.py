@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import audit, checks, events, item_index  # noqa: F401
+        from .search import create_search_index
+        post_migrate.connect(create_search_index, sender=self)
@@ -0,0 +1,234 @@
+"""
+Archive old records out of the hot Records table.
+
+Records of children inactive since a horizon, that is without newer
+records or sessions, are moved in small chunks, each in its own short
+transaction, either to the RecordsArchive table or to gzipped
+NDJSON files under MEDIA_ROOT, and the children are marked archived.
+
+Per child readers only query Records: when an archived child starts a
+new session, restore_records() moves their rows back. The norms read
+archived rows with archived_norm_rows() and the export job with
+archived_records().
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import (AssessmentSession, Child, Items, Records,
+                         RecordsArchive)
+
+FIELDS = ('id', 'child_id', 'item_id', 'is_complete', 'last_checkout',
+          'session_id', 'clinic_id')
+
+
+def archive_dir():
+    return Path(settings.MEDIA_ROOT) / settings.RECORDS_ARCHIVE_DIR
+
+
+def write_rows(path, rows):
+    with gzip.open(path, 'wt') as f:
+        for row in rows:
+            f.write(json.dumps(
+                {**row, 'last_checkout': row['last_checkout'].isoformat()}))
+            f.write('\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_ndjson(rows):
+    """Write rows to a new gzipped NDJSON file and return its path."""
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    path = directory / f'{stamp}-{rows[0]["id"]}.ndjson.gz'
+    write_rows(path, rows)
+    return path
+
+
+def archive_files():
+    directory = archive_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob('*.ndjson.gz'))
+
+
+def read_ndjson(path):
+    """Yield the row dicts of an NDJSON archive file."""
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            row = json.loads(line)
+            row['last_checkout'] = parse_datetime(row['last_checkout'])
+            yield row
+
+
+def archive_candidates(before, after=0):
+    """Return the records with ids over after of children inactive since
+    before, in id order."""
+    recent_records = Records.all_objects.filter(
+        child_id=OuterRef('child_id'), last_checkout__gte=before)
+    recent_sessions = AssessmentSession.all_objects.filter(
+        child_id=OuterRef('child_id'), started__gte=before)
+    return Records.objects.filter(
+        id__gt=after, last_checkout__lt=before,
+    ).exclude(
+        Exists(recent_records),
+    ).exclude(
+        Exists(recent_sessions),
+    ).order_by('id')
+
+
+def archive_chunk(before, chunk_size, target, after=0):
+    """Move the next chunk of records of inactive children with ids over
+    after, and return (count, last id read).
+
+    Old records of children active since before stay, so their history
+    is complete in the hot table. Chunks are paged by id, so the kept
+    records are read only once.
+    """
+    with transaction.atomic():
+        rows = list(archive_candidates(before, after).values(
+            *FIELDS)[:chunk_size])
+        if not rows:
+            return 0, after
+
+        path = None
+        if target == 'table':
+            RecordsArchive.objects.bulk_create([
+                RecordsArchive(**{k: row[k] for k in FIELDS if k != 'id'})
+                for row in rows
+            ])
+        else:
+            path = write_ndjson(rows)
+        try:
+            Child.all_objects.filter(
+                id__in={row['child_id'] for row in rows},
+            ).update(archived=True)
+            # Nothing references Records, so the rows are deleted in one
+            # statement, without the per-row audit and event signals.
+            Records.all_objects.filter(
+                id__in=[row['id'] for row in rows],
+            )._raw_delete(Records.all_objects.db)
+        except Exception:
+            if path is not None:
+                path.unlink()
+            raise
+    return len(rows), rows[-1]['id']
+
+
+def archive_records(before, chunk_size=5000, target='table'):
+    """Archive the records of children inactive since before and return
+    the count."""
+    if target not in ('table', 'ndjson'):
+        raise ValueError('target must be "table" or "ndjson".')
+    total = after = 0
+    while True:
+        moved, after = archive_chunk(before, chunk_size, target, after)
+        total += moved
+        if moved < chunk_size:
+            return total
+
+
+def archived_records(children):
+    """Yield archived (child_id, item_id, is_complete, last_checkout)
+    rows of the children, a Child queryset or ids, from the table and
+    the NDJSON files."""
+    yield from RecordsArchive.objects.filter(
+        child__in=children,
+    ).order_by('child_id', 'item_id').values_list(
+        'child_id', 'item_id', 'is_complete', 'last_checkout',
+    ).iterator(chunk_size=2000)
+
+    files = archive_files()
+    if not files:
+        return
+    child_ids = set(children.values_list('id', flat=True)
+                    if isinstance(children, QuerySet) else children)
+    for path in files:
+        for row in read_ndjson(path):
+            if row['child_id'] in child_ids:
+                yield (row['child_id'], row['item_id'], row['is_complete'],
+                       row['last_checkout'])
+
+
+def archived_norm_rows(first_item_id, last_item_id, chunk_size=2000):
+    """Yield archived (item_id, is_complete, last_checkout, birthday)
+    rows of the items with ids in the range, for the norms."""
+    yield from RecordsArchive.all_objects.filter(
+        item_id__gte=first_item_id, item_id__lte=last_item_id,
+    ).values_list(
+        'item_id', 'is_complete', 'last_checkout', 'child__birthday',
+    ).iterator(chunk_size=chunk_size)
+
+    files = archive_files()
+    if not files:
+        return
+    birthdays = dict(Child.all_objects.filter(
+        archived=True).values_list('id', 'birthday'))
+    for path in files:
+        for row in read_ndjson(path):
+            # Rows of deleted children have no birthday.
+            if first_item_id <= row['item_id'] <= last_item_id and \
+                    row['child_id'] in birthdays:
+                yield (row['item_id'], row['is_complete'],
+                       row['last_checkout'], birthdays[row['child_id']])
+
+
+def rewrite_files(files):
+    """Replace the {path: rows} archive files, removing empty ones."""
+    for path, rows in files.items():
+        if not rows:
+            path.unlink()
+            continue
+        temporary = path.with_name(path.name + '.tmp')
+        write_rows(temporary, rows)
+        os.replace(temporary, path)
+
+
+def restore_records(child_id):
+    """Move the archived records of an active again child back to
+    Records and return the count."""
+    with transaction.atomic():
+        # Claims the restore, so concurrent ones find nothing to do.
+        if not Child.all_objects.filter(
+                id=child_id, archived=True).update(archived=False):
+            return 0
+        archived = RecordsArchive.all_objects.filter(child_id=child_id)
+        rows = list(archived.values(*FIELDS[1:]))
+        files = {}
+        for path in archive_files():
+            found, kept = [], []
+            for row in read_ndjson(path):
+                (found if row['child_id'] == child_id else kept).append(row)
+            if found:
+                rows.extend(found)
+                files[path] = kept
+        records = Records.all_objects.bulk_create([
+            Records(**{k: row[k] for k in FIELDS if k != 'id'})
+            for row in rows
+        ])
+        # last_checkout is auto_now_add, so bulk_create set it to now.
+        for record, row in zip(records, rows):
+            record.last_checkout = row['last_checkout']
+        Records.all_objects.bulk_update(records, ['last_checkout'],
+                                        batch_size=1000)
+        archived.delete()
+        transaction.on_commit(lambda: rewrite_files(files))
+    return len(rows)
+
+
+def item_labels():
+    """Return {item id: (test name, category name, step)}."""
+    return {
+        item_id: (test, category, step)
+        for item_id, test, category, step in Items.objects.values_list(
+            'id', 'test__name', 'category__name', 'step')
+    }
@@ -0,0 +1,213 @@
+"""
+Audit trail of who viewed or changed children, records and comments.
+
+Events are queued in memory per process and written with bulk_create.
+In the web servers, set up by the WSGI and ASGI modules, a thread per
+process writes them every AUDIT_FLUSH_INTERVAL seconds or as soon as
+AUDIT_BATCH_SIZE events are queued; gunicorn workers also write the
+queue on exit. Other processes, like management commands,
+write each AUDIT_BATCH_SIZE events from the caller, and flush() should
+be called before they exit.
+
+The queue holds at most AUDIT_QUEUE_SIZE events. When it is full,
+AUDIT_OVERFLOW decides: "flush" makes the caller write the queue before
+going on, so no event is lost but the request waits; "drop" discards
+the event and counts it in queue.dropped. A batch that can't be written
+goes back to the queue for the next flush.
+
+Changes are queued once their transaction commits, so rolled back
+changes leave no events. Saves and deletes of single rows are recorded
+by signals; bulk writes, like committing a session or assigning tests,
+record their events explicitly with record_on_commit().
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import AuditEvent, Child, Comments, Records
+from core.tenancy import current_user
+
+logger = logging.getLogger('core.audit')
+
+
+class AuditQueue:
+    """Bounded in-memory queue of AuditEvents, flushed in batches."""
+
+    def __init__(self, maxsize, batch_size, interval, overflow):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self.overflow = overflow
+        self.events = deque()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.dropped = 0
+        self.thread = None
+        self.wakeup = threading.Event()
+
+    def put(self, event):
+        with self.lock:
+            full = len(self.events) >= self.maxsize
+            if not full:
+                self.events.append(event)
+        if full:
+            if self.overflow == 'drop':
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logger.warning('Audit queue full, %d events dropped',
+                                   self.dropped)
+                return
+            self.flush()
+            with self.lock:
+                self.events.append(event)
+        if len(self.events) >= self.batch_size:
+            if self.thread is not None:
+                self.wakeup.set()
+            else:
+                self.flush()
+
+    def flush(self):
+        """Write the queued events, returning how many were written.
+
+        On errors the events are put back in front of the queue.
+        """
+        with self.flush_lock:
+            with self.lock:
+                events, self.events = list(self.events), deque()
+            if events:
+                try:
+                    with transaction.atomic():
+                        AuditEvent.objects.bulk_create(
+                            events, batch_size=self.batch_size)
+                except Exception:
+                    with self.lock:
+                        self.events.extendleft(reversed(events))
+                    raise
+            return len(events)
+
+    def start(self):
+        """Flush every interval from a daemon thread."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, daemon=True,
+                                           name='audit-flush')
+        self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                connection.close_if_unusable_or_obsolete()
+                self.flush()
+            except Exception:
+                logger.exception('Could not write audit events')
+
+
+_queue = None
+_threaded = False
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        _queue = AuditQueue(
+            settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE,
+            settings.AUDIT_FLUSH_INTERVAL, settings.AUDIT_OVERFLOW)
+    return _queue
+
+
+def start():
+    """Write events from a thread, called by the web servers.
+
+    The thread is started with the first event, so that with gunicorn's
+    preload_app every worker starts its own after the fork.
+    """
+    global _threaded
+    _threaded = True
+
+
+def _reset_after_fork():
+    # Events queued in the parent are the parent's to write.
+    global _queue
+    _queue = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def build_event(action, model, object_id, child_id, clinic_id=None,
+                path=''):
+    """Return an unsaved AuditEvent by the current user."""
+    user = current_user()
+    return AuditEvent(
+        created=timezone.now(),
+        user_id=None if user is None else user.id,
+        child_id=child_id,
+        clinic_id=clinic_id,
+        action=action,
+        model=model,
+        object_id=object_id,
+        path=path[:255],
+    )
+
+
+def put(events):
+    queue = get_queue()
+    if _threaded:
+        queue.start()
+    for event in events:
+        queue.put(event)
+
+
+def record(action, model, object_id, child_id, clinic_id=None, path=''):
+    """Queue an audit event by the current user."""
+    if not settings.AUDIT_ENABLED:
+        return
+    put([build_event(action, model, object_id, child_id, clinic_id, path)])
+
+
+def record_on_commit(changes):
+    """Queue events of (action, model, object id, child id, clinic id)
+    changes once the current transaction commits."""
+    if not settings.AUDIT_ENABLED:
+        return
+    events = [build_event(*change) for change in changes]
+    if events:
+        transaction.on_commit(lambda: put(events))
+
+
+def audit_trail(child_id, start=None, end=None):
+    """Return the written events of a child, newest first."""
+    events = AuditEvent.objects.filter(child_id=child_id)
+    if start is not None:
+        events = events.filter(created__gte=start)
+    if end is not None:
+        events = events.filter(created__lt=end)
+    return events.order_by('-created')
+
+
+@receiver(post_save, sender=Records)
+@receiver(post_delete, sender=Records)
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+def audit_change(sender, instance, **kwargs):
+    if 'created' not in kwargs:
+        action = AuditEvent.DELETE
+    else:
+        action = AuditEvent.CREATE if kwargs['created'] \
+            else AuditEvent.UPDATE
+    child_id = instance.pk if sender is Child else instance.child_id
+    record_on_commit([(action, sender._meta.model_name, instance.pk,
+                       child_id, instance.clinic_id)])
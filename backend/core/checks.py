@@ -0,0 +1,43 @@
+"""
+System checks for the core app.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+POOL_ENGINE = 'core.db.backends.postgresql_pool'
+PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_connection_reuse(app_configs, **kwargs):
+    """Warn when every request would open a new database connection."""
+    errors = []
+    for alias, db in settings.DATABASES.items():
+        if 'sqlite3' in db['ENGINE'] or db['ENGINE'] == POOL_ENGINE:
+            continue
+        if not db.get('CONN_MAX_AGE'):
+            errors.append(Warning(
+                f'Database "{alias}" opens a new connection per request.',
+                hint='Set DB_CONN_MAX_AGE or enable DB_POOL.',
+                id='core.W001',
+            ))
+    return errors
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Fail when workers would not share the default cache."""
+    backend = settings.CACHES['default']['BACKEND']
+    if getattr(settings, 'REQUIRE_SHARED_CACHE', False) and \
+            backend in PROCESS_CACHES:
+        return [Error(
+            f'The default cache ({backend}) is not shared between workers.',
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache, '
+                 'e.g. Redis or the database.',
+            id='core.E002',
+        )]
+    return []
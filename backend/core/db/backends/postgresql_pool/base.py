@@ -0,0 +1,59 @@
+"""
+PostgreSQL backend that hands out connections from a psycopg2 pool.
+
+Use with CONN_MAX_AGE = 0: Django "closes" the connection at the end of
+each request, which returns it to the pool instead of dropping it.
+"""
+
+import os
+import threading
+
+import psycopg2.extras
+from psycopg2 import pool as pg_pool
+
+from django.db.backends.postgresql import base
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    # Sockets must never be shared between forked workers.
+    os.register_at_fork(after_in_child=_pools.clear)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Database wrapper with a per alias ThreadedConnectionPool."""
+
+    def get_pool(self, conn_params):
+        """Return the pool for this alias, creating it on first use."""
+        pool = _pools.get(self.alias)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(self.alias)
+                if pool is None:
+                    options = self.settings_dict.get('POOL_OPTIONS', {})
+                    pool = pg_pool.ThreadedConnectionPool(
+                        options.get('MIN_SIZE', 2),
+                        options.get('MAX_SIZE', 10),
+                        **conn_params,
+                    )
+                    _pools[self.alias] = pool
+        return pool
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', base.IsolationLevel.READ_COMMITTED)
+        connection = self.get_pool(conn_params).getconn()
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        """Return the connection to the pool instead of closing it."""
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                _pools[self.alias].putconn(self.connection)
@@ -0,0 +1,48 @@
+"""
+Database routers.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def replica_reads():
+    """Send reads inside the block to one read replica.
+
+    The replica is chosen once for the block, so all reads of a request
+    see the same replica.
+    """
+    replicas = getattr(settings, 'REPLICA_DATABASES', [])
+    token = _replica.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to a replica when allowed and writes to the primary.
+
+    Reads only go to a replica inside replica_reads(), which the
+    ReplicaRoutingMiddleware enters for safe-method requests. Everything
+    else, including management commands, reads from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'REPLICA_DATABASES', [])
@@ -0,0 +1,239 @@
+"""
+Change events of children, records and comments for live clients.
+
+Saves and deletes publish an event after their transaction commits to
+the channels "child:<id>" and "clinic:<id>". Event streams subscribe to
+those channels through the backend named by EVENTS_BACKEND.
+
+The default LocalBackend delivers events only to subscribers in the same
+process. Deployments with several workers use PostgresBackend, which
+sends events through PostgreSQL LISTEN/NOTIFY, or any class with the
+same publish() and subscribe() methods.
+
+Clients that can't send headers, like EventSource, authenticate streams
+with a short-lived signed ticket from stream_ticket() instead of their
+API token, so tokens never end up in URLs and access logs.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from core.models import Child, Comments, Records
+
+logger = logging.getLogger(__name__)
+
+TICKET_SALT = 'core.events.ticket'
+
+
+class Subscription:
+    """Queue of the events published to some channels."""
+
+    def __init__(self, backend, channels, maxsize):
+        self.backend = backend
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, event):
+        # Runs on the subscriber's loop; slow clients lose events.
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Return the next event, or None after timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """In-process pub/sub, thread safe."""
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+    def subscribe(self, channels):
+        """Return a Subscription, called from the subscriber's loop."""
+        subscription = Subscription(self, channels, self.maxsize)
+        with self.lock:
+            for channel in channels:
+                self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscriptions = self.subscriptions.get(channel)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self.subscriptions[channel]
+
+
+class PostgresBackend(LocalBackend):
+    """Pub/sub through PostgreSQL LISTEN/NOTIFY, shared by all workers.
+
+    Events are sent with pg_notify() on NOTIFY_CHANNEL. Each process
+    listens on one dedicated connection, from a thread started by its
+    first subscription, and hands the events to its local subscribers.
+    """
+
+    NOTIFY_CHANNEL = 'core_events'
+
+    def __init__(self, maxsize=100, alias='default'):
+        super().__init__(maxsize)
+        self.alias = alias
+        self.listener = None
+
+    def publish(self, channel, event):
+        message = json.dumps({'channel': channel, 'event': event})
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)',
+                           [self.NOTIFY_CHANNEL, message])
+
+    def subscribe(self, channels):
+        self.start()
+        return super().subscribe(channels)
+
+    def start(self):
+        """Start the listener thread unless it is running."""
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(
+                    target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+
+    def deliver(self, payload):
+        """Hand a notification payload to the local subscribers."""
+        message = json.loads(payload)
+        super().publish(message['channel'], message['event'])
+
+    def connect(self):
+        """Return a new autocommit connection listening for events."""
+        import psycopg2
+
+        connection = connections[self.alias]
+        conn = psycopg2.connect(**connection.get_connection_params())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.NOTIFY_CHANNEL}')
+        return conn
+
+    def listen(self):
+        """Deliver notifications until the process exits, reconnecting
+        after errors. Events sent while disconnected are lost."""
+        while True:
+            try:
+                conn = self.connect()
+                try:
+                    while True:
+                        if select.select([conn], [], [], 5)[0]:
+                            conn.poll()
+                            while conn.notifies:
+                                self.deliver(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception('Event listener failed, reconnecting.')
+                time.sleep(1)
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the backend selected by EVENTS_BACKEND."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.EVENTS_BACKEND)()
+    return _backend
+
+
+def stream_ticket(user):
+    """Return a signed ticket authenticating user's event streams."""
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def ticket_user(ticket):
+    """Return the active user of a ticket younger than
+    EVENTS_TICKET_MAX_AGE seconds, or None."""
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT,
+                                max_age=settings.EVENTS_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(
+        pk=user_id, is_active=True).first()
+
+
+def channels_for(child_id, clinic_id=None):
+    channels = [f'child:{child_id}']
+    if clinic_id is not None:
+        channels.append(f'clinic:{clinic_id}')
+    return channels
+
+
+def publish(event, child_id, clinic_id=None):
+    """Publish event once the current transaction commits."""
+    def send():
+        backend = get_backend()
+        for channel in channels_for(child_id, clinic_id):
+            backend.publish(channel, event)
+    transaction.on_commit(send)
+
+
+async def event_stream(subscription, keepalive):
+    """Yield server-sent events of a subscription until disconnect."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            event = await subscription.get(keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+    finally:
+        subscription.close()
+
+
+@receiver(post_save, sender=Records)
+@receiver(post_delete, sender=Records)
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+def publish_change(sender, instance, **kwargs):
+    action = 'deleted' if 'created' not in kwargs else 'saved'
+    child_id = instance.pk if sender is Child else instance.child_id
+    publish({
+        'type': f'{sender._meta.model_name}.{action}',
+        'id': instance.pk,
+        'child': child_id,
+    }, child_id, instance.clinic_id)
@@ -0,0 +1,119 @@
+"""
+Growth curves of a child's milestones against the norms.
+
+For each category the child's milestones at an age are the items first
+passed at or before that age. The norm for an age is the distribution
+of the number of items passed by children of that age, where item i is
+passed with its pass rate p_i at that age (a Poisson binomial
+distribution). The child's percentile is their position in it.
+
+Everything is computed with NumPy arrays over items x months; the only
+Python loop is over the items of a category when building the
+distribution, vectorized over every checkpoint at once.
+"""
+
+import numpy as np
+
+from core.models import Items, Percentages, Records
+from core.norms import MAX_MONTH
+
+
+def dense_curves(item_ids, points, max_month=MAX_MONTH):
+    """Return pass rates (items x months, 0..1) from sparse points.
+
+    A month without data takes the closest earlier month's rate, and 0
+    before the first one.
+    """
+    index = {item_id: i for i, item_id in enumerate(item_ids)}
+    curves = np.full((len(item_ids), max_month + 1), np.nan)
+    for item_id, month, percent in points:
+        if item_id in index and 0 <= month <= max_month:
+            curves[index[item_id], month] = percent / 100
+    known = ~np.isnan(curves)
+    last = np.where(known, np.arange(max_month + 1), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    filled = curves[np.arange(len(item_ids))[:, None], last]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def passed_distribution(rates):
+    """Return P(X = k) for X a sum of Bernoulli(rates[i]).
+
+    rates is items x checkpoints; the result is checkpoints x (items+1).
+    """
+    n_items, n_points = rates.shape
+    dist = np.zeros((n_points, n_items + 1))
+    dist[:, 0] = 1.0
+    for i in range(n_items):
+        p = rates[i][:, None]
+        shifted = np.zeros_like(dist)
+        shifted[:, 1:] = dist[:, :-1]
+        dist = dist * (1 - p) + shifted * p
+    return dist
+
+
+def percentiles(dist, counts):
+    """Return mid-rank percentiles of counts in the distributions."""
+    below = np.cumsum(dist, axis=1) - dist
+    rows = np.arange(len(counts))
+    return 100 * (below[rows, counts] + dist[rows, counts] / 2)
+
+
+def growth_curves(child, max_month=MAX_MONTH):
+    """Return the growth curves per test and category of the child."""
+    items = list(Items.objects.filter(test__child=child).values_list(
+        'id', 'test_id', 'test__name', 'category_id', 'category__name'))
+    if not items:
+        return []
+    item_ids = np.array([item[0] for item in items])
+    categories = np.array([item[3] for item in items])
+
+    curves = dense_curves(
+        item_ids.tolist(),
+        Percentages.objects.filter(item_id__in=item_ids.tolist())
+        .values_list('item_id', 'month', 'percent'),
+        max_month,
+    )
+
+    records = list(Records.objects.filter(
+        child=child, is_complete=True, item_id__in=item_ids.tolist(),
+    ).values_list('item_id', 'last_checkout'))
+    # Age in months at which each item was first passed, inf if never.
+    first_passed = np.full(len(item_ids), np.inf)
+    if records:
+        index = {item_id: i for i, item_id in enumerate(item_ids.tolist())}
+        record_items = np.array([index[r[0]] for r in records])
+        days = (np.array([r[1].date() for r in records],
+                         dtype='datetime64[D]')
+                - np.datetime64(child.birthday, 'D')).astype(np.int64)
+        months = np.clip(np.rint(days / 30), 0, max_month)
+        np.minimum.at(first_passed, record_items, months)
+    checkpoints = np.unique(first_passed[np.isfinite(first_passed)]).astype(
+        np.int64)
+
+    tests = {}
+    for _, test_id, test_name, category_id, category_name in items:
+        test = tests.setdefault(test_id, {
+            'id': test_id, 'name': test_name, 'categories': {}})
+        if category_id in test['categories']:
+            continue
+        in_category = categories == category_id
+        rates = curves[in_category]
+        passed = first_passed[in_category]
+        milestones = (passed[:, None] <= checkpoints[None, :]).sum(axis=0)
+        dist = passed_distribution(rates[:, checkpoints])
+        test['categories'][category_id] = {
+            'id': category_id,
+            'name': category_name,
+            'norm': np.round(rates.sum(axis=0), 2).tolist(),
+            'checkpoints': [
+                {'age_in_months': int(month), 'milestones': int(count),
+                 'percentile': round(float(pct), 1)}
+                for month, count, pct in zip(
+                    checkpoints, milestones,
+                    percentiles(dist, milestones))
+            ],
+        }
+    for test in tests.values():
+        test['categories'] = list(test['categories'].values())
+    return list(tests.values())
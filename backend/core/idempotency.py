@@ -0,0 +1,109 @@
+"""
+Replay of write requests retried with the same Idempotency-Key.
+
+The first request with a key claims a row by inserting it, runs, and
+stores its response in the row. Retries within IDEMPOTENCY_KEY_TTL find
+the row with one lookup on the unique key and get the stored response
+back without running the view again.
+
+Only successful responses and client errors that a retry would get
+again are stored. Other responses release the key so the request can be
+retried for real. A claim not completed within IDEMPOTENCY_CLAIM_TIMEOUT,
+for example because its worker died, is taken over by the next retry.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Client errors that may go away on retry, whose responses aren't stored.
+RELEASED_STATUSES = {401, 403, 408, 409, 425, 429}
+
+
+def request_key(request, identity):
+    """Return the stored key of the request's Idempotency-Key."""
+    value = ':'.join([identity, request.method, request.path,
+                      request.META[HEADER]])
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def claim(key, fingerprint):
+    """Insert the in-progress row of key and return (row, claimed).
+
+    The row of a key used before that has not expired is returned with
+    claimed False instead. In-progress rows expire after
+    IDEMPOTENCY_CLAIM_TIMEOUT.
+    """
+    now = timezone.now()
+    existing = IdempotencyKey.objects.filter(key=key).first()
+    if existing is not None:
+        if existing.expires > now:
+            return existing, False
+        IdempotencyKey.objects.filter(id=existing.id).delete()
+    try:
+        with transaction.atomic():
+            row = IdempotencyKey.objects.create(
+                key=key, fingerprint=fingerprint,
+                expires=now + timedelta(
+                    seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT))
+    except IntegrityError:
+        # Another request claimed it between the lookup and the insert.
+        return IdempotencyKey.objects.get(key=key), False
+    return row, True
+
+
+def replay(row, fingerprint):
+    """Return the response for a retry of the request stored in row."""
+    if row.fingerprint != fingerprint:
+        return JsonResponse(
+            {'detail': 'Idempotency-Key was used for a different request.'},
+            status=422)
+    if row.status_code is None:
+        return JsonResponse(
+            {'detail': 'A request with this Idempotency-Key is running.'},
+            status=409)
+    response = HttpResponse(bytes(row.body), status=row.status_code,
+                            content_type=row.content_type or None)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def is_stored(status_code):
+    """Return whether a response with status_code is replayed."""
+    return (200 <= status_code < 300
+            or 400 <= status_code < 500
+            and status_code not in RELEASED_STATUSES)
+
+
+def store(row, response):
+    """Store the response of a claimed row, or release it.
+
+    Nothing is written when the claim expired and was taken over.
+    """
+    claimed = IdempotencyKey.objects.filter(id=row.id,
+                                            status_code__isnull=True)
+    if response.streaming or not is_stored(response.status_code):
+        claimed.delete()
+        return
+    claimed.update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        body=response.content,
+        expires=timezone.now() + timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL))
+
+
+def clear_expired(now=None):
+    """Delete expired keys and return how many were deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(
+        expires__lte=now or timezone.now()).delete()
+    return deleted
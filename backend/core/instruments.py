@@ -0,0 +1,183 @@
+"""
+Compact in-process copy of the instrument definitions.
+
+Every test with its categories, items and percent curves is held in
+frozen slotted dataclasses with interned strings, and each item's curve
+is an array('B') of its pass percent at every month. The whole set is a
+small fraction of the size of the equivalent model instances, so every
+worker can keep its own copy.
+
+The copy is rebuilt when the item index generation in the shared cache
+changes, that is on any change to tests, categories, items or
+Percentages, and at least every CATALOG_MAX_AGE seconds. It is always
+read from the primary, even inside replica_reads(), so a lagging
+replica can't leave a worker serving old definitions under the new
+generation.
+"""
+
+import sys
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS
+
+from core.item_index import current_generation, is_stale
+from core.models import Categories, Items, Percentages, Tests
+from core.norms import MAX_MONTH
+
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    id: int
+    step: int
+    is_verbal: bool
+    instruction: str
+    description: str
+    document: str
+    # Pass percent at each month from 0 to MAX_MONTH.
+    curve: array
+
+    def as_dict(self):
+        return {'step': self.step, 'instruction': self.instruction,
+                'description': self.description}
+
+
+@dataclass(frozen=True, slots=True)
+class Category:
+    id: int
+    name: str
+    items: tuple
+
+    def as_dict(self):
+        return {'id': self.id, 'name': self.name,
+                'items': [item.as_dict() for item in self.items]}
+
+
+@dataclass(frozen=True, slots=True)
+class Instrument:
+    id: int
+    name: str
+    categories: tuple
+
+    def as_dict(self):
+        """Return the payload of AssessmentDetailSerializer."""
+        return {'id': self.id, 'name': self.name,
+                'categories': [c.as_dict() for c in self.categories]}
+
+
+def intern(value):
+    return sys.intern(value) if value else ''
+
+
+def dense_curve(points, max_month=MAX_MONTH):
+    """Return {month: percent} as an array('B') over every month.
+
+    A month without data takes the percent of the closest earlier
+    month, and 0 before the first one.
+    """
+    curve = array('B', bytes(max_month + 1))
+    percent = 0
+    for month in range(max_month + 1):
+        percent = min(max(points.get(month, percent), 0), 100)
+        curve[month] = percent
+    return curve
+
+
+def build_instruments(using=DEFAULT_DB_ALIAS):
+    """Load every instrument from the database, {test id: Instrument}."""
+    curves = defaultdict(dict)
+    for item_id, month, percent in Percentages.objects.using(
+            using).values_list(
+            'item_id', 'month', 'percent').iterator():
+        curves[item_id][month] = percent
+
+    items = defaultdict(list)
+    for item_id, category_id, step, is_verbal, instruction, description, \
+            document in Items.objects.using(using).values_list(
+                'id', 'category_id', 'step', 'is_verbal', 'instruction',
+                'description', 'document').iterator():
+        items[category_id].append(Item(
+            item_id, step, is_verbal, intern(instruction),
+            intern(description), intern(document),
+            dense_curve(curves.get(item_id, {}))))
+
+    categories = defaultdict(list)
+    for category_id, test_id, name in Categories.objects.using(
+            using).order_by('id').values_list('id', 'test_id', 'name'):
+        categories[test_id].append(Category(
+            category_id, intern(name), tuple(items.get(category_id, ()))))
+
+    return {
+        test_id: Instrument(test_id, intern(name),
+                            tuple(categories.get(test_id, ())))
+        for test_id, name in Tests.objects.using(using).values_list(
+            'id', 'name')
+    }
+
+
+_instruments = None
+_generation = None
+_built = None
+
+
+def get_instruments():
+    """Return {test id: Instrument}, rebuilding it if stale."""
+    global _instruments, _generation, _built
+    if _instruments is None or is_stale(_generation, _built):
+        _generation = current_generation()
+        _built = time.monotonic()
+        _instruments = build_instruments()
+    return _instruments
+
+
+def get_instrument(test_id):
+    """Return the Instrument of a test, or None."""
+    return get_instruments().get(test_id)
+
+
+def deep_size(obj, seen=None):
+    """Return the bytes used by obj and everything it references."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type) or callable(obj):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(value, seen) for value in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_size(getattr(obj, name), seen)
+                    for name in obj.__slots__)
+    elif hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def process_memory(pid='self'):
+    """Return {'rss', 'pss', 'shared', 'private'} in kB of a process.
+
+    Read from /proc/<pid>/smaps_rollup, so only available on Linux;
+    returns None elsewhere.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            lines = smaps.read().splitlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        name, value = line.split(':', 1)
+        fields[name] = int(value.split()[0])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0)
+        + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0)
+        + fields.get('Private_Dirty', 0),
+    }
@@ -0,0 +1,166 @@
+"""
+In-memory index of items by age for picking the next items to administer.
+
+For each test, month and category the index holds the items sorted by
+their pass percent at that month, so the items of a percent band are
+found with two bisects. The index is built once per generation, a token
+in the shared cache that changes whenever items or norms change, and
+holds the norms version it was built from.
+"""
+
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import (Categories, Items, Percentages, Norms,
+                         NormsVersion, Tests)
+from core.norms import MAX_MONTH
+
+GENERATION_KEY = 'item_index_generation'
+
+
+def current_generation():
+    """Return the generation token, starting a new one if it is missing.
+
+    A token lost to an eviction or a cache restart is replaced, so
+    copies built before are treated as stale.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def is_stale(generation, built):
+    """Return whether a copy built at built for generation is stale.
+
+    Copies also expire after CATALOG_MAX_AGE seconds, to pick up changes
+    made without signals, such as queryset updates.
+    """
+    return (generation != current_generation()
+            or time.monotonic() - built > settings.CATALOG_MAX_AGE)
+
+
+def current_norms_version():
+    """Return the id of the norms version in use.
+
+    Recomputed norms are used once a complete version exists, otherwise
+    the static Percentages and None is returned.
+    """
+    return NormsVersion.objects.filter(is_complete=True).order_by(
+        '-created').values_list('id', flat=True).first()
+
+
+class ItemIndex:
+    """Items per (test, month, category) sorted by pass percent."""
+
+    def __init__(self, generation, version, items, curves,
+                 max_month=MAX_MONTH):
+        self.generation = generation
+        self.version = version
+        self.built = time.monotonic()
+        self.max_month = max_month
+        # item id -> (step, instruction, description)
+        self.items = {}
+        # (test id, month) -> {category id: (percents, item ids)}
+        self.months = {}
+
+        rows = defaultdict(list)
+        for item_id, test_id, category_id, step, instruction, \
+                description in items:
+            self.items[item_id] = (step, instruction, description)
+            curve = self.dense_curve(curves.get(item_id, {}))
+            for month, percent in enumerate(curve):
+                rows[(test_id, month, category_id)].append(
+                    (percent, item_id))
+
+        for (test_id, month, category_id), entries in rows.items():
+            entries.sort()
+            self.months.setdefault((test_id, month), {})[category_id] = (
+                tuple(p for p, _ in entries),
+                tuple(i for _, i in entries),
+            )
+
+    def dense_curve(self, points):
+        """Expand sparse {month: percent} to every month.
+
+        A month without data takes the percent of the closest earlier
+        month, and 0 before the first one.
+        """
+        curve = []
+        percent = 0
+        for month in range(self.max_month + 1):
+            percent = points.get(month, percent)
+            curve.append(percent)
+        return curve
+
+    def select(self, test_id, month, low, high, exclude=()):
+        """Return {category id: [(item id, percent), ...]} in the band."""
+        month = min(max(month, 0), self.max_month)
+        selected = {}
+        for category_id, (percents, item_ids) in self.months.get(
+                (test_id, month), {}).items():
+            start = bisect_left(percents, low)
+            end = bisect_right(percents, high)
+            selected[category_id] = [
+                (item_ids[i], percents[i]) for i in range(start, end)
+                if item_ids[i] not in exclude
+            ]
+        return selected
+
+
+def build_item_index(generation):
+    """Build the index from the norms version in use."""
+    version = current_norms_version()
+    if version is None:
+        points = Percentages.objects.values_list('item_id', 'month',
+                                                 'percent')
+    else:
+        points = Norms.objects.filter(version_id=version).values_list(
+            'item_id', 'month', 'percent')
+    curves = defaultdict(dict)
+    for item_id, month, percent in points.iterator():
+        curves[item_id][month] = percent
+
+    items = Items.objects.values_list(
+        'id', 'test_id', 'category_id', 'step', 'instruction',
+        'description')
+    return ItemIndex(generation, version, items, curves)
+
+
+_index = None
+
+
+def get_item_index():
+    """Return the index of the current norms, rebuilding it if stale.
+
+    Only the shared generation is read while the index is fresh.
+    """
+    global _index
+    if _index is None or is_stale(_index.generation, _index.built):
+        _index = build_item_index(current_generation())
+    return _index
+
+
+@receiver([post_save, post_delete], sender=Percentages)
+@receiver([post_save, post_delete], sender=NormsVersion)
+@receiver([post_save, post_delete], sender=Items)
+@receiver([post_save, post_delete], sender=Categories)
+@receiver([post_save, post_delete], sender=Tests)
+def bump_generation(sender, **kwargs):
+    """Invalidate indexes and instruments in all workers on changes.
+
+    The generation changes again once the transaction commits, so
+    workers that rebuilt before the commit rebuild from committed rows.
+    """
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+    transaction.on_commit(
+        lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
@@ -0,0 +1,142 @@
+"""
+Database backed job queue.
+
+Job functions are registered by name with @register_job and take the
+Job instance. They return a (filename, content) pair which is written to
+the default storage under JOBS_RESULT_DIR. Content is bytes, or an
+iterable of byte chunks written as they are produced. Jobs run scoped to
+the clinic of their owner, except those registered with scoped=False,
+which read the data of every clinic.
+
+Running jobs hold a lease renewed by the worker's heartbeat. Jobs whose
+worker died are requeued once the lease expires.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+from core.tenancy import clinic_scope
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+# Jobs only staff users may queue through the API.
+staff_jobs = set()
+# Jobs run without a clinic scope.
+unscoped_jobs = set()
+
+
+def register_job(name, staff_only=False, scoped=True):
+    """Register the decorated function as the job called name."""
+    def decorator(func):
+        registry[name] = func
+        if staff_only:
+            staff_jobs.add(name)
+        if not scoped:
+            unscoped_jobs.add(name)
+        return func
+    return decorator
+
+
+def enqueue(name, owner=None, **params):
+    """Create and return a queued job."""
+    if name not in registry:
+        raise ValueError(f'Unknown job "{name}".')
+    return Job.objects.create(name=name, owner=owner, params=params)
+
+
+class ChunkedFile(File):
+    """File whose content comes from an iterable of chunks.
+
+    Storages write chunks as the iterable yields them, so results are
+    never held in memory as a whole.
+    """
+
+    def __init__(self, chunks):
+        super().__init__(None)
+        self._chunks = chunks
+
+    def chunks(self, chunk_size=None):
+        yield from self._chunks
+
+
+def reclaim_jobs():
+    """Requeue running jobs whose lease expired and return how many.
+
+    Jobs that already ran JOBS_MAX_ATTEMPTS times are failed instead.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat__lt=now - timedelta(seconds=settings.JOBS_LEASE_SECONDS))
+    stale.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS).update(
+        status=Job.FAILED, error='Job lease expired.', finished=now)
+    return stale.update(status=Job.QUEUED)
+
+
+def heartbeat(job_ids):
+    """Renew the lease of running jobs."""
+    return Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(
+        heartbeat=timezone.now())
+
+
+def claim_jobs(limit):
+    """Mark up to limit queued jobs as running and return their ids.
+
+    The conditional update makes the claim atomic, so several workers
+    can poll the same table without a broker or row locks.
+    """
+    reclaim_jobs()
+    claimed = []
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by(
+        'created').values_list('id', flat=True)[:limit]
+    for job_id in candidates:
+        now = timezone.now()
+        updated = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started=now, heartbeat=now,
+            attempts=F('attempts') + 1)
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def run_job(job_id):
+    """Run a claimed job and store its result file or error."""
+    job = Job.objects.select_related('owner').get(id=job_id)
+    clinic_id = None
+    if job.owner and job.name not in unscoped_jobs:
+        clinic_id = job.owner.clinic_id
+    try:
+        with clinic_scope(clinic_id):
+            filename, content = registry[job.name](job)
+            content = (ContentFile(content) if isinstance(content, bytes)
+                       else ChunkedFile(content))
+            path = default_storage.save(
+                f'{settings.JOBS_RESULT_DIR}/{job.id}/{filename}', content)
+    except Exception as exc:
+        # The error is shown to the job's owner, the traceback only logged.
+        logger.exception('Job %s (%s) failed.', job.id, job.name)
+        job.status = Job.FAILED
+        job.error = f'{type(exc).__name__}, see the worker log.'
+    else:
+        job.status = Job.DONE
+        job.result_file = path
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'result_file', 'finished'])
+    return job.status
+
+
+def run_job_in_worker(job_id):
+    """Entry point for pool processes."""
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archive import archive_records
+
+
+class Command(BaseCommand):
+    help = 'Move records of children inactive since the horizon out of the Records table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.RECORDS_ARCHIVE_DAYS, help='Archive records of children inactive for this many days')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Records moved per transaction')
+        parser.add_argument('--target', choices=['table', 'ndjson'], default='table', help='Archive table or gzipped NDJSON files')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        count = archive_records(before, options['chunk_size'], options['target'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {count} records of children inactive since {before:%Y-%m-%d} to {options["target"]}.'))
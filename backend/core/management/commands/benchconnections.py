@@ -0,0 +1,64 @@
+import time
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Benchmark requests/sec with new connections per request '
+            'versus persistent connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', '-n', type=int, default=500, help='Number of requests per run')
+        parser.add_argument('--path', type=str, default='/api/assessment/view/', help='Path to request')
+        parser.add_argument('--database', type=str, default='default', help='Database alias to benchmark')
+
+    def environ(self, path):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': BytesIO(),
+        }
+
+    def run(self, handler, path, count):
+        """Run requests through the WSGI handler like a real server does."""
+        def start_response(status, headers):
+            if not status.startswith('200'):
+                raise RuntimeError(f'{path} returned {status}')
+
+        start = time.perf_counter()
+        for _ in range(count):
+            response = handler(self.environ(path), start_response)
+            # Fires request_finished, which closes expired connections.
+            response.close()
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        handler = WSGIHandler()
+        connection = connections[options['database']]
+        original = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f'Engine: {connection.settings_dict["ENGINE"]}')
+
+        results = {}
+        try:
+            for label, max_age in (('new connection per request', 0),
+                                   ('persistent connections', None)):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                self.run(handler, options['path'], 10)
+                results[label] = self.run(
+                    handler, options['path'], options['requests'])
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = original
+            connection.close()
+
+        for label, rate in results.items():
+            self.stdout.write(f'{label:<30} {rate:10.1f} req/s')
@@ -0,0 +1,69 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from assessment.serializers import AssessmentDetailSerializer
+from core.models import Tests, Categories, Items
+from core.renderers import ORJSONRenderer, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = ('Benchmark rendering time and bytes on the wire for '
+            'AssessmentDetailSerializer output')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=8, help='Categories per test')
+        parser.add_argument('--items', type=int, default=40, help='Items per category')
+        parser.add_argument('--repeat', type=int, default=50, help='Renders per renderer')
+
+    def build_test(self, categories, items):
+        """Create a test shaped like a realistic instrument."""
+        test = Tests.objects.create(name='Benchmark instrument')
+        for c in range(categories):
+            category = Categories.objects.create(test=test, name=f'Category {c}')
+            Items.objects.bulk_create([
+                Items(
+                    test=test,
+                    category=category,
+                    step=step,
+                    instruction=f'Ask the child to do task {step} ' * 3,
+                    description=f'Child completes task {step} of {category}',
+                )
+                for step in range(items)
+            ])
+        return test
+
+    def time_render(self, renderer, data, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            content = renderer.render(data)
+        return (time.perf_counter() - start) / repeat * 1000, content
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            test = self.build_test(options['categories'], options['items'])
+            data = AssessmentDetailSerializer(test).data
+            transaction.set_rollback(True)
+
+        renderers = [('json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', ORJSONRenderer()))
+
+        rows = []
+        for name, renderer in renderers:
+            ms, content = self.time_render(renderer, data, options['repeat'])
+            rows.append((name, ms, content))
+
+        self.stdout.write(f'{"renderer":<10}{"ms/render":>12}{"raw":>10}{"gzip":>10}{"br":>10}')
+        for name, ms, content in rows:
+            gzipped = len(gzip.compress(content))
+            br = len(brotli.compress(content, quality=5)) if brotli else '-'
+            self.stdout.write(f'{name:<10}{ms:>12.3f}{len(content):>10}{gzipped:>10}{br:>10}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import clear_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys, meant to run from cron'
+
+    def handle(self, *args, **options):
+        deleted = clear_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
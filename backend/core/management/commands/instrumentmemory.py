@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from core.instruments import build_instruments, deep_size, process_memory
+from core.models import Categories, Items, Percentages, Tests
+
+
+class Command(BaseCommand):
+    help = ('Report the memory of the compact instrument definitions '
+            'against model instances, and per worker process')
+
+    def add_arguments(self, parser):
+        parser.add_argument('pids', nargs='*', help='Worker pids to report, e.g. $(pgrep -f gunicorn)')
+
+    def handle(self, *args, **options):
+        instruments = build_instruments()
+        items = sum(len(c.items) for i in instruments.values() for c in i.categories)
+        compact = deep_size(instruments)
+
+        tests = list(Tests.objects.prefetch_related(
+            Prefetch('categories', queryset=Categories.objects.all()),
+            Prefetch('categories__items', queryset=Items.objects.prefetch_related(
+                Prefetch('percentages_set', queryset=Percentages.objects.all()))),
+        ))
+        models = deep_size(tests)
+
+        self.stdout.write(f'Instruments: {len(instruments)}, items: {items}')
+        self.stdout.write(f'Compact:     {compact / 1024:10.1f} kB')
+        self.stdout.write(f'Models:      {models / 1024:10.1f} kB')
+
+        pids = options['pids']
+        if not pids:
+            return
+        self.stdout.write('')
+        self.stdout.write(f'{"pid":>8}{"rss kB":>10}{"pss kB":>10}{"shared kB":>11}{"private kB":>12}')
+        for pid in pids:
+            memory = process_memory(pid)
+            if memory is None:
+                self.stdout.write(f'{pid:>8}  unavailable')
+                continue
+            self.stdout.write(f'{pid:>8}{memory["rss"]:>10}{memory["pss"]:>10}{memory["shared"]:>11}{memory["private"]:>12}')
@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is imported yet.
+STARTUP_SCRIPT = '''
+import json, os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+start = time.perf_counter()
+import django
+django.setup()
+ready = time.perf_counter()
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver(settings.ROOT_URLCONF).url_patterns
+urls = time.perf_counter()
+print(json.dumps({'apps_ready': ready - start, 'urls_loaded': urls - ready}))
+'''
+
+
+def parse_importtime(stderr):
+    """Return [(module, self us, cumulative us)] from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import time and app ready time of a cold start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+        parser.add_argument('--self', action='store_true', dest='sort_self', help='Sort by self time instead of cumulative')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+        key = 1 if options['sort_self'] else 2
+        modules.sort(key=lambda m: m[key], reverse=True)
+
+        self.stdout.write(f'{"self ms":>10}{"cumul. ms":>12}  module')
+        for name, own, cumulative in modules[:options['top']]:
+            self.stdout.write(f'{own / 1000:>10.1f}{cumulative / 1000:>12.1f}  {name}')
+        self.stdout.write('')
+        self.stdout.write(f'Modules imported: {len(modules)}')
+        self.stdout.write(f'django.setup():   {timings["apps_ready"] * 1000:.1f} ms')
+        self.stdout.write(f'URLconf loaded:   {timings["urls_loaded"] * 1000:.1f} ms')
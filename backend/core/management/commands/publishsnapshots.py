@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from assessment.snapshots import publish_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Render the assessment list and details into versioned, pre-compressed JSON files'
+
+    def handle(self, *args, **options):
+        manifest = publish_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f'Published snapshot {manifest["version"]} with {len(manifest["tests"])} tests.'))
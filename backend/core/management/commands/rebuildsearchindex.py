@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SearchDocument
+from core.search import create_search_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Create the full-text index and reindex all items and comments'
+
+    def handle(self, *args, **options):
+        create_search_index()
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {SearchDocument.objects.count()} documents.'))
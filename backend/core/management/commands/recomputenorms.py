@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.norms import recompute_norms, MAX_MONTH, CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recompute item norms from collected records into a new version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=1, help='Number of item partitions')
+        parser.add_argument('--workers', type=int, default=1, help='Processes running partitions in parallel')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Records read per chunk')
+        parser.add_argument('--max-month', type=int, default=MAX_MONTH, help='Highest age in months counted')
+        parser.add_argument('--min-count', type=int, default=1, help='Minimum records for a month to be stored')
+        parser.add_argument('--note', type=str, default='', help='Note stored on the version')
+
+    def handle(self, *args, **options):
+        version = recompute_norms(
+            partitions=options['partitions'],
+            workers=options['workers'],
+            note=options['note'],
+            chunk_size=options['chunk_size'],
+            max_month=options['max_month'],
+            min_count=options['min_count'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created norms version {version.id} from {version.record_count} records.'))
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import claim_jobs, heartbeat, run_job_in_worker
+
+
+def init_worker():
+    """Set up Django in pool processes started with spawn."""
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', '-p', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        running = {}
+        with ProcessPoolExecutor(processes, initializer=init_worker) as pool:
+            while True:
+                free = processes - len(running)
+                job_ids = claim_jobs(free) if free else []
+                # Forked processes must not share the parent's DB connections.
+                connections.close_all()
+                for job_id in job_ids:
+                    self.stdout.write(f'Running job {job_id}')
+                    running[pool.submit(run_job_in_worker, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(settings.JOBS_POLL_INTERVAL)
+                    continue
+
+                # Renew the leases so other workers don't reclaim the jobs.
+                heartbeat(list(running.values()))
+                done, _ = wait(running, timeout=settings.JOBS_POLL_INTERVAL,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    self.stdout.write(f'Job finished: {future.result()}')
@@ -0,0 +1,62 @@
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Child, Tests, Categories, Items, Percentages
+
+EMAIL = 'loadtest{}@example.com'
+PASSWORD = 'loadtest-password'
+
+
+class Command(BaseCommand):
+    help = 'Seed users, children and assessments used by the load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Number of parent users')
+        parser.add_argument('--children', type=int, default=2, help='Children per user')
+        parser.add_argument('--tests', type=int, default=3, help='Number of assessment tests')
+        parser.add_argument('--categories', type=int, default=4, help='Categories per test')
+        parser.add_argument('--items', type=int, default=25, help='Items per category')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        tests = []
+        for t in range(options['tests']):
+            test, created = Tests.objects.get_or_create(name=f'Loadtest {t}')
+            tests.append(test)
+            if not created:
+                continue
+            for c in range(options['categories']):
+                category = Categories.objects.create(test=test, name=f'Category {c}')
+                items = Items.objects.bulk_create([
+                    Items(test=test, category=category, step=step,
+                          instruction=f'Loadtest task {step}',
+                          description=f'Child does task {step}')
+                    for step in range(options['items'])
+                ])
+                Percentages.objects.bulk_create([
+                    Percentages(item=item, month=month, percent=min(100, 10 * (month - item.step // 2)))
+                    for item in items for month in range(0, 72, 6)
+                    if month - item.step // 2 > 0
+                ])
+
+        User = get_user_model()
+        for u in range(options['users']):
+            email = EMAIL.format(u)
+            if User.objects.filter(email=email).exists():
+                continue
+            user = User.objects.create_user(email=email, password=PASSWORD,
+                                            name=f'Loadtest {u}', role='Parent')
+            for c in range(options['children']):
+                child = Child.objects.create(
+                    name=f'Child {u}-{c}',
+                    birthday=datetime.date.today() - datetime.timedelta(days=rng.randint(30, 2000)))
+                child.tests.set(tests)
+                user.child.add(child)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["users"]} users ({EMAIL.format("N")} / {PASSWORD}).'))
@@ -0,0 +1,182 @@
+"""
+Middlewares for the project.
+"""
+
+import hashlib
+import logging
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from core import idempotency
+from core.db.routers import replica_reads
+from core.querylog import QueryCollector
+from core.tenancy import tenant_request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+re_accepts_br = re.compile(r'\bbr\b')
+
+query_logger = logging.getLogger('core.queries')
+
+
+def client_identity(request):
+    """Return a stable key for the client that sent the request."""
+    ident = (request.META.get('HTTP_AUTHORIZATION')
+             or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+             or request.META.get('REMOTE_ADDR', ''))
+    return hashlib.sha1(ident.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe-method requests from read replicas.
+
+    After a write, the same client is pinned to the primary for
+    REPLICA_PIN_SECONDS so it reads its own writes despite replica lag.
+    The pin is a signed cookie, and is also kept in the shared cache for
+    token clients that don't send cookies back.
+    """
+
+    salt = 'core.replica_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REPLICA_DATABASES', []):
+            return self.get_response(request)
+
+        pin_key = f'replica_pin:{client_identity(request)}'
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            cache.set(pin_key, True, settings.REPLICA_PIN_SECONDS)
+            response.set_signed_cookie(
+                settings.REPLICA_PIN_COOKIE, '1', salt=self.salt,
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax')
+            return response
+        if self.is_pinned(request) or cache.get(pin_key):
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
+
+    def is_pinned(self, request):
+        """Return whether the request carries a valid pin cookie."""
+        return request.get_signed_cookie(
+            settings.REPLICA_PIN_COOKIE, default=None, salt=self.salt,
+            max_age=settings.REPLICA_PIN_SECONDS) is not None
+
+
+class TenantMiddleware:
+    """Scope queries of the request to the clinic of its user.
+
+    The user is looked up when the first scoped query runs, so users
+    authenticated by DRF inside the view are scoped as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tenant_request(request):
+            return self.get_response(request)
+
+
+class IdempotencyMiddleware:
+    """Replay responses of write requests retried with an Idempotency-Key.
+
+    Keys are scoped to the client, method and path, see core.idempotency.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS or \
+                idempotency.HEADER not in request.META:
+            return self.get_response(request)
+        if len(request.META[idempotency.HEADER]) > \
+                idempotency.MAX_KEY_LENGTH:
+            return JsonResponse({'detail': 'Idempotency-Key is too long.'},
+                                status=400)
+
+        key = idempotency.request_key(request, client_identity(request))
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        row, claimed = idempotency.claim(key, fingerprint)
+        if not claimed:
+            return idempotency.replay(row, fingerprint)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            idempotency.store(row, HttpResponse(status=500))
+            raise
+        idempotency.store(row, response)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses over COMPRESSION_MIN_SIZE with brotli or gzip.
+
+    Brotli is used when the client accepts it and the brotli package is
+    installed, otherwise this behaves like GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        # Compressors buffer, which would hold back server-sent events.
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.streaming or response.has_header('Content-Encoding') \
+                or brotli is None:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if not re_accepts_br.search(accept):
+            return super().process_response(request, response)
+
+        compressed = brotli.compress(
+            response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class QueryInspectionMiddleware:
+    """Log N+1 patterns and slow queries per request, for staging."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCollector() as collector:
+            response = self.get_response(request)
+
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        if collector.repeated(threshold):
+            query_logger.warning(
+                'Possible N+1 in %s %s:\n%s', request.method,
+                request.path, collector.report(threshold))
+        for query in collector.slow(settings.SLOW_QUERY_MS):
+            query_logger.warning(
+                'Slow query (%.1f ms) in %s %s: %s\n    %s',
+                query.duration * 1000, request.method, request.path,
+                query.sql, '\n    '.join(query.stack))
+        return response
@@ -11,6 +11,8 @@ from django.db import models
 from datetime import date
 import uuid
 
+from core.tenancy import TenantManager
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -36,6 +38,15 @@ class UserManager(BaseUserManager):
         return user
 
 
+class Clinic(models.Model):
+    """Clinic the users and children belong to."""
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     """User in the System"""
     ROLES = [
@@ -49,6 +60,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     child = models.ManyToManyField('Child', related_name='user')
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
 
     objects = UserManager()
 
@@ -66,6 +79,16 @@ class Child(models.Model):
     slug = models.UUIDField(default=uuid.uuid4, auto_created=True)
     birthday = models.DateField()
     tests = models.ManyToManyField('Tests', related_name='child', null=True)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+    # Records of the child were moved out of Records, see core.archive.
+    archived = models.BooleanField(default=False)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["clinic", "name"])]
 
     @property
     def age_in_months(self):
@@ -84,6 +107,14 @@ class Comments(models.Model):
                               on_delete=models.CASCADE)
     comment = models.CharField(max_length=255)
     created = models.DateTimeField(auto_now_add=True)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["clinic", "child", "created"])]
 
 
 class Tests(models.Model):
@@ -119,10 +150,14 @@ class Items(models.Model):
     class Meta:
         ordering = ["test", "category", "step"]
 
+    def percentages(self):
+        """Return the percents of the item per month."""
+        return Percentages.objects.filter(item=self)
+
     @property
     def percents_in_months(self):
         """Query and return percents of each month of item."""
-        query = Percentages.objects.filter(item=self)
+        query = self.percentages()
         if not query.exists():
             return None
         percents = dict()
@@ -141,12 +176,206 @@ class Percentages(models.Model):
     percent = models.IntegerField()
 
 
+class AssessmentSession(models.Model):
+    """Administration of a test to a child by a tester."""
+    child = models.ForeignKey(Child, related_name='sessions',
+                              on_delete=models.CASCADE)
+    test = models.ForeignKey(Tests, on_delete=models.CASCADE)
+    tester = models.ForeignKey('CustomUser', null=True, blank=True,
+                               on_delete=models.SET_NULL)
+    started = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["clinic", "child", "started"])]
+
+    def __str__(self):
+        return f"{self.child} | {self.test} ({self.started:%Y-%m-%d})"
+
+
 class Records(models.Model):
     """Model for each child's item records/progress."""
     child = models.ForeignKey(Child, on_delete=models.CASCADE)
     item = models.ForeignKey(Items, on_delete=models.CASCADE)
     is_complete = models.BooleanField(default=False)
     last_checkout = models.DateTimeField(auto_now_add=True)
+    session = models.ForeignKey(AssessmentSession, null=True, blank=True,
+                                related_name='records',
+                                on_delete=models.SET_NULL)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["clinic", "child", "item"]),
+            # Records of a child without a clinic predicate, like reports.
+            models.Index(fields=["child", "item"],
+                         name="core_records_child_item"),
+            # Recent records of a child, checked when archiving.
+            models.Index(fields=["child", "last_checkout"]),
+        ]
 
     def __str__(self):
         return f"{self.item} | ({self.is_complete})"
+
+
+class Job(models.Model):
+    """Background job stored in the database queue."""
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    DONE = "Done"
+    FAILED = "Failed"
+    STATUSES = [
+        (QUEUED, QUEUED),
+        (RUNNING, RUNNING),
+        (DONE, DONE),
+        (FAILED, FAILED),
+    ]
+    name = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES,
+                              default=QUEUED)
+    owner = models.ForeignKey('CustomUser', null=True, blank=True,
+                              on_delete=models.CASCADE)
+    result_file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created"])]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} | ({self.status})"
+
+
+class NormsVersion(models.Model):
+    """Version of norms recomputed from collected records."""
+    created = models.DateTimeField(auto_now_add=True)
+    is_complete = models.BooleanField(default=False)
+    record_count = models.BigIntegerField(default=0)
+    note = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"Norms v{self.pk} | ({self.created:%Y-%m-%d})"
+
+
+class Norms(models.Model):
+    """Empirical pass rate of an item at an age in months."""
+    version = models.ForeignKey(NormsVersion, related_name='norms',
+                                on_delete=models.CASCADE)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE)
+    month = models.IntegerField()
+    passed = models.IntegerField()
+    total = models.IntegerField()
+    percent = models.IntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["version", "item", "month"])]
+
+
+class SearchDocument(models.Model):
+    """Searchable text of an item or a comment.
+
+    Item documents have no clinic and are found from every clinic.
+    """
+    ITEM = "item"
+    COMMENT = "comment"
+    KINDS = [
+        (ITEM, ITEM),
+        (COMMENT, COMMENT),
+    ]
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.BigIntegerField()
+    child = models.ForeignKey(Child, null=True, blank=True,
+                              on_delete=models.CASCADE)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+    text = models.TextField()
+
+    objects = TenantManager(shared=models.Q(kind=ITEM))
+    all_objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"],
+                                    name="unique_search_document"),
+        ]
+
+
+class RecordsArchive(models.Model):
+    """Records of inactive children moved out of the Records table."""
+    child = models.ForeignKey(Child, on_delete=models.CASCADE)
+    item = models.ForeignKey(Items, on_delete=models.CASCADE)
+    is_complete = models.BooleanField(default=False)
+    last_checkout = models.DateTimeField()
+    session = models.ForeignKey(AssessmentSession, null=True, blank=True,
+                                related_name='archived_records',
+                                on_delete=models.SET_NULL)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True,
+                               on_delete=models.PROTECT)
+    archived = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["child", "last_checkout"])]
+
+
+class IdempotencyKey(models.Model):
+    """Response of a write request stored under its Idempotency-Key."""
+    # sha256 of the client, method, path and header value.
+    key = models.CharField(max_length=64, unique=True)
+    # sha256 of the request body, to catch keys reused for other payloads.
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request is still running.
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(blank=True)
+    # Claim deadline while running, then end of the replay window.
+    expires = models.DateTimeField(db_index=True)
+
+
+class AuditEvent(models.Model):
+    """Who viewed or changed a child's data, written in batches."""
+    VIEW = "view"
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTIONS = [
+        (VIEW, VIEW),
+        (CREATE, CREATE),
+        (UPDATE, UPDATE),
+        (DELETE, DELETE),
+    ]
+    created = models.DateTimeField()
+    # Plain ids, so the trail outlives the users and children.
+    user_id = models.BigIntegerField(null=True, blank=True)
+    child_id = models.BigIntegerField(null=True, blank=True)
+    clinic_id = models.BigIntegerField(null=True, blank=True)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField(null=True, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["child_id", "created"]),
+            models.Index(fields=["clinic_id", "created"]),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} #{self.object_id} | " \
+            f"({self.created:%Y-%m-%d %H:%M})"
@@ -0,0 +1,128 @@
+"""
+Recompute item norms from collected records.
+
+Records are streamed in chunks and counted into NumPy arrays indexed by
+(item, age in months), so memory depends on the number of items, not on
+the number of records. Items can be split into partitions of contiguous
+ids which are processed independently, in parallel processes if wanted;
+each reads only its records, through the item_id index.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import numpy as np
+from django.db import connections
+
+from core.archive import archived_norm_rows
+from core.models import Items, Records, Norms, NormsVersion
+
+MAX_MONTH = 72
+CHUNK_SIZE = 20000
+
+
+def partition_items(partition, partitions):
+    """Return the ordered ids of the items in the partition, a contiguous
+    range of the item ids."""
+    item_ids = list(Items.objects.order_by('id').values_list('id', flat=True))
+    start = len(item_ids) * partition // partitions
+    end = len(item_ids) * (partition + 1) // partitions
+    return item_ids[start:end]
+
+
+def accumulate(rows, item_index, max_month, chunk_size=CHUNK_SIZE):
+    """Count passed and total records per (item, month).
+
+    rows yields (item_id, is_complete, last_checkout, birthday).
+    Records of ages outside 0..max_month are ignored.
+    """
+    passed = np.zeros((len(item_index), max_month + 1), dtype=np.int64)
+    total = np.zeros_like(passed)
+    count = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        count += len(chunk)
+        item_ids, complete, checkouts, birthdays = zip(*chunk)
+        index = np.fromiter((item_index[i] for i in item_ids),
+                            dtype=np.int64, count=len(chunk))
+        days = (np.array([c.date() for c in checkouts], dtype='datetime64[D]')
+                - np.array(birthdays, dtype='datetime64[D]')).astype(np.int64)
+        # Same rounding as Child.age_in_months.
+        months = np.rint(days / 30).astype(np.int64)
+        valid = (months >= 0) & (months <= max_month)
+        index, months = index[valid], months[valid]
+        np.add.at(total, (index, months), 1)
+        np.add.at(passed, (index, months),
+                  np.array(complete, dtype=np.int64)[valid])
+    return passed, total, count
+
+
+def recompute_partition(version_id, partition=0, partitions=1,
+                        max_month=MAX_MONTH, min_count=1,
+                        chunk_size=CHUNK_SIZE):
+    """Write the norms of one item partition and return records read."""
+    item_ids = partition_items(partition, partitions)
+    if not item_ids:
+        return 0
+    item_index = {item_id: i for i, item_id in enumerate(item_ids)}
+
+    rows = Records.objects.filter(
+        item_id__gte=item_ids[0], item_id__lte=item_ids[-1],
+    ).values_list(
+        'item_id', 'is_complete', 'last_checkout', 'child__birthday',
+    ).iterator(chunk_size=chunk_size)
+    # Archived records keep the oldest cohorts in the norms.
+    rows = chain(rows, archived_norm_rows(item_ids[0], item_ids[-1],
+                                          chunk_size))
+    passed, total, count = accumulate(rows, item_index, max_month,
+                                      chunk_size)
+
+    item_rows, months = np.nonzero(total >= min_count)
+    percents = np.rint(
+        100 * passed[item_rows, months] / total[item_rows, months])
+    Norms.objects.bulk_create(
+        (
+            Norms(
+                version_id=version_id,
+                item_id=item_ids[row],
+                month=int(month),
+                passed=int(passed[row, month]),
+                total=int(total[row, month]),
+                percent=int(percent),
+            )
+            for row, month, percent in zip(item_rows, months, percents)
+        ),
+        batch_size=1000,
+    )
+    return count
+
+
+def _run_partition(kwargs):
+    try:
+        return recompute_partition(**kwargs)
+    finally:
+        connections.close_all()
+
+
+def recompute_norms(partitions=1, workers=1, note='', **options):
+    """Create a new complete norms version from all records."""
+    version = NormsVersion.objects.create(note=note)
+    tasks = [
+        dict(version_id=version.id, partition=partition,
+             partitions=partitions, **options)
+        for partition in range(partitions)
+    ]
+    if workers > 1:
+        connections.close_all()
+        with ProcessPoolExecutor(workers) as pool:
+            counts = list(pool.map(_run_partition, tasks))
+    else:
+        counts = [recompute_partition(**task) for task in tasks]
+
+    version.record_count = sum(counts)
+    version.is_complete = True
+    version.save(update_fields=['record_count', 'is_complete'])
+    return version
@@ -0,0 +1,130 @@
+"""
+Query inspection: N+1 detection and slow query logging.
+
+QueryCollector records every SQL statement run on all connections with
+its duration and the project code that triggered it. Statements are
+grouped by a normalized template (literals and parameters stripped), so
+the same query repeated for each row of a list shows up as one template
+with a high count.
+"""
+
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LISTS = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+)\s*,?)+\)', re.I)
+_SPACES = re.compile(r'\s+')
+# Frames that run every query and say nothing about its origin.
+IGNORED_FILES = ('querylog.py', 'middleware.py', 'manage.py')
+
+
+def normalize_sql(sql):
+    """Return the template of a statement, without literal values."""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def project_frames(limit=3):
+    """Return the innermost 'file:line in func' frames of project code."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        f'{frame.filename[len(base) + 1:]}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base)
+        and 'site-packages' not in frame.filename
+        and os.path.basename(frame.filename) not in IGNORED_FILES
+    ]
+    return frames[-limit:]
+
+
+@dataclass
+class Query:
+    sql: str
+    template: str
+    duration: float
+    stack: list = field(default_factory=list)
+
+
+class QueryCollector:
+    """Context manager recording the queries run inside it."""
+
+    def __init__(self, capture_stack=True):
+        self.capture_stack = capture_stack
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(Query(
+                sql=sql,
+                template=normalize_sql(sql),
+                duration=time.perf_counter() - start,
+                stack=project_frames() if self.capture_stack else [],
+            ))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def repeated(self, threshold):
+        """Return {template: count} of templates run threshold+ times."""
+        counts = Counter(query.template for query in self.queries)
+        return {t: n for t, n in counts.items() if n >= threshold}
+
+    def slow(self, threshold_ms):
+        """Return the queries slower than threshold_ms."""
+        return [q for q in self.queries
+                if q.duration * 1000 >= threshold_ms]
+
+    def report(self, threshold):
+        """Describe repeated templates and where they were run from."""
+        lines = []
+        for template, count in self.repeated(threshold).items():
+            stack = next(q.stack for q in self.queries
+                         if q.template == template)
+            lines.append(f'{count}x {template}')
+            lines.extend(f'    {frame}' for frame in stack)
+        return '\n'.join(lines)
+
+
+class NPlusOneTestMixin:
+    """TestCase mixin asserting a block has no repeated queries."""
+    n_plus_one_threshold = 3
+
+    def assertNoNPlusOne(self, threshold=None):
+        return _NoNPlusOneContext(
+            self, threshold or self.n_plus_one_threshold)
+
+
+class _NoNPlusOneContext(QueryCollector):
+
+    def __init__(self, test_case, threshold):
+        super().__init__()
+        self.test_case = test_case
+        self.threshold = threshold
+
+    def __exit__(self, exc_type, exc_value, tb):
+        super().__exit__(exc_type, exc_value, tb)
+        if exc_type is None and self.repeated(self.threshold):
+            self.test_case.fail(
+                'Repeated queries (possible N+1):\n'
+                + self.report(self.threshold))
@@ -0,0 +1,223 @@
+"""
+Query plan checks of the ORM queries behind the views.
+
+QUERIES maps a name to a function building the queryset from fixture
+objects with the helpers the views use, and the tables it must read
+through an index. QueryPlanTestMixin runs EXPLAIN on SQLite or PostgreSQL
+and fails when an expected table is not read through an index, or when
+a table holding more than full_scan_rows rows is scanned in full.
+Failures show the plan and its diff against the baseline stored in
+core/tests/plans/<vendor>/<name>.txt; run the tests with
+UPDATE_QUERY_PLANS=1 to write the baselines.
+"""
+
+import difflib
+import os
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.utils import timezone
+
+from assessment.views import AssessmentsListViews
+from core.archive import archive_candidates
+from core.audit import audit_trail
+from core.models import Categories
+from core.reports import category_report
+from user.views import completed_items, owned_children
+
+PLANS_DIR = os.path.join(os.path.dirname(__file__), 'tests', 'plans')
+
+# name -> (function(fixture) returning a queryset, tables needing an
+# index). A table may be given as (table, index) to need that index.
+QUERIES = {}
+
+
+def register_query(name, indexed=()):
+    """Register the decorated queryset builder under name."""
+    def decorator(func):
+        QUERIES[name] = (func, tuple(indexed))
+        return func
+    return decorator
+
+
+def prefetch_queryset(instances, name):
+    """Return the queryset prefetch_related runs for relation name of
+    instances."""
+    descriptor = getattr(type(instances[0]), name)
+    manager = descriptor.related_manager_cls(instances[0])
+    return manager.get_prefetch_queryset(instances)[0]
+
+
+@register_query('assessment_list')
+def assessment_list(fixture):
+    return AssessmentsListViews().get_queryset()
+
+
+# Prefetches of AssessmentDetailViews.queryset, 'categories__items'.
+@register_query('assessment_categories', indexed=['core_categories'])
+def assessment_categories(fixture):
+    return prefetch_queryset([fixture['test']], 'categories')
+
+
+@register_query('assessment_items', indexed=['core_items'])
+def assessment_items(fixture):
+    categories = list(Categories.objects.filter(
+        id__in=fixture['category_ids']))
+    return prefetch_queryset(categories, 'items')
+
+
+@register_query('child_ownership', indexed=['core_customuser_child'])
+def child_ownership(fixture):
+    return owned_children(fixture['user'], fixture['child'].id)
+
+
+@register_query('item_percentages', indexed=['core_percentages'])
+def item_percentages(fixture):
+    return fixture['item'].percentages()
+
+
+@register_query('child_completed_items', indexed=['core_records'])
+def child_completed_items(fixture):
+    return completed_items(fixture['child'], fixture['test'].id)
+
+
+# child_records is the FilteredRelation of the child's records.
+@register_query('category_report',
+                indexed=['core_child_tests',
+                         ('child_records', 'core_records_child_item')])
+def child_category_report(fixture):
+    return category_report(fixture['child'])
+
+
+@register_query('archive_candidates', indexed=['core_records'])
+def archive_chunk_candidates(fixture):
+    return archive_candidates(timezone.now(), after=fixture['item'].id)
+
+
+@register_query('child_audit_trail', indexed=['core_auditevent'])
+def child_audit_trail(fixture):
+    return audit_trail(fixture['child'].id)
+
+
+@dataclass
+class Access:
+    table: str
+    # Index used to find rows, None for a full scan.
+    index: str = None
+    # Name the query gives the table, like a FilteredRelation's. SQLite
+    # plans may show it in place of the table.
+    alias: str = None
+
+    def reads(self, name):
+        return name in (self.table, self.alias)
+
+
+_SQLITE_ACCESS = re.compile(
+    r'\b(SCAN|SEARCH) (\w+)(?: AS (\w+))?'
+    r'(?: USING (?:COVERING )?(?:INDEX (\w+)|(INTEGER PRIMARY KEY)))?')
+_POSTGRES_ACCESS = re.compile(
+    r'(?<!Bitmap )(Seq Scan|(?:Index|Index Only|Bitmap Heap) Scan)'
+    r'(?: using (\w+))? on (\w+)(?: (\w+))?')
+_POSTGRES_BITMAP_INDEX = re.compile(r'Bitmap Index Scan on (\w+)')
+_SQLITE_IDS = re.compile(r'^\d+ \d+ \d+ ', re.M)
+_POSTGRES_COSTS = re.compile(r'\s*\(cost=[^)]*\)')
+
+
+def explain(queryset):
+    """Return the plan of queryset as normalized text."""
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        return _SQLITE_IDS.sub('', plan)
+    return _POSTGRES_COSTS.sub('', plan)
+
+
+def parse_plan(plan, vendor=None):
+    """Return the Accesses of the tables read in a plan."""
+    vendor = vendor or connection.vendor
+    accesses = []
+    if vendor == 'sqlite':
+        for kind, table, alias, index, rowid in _SQLITE_ACCESS.findall(plan):
+            # A SCAN ... USING INDEX still reads the whole index.
+            found = (index or rowid) if kind == 'SEARCH' else None
+            accesses.append(Access(table, found or None, alias or None))
+    elif vendor == 'postgresql':
+        heap_scan = None
+        for line in plan.splitlines():
+            bitmap = _POSTGRES_BITMAP_INDEX.search(line)
+            if bitmap and heap_scan:
+                # The index of the heap scan is on its child line.
+                heap_scan.index = bitmap.group(1)
+                heap_scan = None
+            match = _POSTGRES_ACCESS.search(line)
+            if not match:
+                continue
+            kind, index, table, alias = match.groups()
+            if kind == 'Seq Scan':
+                accesses.append(Access(table, alias=alias))
+            elif kind == 'Bitmap Heap Scan':
+                heap_scan = Access(table, 'bitmap', alias)
+                accesses.append(heap_scan)
+            else:
+                accesses.append(Access(table, index, alias))
+    else:
+        raise ValueError(f'Plans of {vendor} are not supported.')
+    return accesses
+
+
+def table_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+def baseline_path(name):
+    return os.path.join(PLANS_DIR, connection.vendor, f'{name}.txt')
+
+
+def plan_diff(name, plan):
+    """Return the diff of plan against the stored baseline."""
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return f'No baseline at {path}.'
+    with open(path) as baseline:
+        expected = baseline.read()
+    diff = difflib.unified_diff(
+        expected.splitlines(), plan.splitlines(),
+        'baseline', 'current', lineterm='')
+    return '\n'.join(diff) or 'Same plan as the baseline.'
+
+
+class QueryPlanTestMixin:
+    """TestCase mixin asserting the plans of the registered queries."""
+    full_scan_rows = 100
+
+    def assertQueryPlan(self, name, fixture):
+        func, indexed = QUERIES[name]
+        plan = explain(func(fixture))
+        if os.environ.get('UPDATE_QUERY_PLANS'):
+            os.makedirs(os.path.dirname(baseline_path(name)), exist_ok=True)
+            with open(baseline_path(name), 'w') as baseline:
+                baseline.write(plan + '\n')
+
+        problems = []
+        tables = set(connection.introspection.table_names())
+        accesses = parse_plan(plan)
+        for table in indexed:
+            table, index = table if isinstance(table, tuple) \
+                else (table, None)
+            if not any(a.reads(table) and a.index
+                       and index in (None, a.index) for a in accesses):
+                problems.append(
+                    f'{table} is not read through {index or "an index"}')
+        for access in accesses:
+            if access.index is None and access.table in tables:
+                rows = table_rows(access.table)
+                if rows > self.full_scan_rows:
+                    problems.append(
+                        f'full scan of {access.table} ({rows} rows)')
+        if problems:
+            self.fail(
+                f'Query plan of {name}: {"; ".join(problems)}.\n\n'
+                f'{plan}\n\n{plan_diff(name, plan)}')
@@ -0,0 +1,53 @@
+"""
+Fast JSON renderer and parser backed by orjson.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _require_orjson():
+    if orjson is None:
+        raise ImproperlyConfigured(
+            'JSON_BACKEND="orjson" requires the orjson package.')
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Render JSON with orjson.
+
+    Types orjson does not handle natively (Decimal, lazy strings, ...)
+    fall back to the DRF encoder.
+    """
+
+    def __init__(self):
+        _require_orjson()
+        self._encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self._encoder.default,
+                            option=option)
+
+
+class ORJSONParser(parsers.JSONParser):
+    """Parse JSON request bodies with orjson."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        _require_orjson()
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
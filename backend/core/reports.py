@@ -0,0 +1,39 @@
+"""
+Aggregate reports over child records.
+"""
+
+from django.db.models import (Count, FilteredRelation, Max, OuterRef, Q,
+                              Subquery)
+
+from core.models import Categories, Percentages
+
+# Pass rate at which an item's month counts as its age equivalent.
+AGE_EQUIVALENT_PERCENT = 50
+
+
+def category_report(child):
+    """Return the child's assigned tests' categories annotated with
+    items_total, items_passed, highest_step and age_equivalent.
+
+    Everything is computed by the database in a single query. Only the
+    child's records are joined, through a filtered relation.
+    """
+    passed = Q(child_records__is_complete=True)
+    age_equivalent = Percentages.objects.filter(
+        item__category=OuterRef('pk'),
+        item__records__child=child,
+        item__records__is_complete=True,
+        percent__gte=AGE_EQUIVALENT_PERCENT,
+    ).order_by('-item__step', 'month').values('month')[:1]
+
+    return Categories.objects.filter(
+        test__child=child,
+    ).select_related('test').annotate(
+        child_records=FilteredRelation(
+            'items__records', condition=Q(items__records__child=child)),
+    ).annotate(
+        items_total=Count('items', distinct=True),
+        items_passed=Count('items', filter=passed, distinct=True),
+        highest_step=Max('items__step', filter=passed),
+        age_equivalent=Subquery(age_equivalent),
+    ).order_by('test_id', 'id')
@@ -0,0 +1,143 @@
+"""
+Full-text search over items and comments.
+
+Items and comments are copied into SearchDocument rows by signals. The
+full-text index on those rows depends on the database: a GIN expression
+index on PostgreSQL and an FTS5 table kept in sync by triggers on
+SQLite. Other databases fall back to icontains.
+"""
+
+from django.db import connections
+from django.db.models import F, Func, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Items, Comments, SearchDocument
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+SEARCH_CONFIG = 'english'
+
+POSTGRES_INDEX_SQL = [
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_text_gin ON {TABLE} "
+    f"USING gin (to_tsvector('{SEARCH_CONFIG}', text))",
+]
+
+SQLITE_INDEX_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='{TABLE}', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+]
+
+
+def create_search_index(using='default', **kwargs):
+    """Create the full-text index, run on post_migrate."""
+    connection = connections[using]
+    if TABLE not in connection.introspection.table_names():
+        return
+    statements = {
+        'postgresql': POSTGRES_INDEX_SQL,
+        'sqlite': SQLITE_INDEX_SQL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def document_for(instance):
+    """Return the fields of the document of an item or comment.
+
+    Items are shared by all clinics, comments belong to their child's.
+    """
+    if isinstance(instance, Items):
+        text = f'{instance.instruction} {instance.description}'.strip()
+        return {'kind': SearchDocument.ITEM, 'child_id': None,
+                'clinic_id': None, 'text': text}
+    return {'kind': SearchDocument.COMMENT, 'child_id': instance.child_id,
+            'clinic_id': instance.clinic_id, 'text': instance.comment}
+
+
+@receiver(post_save, sender=Items)
+@receiver(post_save, sender=Comments)
+def index_object(sender, instance, **kwargs):
+    fields = document_for(instance)
+    SearchDocument.all_objects.update_or_create(
+        kind=fields.pop('kind'), object_id=instance.pk, defaults=fields,
+    )
+
+
+@receiver(post_delete, sender=Items)
+@receiver(post_delete, sender=Comments)
+def unindex_object(sender, instance, **kwargs):
+    SearchDocument.all_objects.filter(
+        kind=document_for(instance)['kind'], object_id=instance.pk,
+    ).delete()
+
+
+def rebuild_index(batch_size=1000):
+    """Index all items and comments from scratch."""
+    SearchDocument.all_objects.all().delete()
+    for manager in (Items.objects, Comments.all_objects):
+        batch = []
+        for instance in manager.iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(object_id=instance.pk,
+                                        **document_for(instance)))
+            if len(batch) >= batch_size:
+                SearchDocument.all_objects.bulk_create(batch)
+                batch = []
+        SearchDocument.all_objects.bulk_create(batch)
+
+
+def fts5_query(text):
+    """Quote each term so user input is never parsed as FTS5 syntax."""
+    terms = text.split()
+    return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+
+
+def search(queryset, text):
+    """Filter SearchDocuments matching text, best matches first."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        # Needs psycopg, only imported when running on PostgreSQL.
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVectorField,
+        )
+
+        # to_tsvector() matching the GIN expression index.
+        document = Func(
+            F('text'), function='to_tsvector',
+            template=f"%(function)s('{SEARCH_CONFIG}', %(expressions)s)",
+            output_field=SearchVectorField(),
+        )
+        query = SearchQuery(text, config=SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.annotate(
+            document=document,
+        ).filter(document=query).annotate(
+            rank=SearchRank(F('document'), query),
+        ).order_by('-rank', 'id')
+    if vendor == 'sqlite':
+        query = fts5_query(text)
+        # bm25() is lower for better matches.
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id',
+            [query], output_field=FloatField())
+        matches = RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [query])
+        return queryset.filter(id__in=matches).annotate(
+            rank=rank).order_by('-rank', 'id')
+    return queryset.filter(text__icontains=text).annotate(
+        rank=Value(1.0, output_field=FloatField())).order_by('id')
@@ -0,0 +1,102 @@
+"""
+Scoping of clinic data to the clinic of the current user.
+
+Models with a clinic FK use TenantManager, which filters every query on
+the current clinic. Inside a request the clinic is the one of the
+authenticated user, set up by core.middleware.TenantMiddleware; since
+DRF sets the user on the underlying request, token users are scoped too.
+Users without a clinic, management commands and jobs outside
+clinic_scope() are not scoped. The filter is applied when a queryset is
+built, so views build theirs in get_queryset(), not at import.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+_UNSET = object()
+_request = ContextVar('tenant_request', default=None)
+_clinic = ContextVar('tenant_clinic', default=_UNSET)
+
+
+@contextmanager
+def tenant_request(request):
+    """Scope queries inside the block to the clinic of request.user."""
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+@contextmanager
+def clinic_scope(clinic_id):
+    """Scope queries inside the block to a clinic, None for all."""
+    token = _clinic.set(clinic_id)
+    try:
+        yield
+    finally:
+        _clinic.reset(token)
+
+
+def current_user():
+    """Return the authenticated user of the current request, or None."""
+    user = getattr(_request.get(), 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+def current_clinic_id():
+    """Return the id of the clinic queries are scoped to, or None."""
+    clinic_id = _clinic.get()
+    if clinic_id is not _UNSET:
+        return clinic_id
+    user = current_user()
+    return None if user is None else user.clinic_id
+
+
+def tenant_cache_key(key):
+    """Return key prefixed with the current clinic."""
+    clinic_id = current_clinic_id()
+    return f'clinic:{"-" if clinic_id is None else clinic_id}:{key}'
+
+
+class TenantManager(models.Manager):
+    """Manager returning only rows of the current clinic.
+
+    Rows matching shared, a Q object, are returned to every clinic.
+    """
+
+    def __init__(self, shared=None):
+        super().__init__()
+        self.shared = shared
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        clinic_id = current_clinic_id()
+        if clinic_id is None:
+            return queryset
+        condition = models.Q(clinic_id=clinic_id)
+        if self.shared is not None:
+            condition |= self.shared
+        return queryset.filter(condition)
+
+
+@receiver(pre_save, sender='core.Child')
+def set_child_clinic(sender, instance, **kwargs):
+    """Create children in the current clinic."""
+    if instance.clinic_id is None:
+        instance.clinic_id = current_clinic_id()
+
+
+@receiver(pre_save, sender='core.Records')
+@receiver(pre_save, sender='core.AssessmentSession')
+@receiver(pre_save, sender='core.Comments')
+def set_clinic_from_child(sender, instance, **kwargs):
+    """Keep the clinic of child data equal to the child's."""
+    if instance.clinic_id is None:
+        instance.clinic_id = instance.child.clinic_id
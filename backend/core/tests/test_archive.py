@@ -0,0 +1,210 @@
+"""
+Tests for archiving records.
+"""
+
+import csv
+import io
+from unittest import mock
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.archive import (archive_chunk, archive_records, archived_records,
+                          restore_records)
+from core.jobs import enqueue, claim_jobs, run_job
+from core.models import (AssessmentSession, Child, Clinic, Tests,
+                         Categories, Items, Norms, Records, RecordsArchive)
+from core.norms import recompute_norms
+from core.tenancy import clinic_scope
+import datetime
+
+
+class ArchiveRecordsTests(TestCase):
+    """Tests for moving old records out of the hot table."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.child = Child.objects.create(
+            name="Mike", birthday=datetime.date(2020, 1, 1))
+        self.active = Child.objects.create(
+            name="Anna", birthday=datetime.date(2020, 1, 1))
+        test = Tests.objects.create(name="Denver II")
+        category = Categories.objects.create(test=test, name="Motor")
+        now = timezone.now()
+        for step in range(5):
+            item = Items.objects.create(test=test, category=category,
+                                        step=step, instruction="walks")
+            # Mike has old records on steps 0-2, Anna an old one on
+            # step 0 and recent ones on steps 3-4.
+            if step < 3:
+                self.add_record(self.child, item, now - timedelta(days=1000))
+            if step == 0:
+                self.add_record(self.active, item, now - timedelta(days=1000))
+            if step >= 3:
+                self.add_record(self.active, item, now - timedelta(days=10))
+        self.before = now - timedelta(days=365)
+
+    def add_record(self, child, item, last_checkout):
+        record = Records.objects.create(child=child, item=item,
+                                        is_complete=True)
+        Records.objects.filter(id=record.id).update(
+            last_checkout=last_checkout)
+
+    def test_archive_to_table_in_chunks(self):
+        moved = archive_records(self.before, chunk_size=2)
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(Records.objects.count(), 3)
+        self.assertEqual(RecordsArchive.objects.count(), 3)
+        self.assertEqual(len(list(archived_records([self.child.id]))), 3)
+        self.assertEqual(list(archived_records([self.active.id])), [])
+
+    def test_chunks_paged_by_id(self):
+        """Test each chunk starts after the last record read."""
+        moved, after = archive_chunk(self.before, 2, 'table')
+        self.assertEqual(moved, 2)
+
+        moved, last = archive_chunk(self.before, 2, 'table', after)
+
+        self.assertEqual(moved, 1)
+        self.assertGreater(last, after)
+        self.assertEqual(archive_chunk(self.before, 2, 'table', last),
+                         (0, last))
+
+    def test_archive_keeps_clinic_and_session(self):
+        clinic = Clinic.objects.create(name='North', slug='north')
+        session = AssessmentSession.objects.create(
+            child=self.child, test=Tests.objects.get())
+        AssessmentSession.objects.filter(id=session.id).update(
+            started=self.before - timedelta(days=1))
+        Records.objects.filter(child=self.child).update(
+            clinic=clinic, session=session)
+
+        archive_records(self.before)
+
+        self.assertEqual(RecordsArchive.objects.filter(
+            clinic=clinic, session=session).count(), 3)
+        with clinic_scope(clinic.id):
+            self.assertEqual(RecordsArchive.objects.count(), 3)
+        with clinic_scope(0):
+            self.assertEqual(RecordsArchive.objects.count(), 0)
+
+    def test_recent_session_keeps_child_active(self):
+        AssessmentSession.objects.create(
+            child=self.child, test=Tests.objects.get())
+
+        self.assertEqual(archive_records(self.before), 0)
+
+    def test_archive_sends_no_delete_signals(self):
+        """Test archived rows are removed without per-row signals."""
+        with mock.patch('core.audit.record_on_commit') as record, \
+                mock.patch('core.events.publish') as publish:
+            # A select, an insert, marking the children and one delete,
+            # in a savepoint. The chunk isn't full, so there is no next
+            # one to read.
+            with self.assertNumQueries(6):
+                archive_records(self.before)
+
+        self.assertFalse(record.called)
+        self.assertFalse(publish.called)
+
+    def test_archive_to_ndjson(self):
+        call_command('archiverecords', days=365, chunk_size=2,
+                     target='ndjson', stdout=io.StringIO())
+
+        self.assertEqual(Records.objects.count(), 3)
+        self.assertEqual(RecordsArchive.objects.count(), 0)
+        rows = list(archived_records([self.child.id]))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(list(archived_records([0])), [])
+
+    def test_export_includes_archived(self):
+        archive_records(self.before, target='ndjson')
+        job = enqueue('records_export')
+        claim_jobs(1)
+        run_job(job.id)
+        job.refresh_from_db()
+
+        with open(f'{self.media}/{job.result_file}') as f:
+            rows = list(csv.reader(f))[1:]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sorted(row[-1] for row in rows),
+                         ['False'] * 3 + ['True'] * 3)
+
+    def test_restore_from_table(self):
+        """Test a child's archived rows move back with their checkout."""
+        archive_records(self.before)
+        self.child.refresh_from_db()
+        self.assertTrue(self.child.archived)
+
+        self.assertEqual(restore_records(self.child.id), 3)
+
+        self.assertEqual(RecordsArchive.objects.count(), 0)
+        restored = Records.objects.filter(child=self.child)
+        self.assertEqual(restored.count(), 3)
+        self.assertFalse(restored.filter(
+            last_checkout__gte=self.before).exists())
+        self.child.refresh_from_db()
+        self.assertFalse(self.child.archived)
+        self.assertEqual(restore_records(self.child.id), 0)
+
+    def test_restore_from_ndjson(self):
+        """Test a child's rows are restored and removed from the files."""
+        other = Child.objects.create(
+            name="Lea", birthday=datetime.date(2020, 1, 1))
+        self.add_record(other, Items.objects.first(),
+                        timezone.now() - timedelta(days=1000))
+        archive_records(self.before, target='ndjson')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restore_records(self.child.id), 3)
+
+        self.assertEqual(Records.objects.filter(child=self.child).count(), 3)
+        self.assertEqual(list(archived_records([self.child.id])), [])
+        self.assertEqual(len(list(archived_records([other.id]))), 1)
+
+    def test_session_restores_child(self):
+        """Test starting a session brings the child's history back."""
+        archive_records(self.before)
+        tester = get_user_model().objects.create_user(
+            email='tester@example.com', name='tester', password='testpass',
+            role='Tester', is_staff=True)
+        test = Tests.objects.get()
+        self.child.tests.add(test)
+        client = APIClient()
+        client.force_authenticate(user=tester)
+
+        response = client.post(reverse('assessment:session-create'),
+                               {'child': self.child.id, 'test': test.id})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Records.objects.filter(child=self.child).count(), 3)
+
+    def test_norms_include_archived(self):
+        """Test archiving to the table or files doesn't change norms."""
+        def norms(version):
+            return sorted(Norms.objects.filter(version=version).values_list(
+                'item_id', 'month', 'passed', 'total'))
+
+        expected = norms(recompute_norms())
+        archive_records(self.before)
+        self.assertEqual(norms(recompute_norms(partitions=2)), expected)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restore_records(self.child.id)
+        archive_records(self.before, target='ndjson')
+        self.assertEqual(norms(recompute_norms(partitions=2)), expected)
@@ -0,0 +1,121 @@
+"""
+Tests for the audit trail.
+"""
+
+import datetime
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core import audit
+from core.audit import AuditQueue, audit_trail
+from core.models import AuditEvent, Child, Comments
+
+
+class AuditTests(TestCase):
+    """Tests for queueing and writing audit events."""
+
+    def setUp(self):
+        self.queue = AuditQueue(maxsize=100, batch_size=50, interval=60,
+                                overflow='flush')
+        patcher = mock.patch.object(audit, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', name='newuser', password='testpass',
+            role='Parent')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child = Child.objects.create(
+                name='Mike', birthday=datetime.date(2022, 1, 1))
+        self.user.child.add(self.child)
+
+    def create_comment(self, comment):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comments.objects.create(child=self.child, comment=comment)
+
+    def test_events_queued_then_written_in_batch(self):
+        """Test changes and views are queued and written at once."""
+        self.client.get(reverse('user:child-detail', args=[self.child.id]))
+        self.create_comment('Walks')
+        self.assertFalse(AuditEvent.objects.exists())
+
+        # A single insert, in a savepoint of the test's transaction.
+        with self.assertNumQueries(3):
+            written = self.queue.flush()
+
+        self.assertEqual(written, 3)
+        events = list(audit_trail(self.child.id).values_list(
+            'action', 'model', 'user_id'))
+        self.assertCountEqual(events, [
+            ('create', 'child', None),
+            ('view', 'child', self.user.id),
+            ('create', 'comments', None),
+        ])
+
+    def test_written_at_batch_size(self):
+        """Test the queue is written once it holds a batch."""
+        self.queue.batch_size = 3
+        self.create_comment('Walks')
+        self.create_comment('Runs')
+
+        self.assertEqual(AuditEvent.objects.count(), 3)
+        self.assertEqual(len(self.queue.events), 0)
+
+    def test_full_queue_drops_or_flushes(self):
+        """Test the overflow policies of a full queue."""
+        self.queue.maxsize = 1
+        self.queue.overflow = 'drop'
+        with self.assertLogs('core.audit', 'WARNING'):
+            self.create_comment('Walks')
+        self.assertEqual(self.queue.dropped, 1)
+
+        self.queue.overflow = 'flush'
+        self.create_comment('Runs')
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertEqual(len(self.queue.events), 1)
+
+    def test_changes_queued_on_commit(self):
+        """Test changes are queued only once their transaction commits."""
+        queued = len(self.queue.events)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comments.objects.create(child=self.child, comment='Walks')
+            self.assertEqual(len(self.queue.events), queued)
+
+        self.assertEqual(len(self.queue.events), queued + 1)
+
+    def test_failed_flush_keeps_events(self):
+        """Test a batch that can't be written is flushed again later."""
+        self.create_comment('Walks')
+        with mock.patch.object(AuditEvent.objects, 'bulk_create',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.queue.flush()
+        self.assertEqual(len(self.queue.events), 2)
+
+        self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+
+    def test_trail_by_time_range(self):
+        """Test the trail of a child is filtered by time."""
+        now = timezone.now()
+        AuditEvent.objects.bulk_create([
+            AuditEvent(created=now - timedelta(days=days), action='view',
+                       model='child', object_id=self.child.id,
+                       child_id=self.child.id)
+            for days in (1, 5, 10)
+        ])
+
+        events = audit_trail(self.child.id, start=now - timedelta(days=7),
+                             end=now - timedelta(days=2))
+
+        self.assertEqual(events.count(), 1)
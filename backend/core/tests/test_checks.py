@@ -0,0 +1,52 @@
+"""
+Tests for core system checks.
+"""
+
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_connection_reuse, check_shared_cache
+
+POSTGRES = {'ENGINE': 'django.db.backends.postgresql'}
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ConnectionReuseCheckTests(SimpleTestCase):
+    """Tests for the persistent connection check."""
+
+    @override_settings(DATABASES={'default': {**POSTGRES,
+                                              'CONN_MAX_AGE': 0}})
+    def test_warns_without_reuse(self):
+        errors = check_connection_reuse(None)
+
+        self.assertEqual([e.id for e in errors], ['core.W001'])
+
+    @override_settings(DATABASES={'default': {**POSTGRES,
+                                              'CONN_MAX_AGE': 60}})
+    def test_persistent_connections_ok(self):
+        self.assertEqual(check_connection_reuse(None), [])
+
+    @override_settings(DATABASES={'default': {
+        'ENGINE': 'core.db.backends.postgresql_pool', 'CONN_MAX_AGE': 0}})
+    def test_pool_ok(self):
+        self.assertEqual(check_connection_reuse(None), [])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Tests for the shared cache check."""
+
+    @override_settings(CACHES=LOCMEM, REQUIRE_SHARED_CACHE=True)
+    def test_fails_with_process_cache(self):
+        errors = check_shared_cache(None)
+
+        self.assertEqual([e.id for e in errors], ['core.E002'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_table'}}, REQUIRE_SHARED_CACHE=True)
+    def test_shared_cache_ok(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES=LOCMEM, REQUIRE_SHARED_CACHE=False)
+    def test_not_required(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,198 @@
+"""
+Tests for change events and event streams.
+"""
+
+import asyncio
+import datetime
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, AsyncClient
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.events import (LocalBackend, PostgresBackend, stream_ticket,
+                         ticket_user)
+from core.models import Child, Comments
+
+
+class LocalBackendTests(TestCase):
+    """Tests for the in-process pub/sub."""
+
+    def test_publish_to_subscribers(self):
+        """Test events reach subscribers of the channel only."""
+        backend = LocalBackend()
+
+        async def run():
+            child = backend.subscribe(['child:1'])
+            other = backend.subscribe(['child:2'])
+            backend.publish('child:1', {'type': 'child.saved'})
+            received = await child.get(1), await other.get(0.01)
+            child.close()
+            other.close()
+            return received
+
+        self.assertEqual(asyncio.run(run()),
+                         ({'type': 'child.saved'}, None))
+        self.assertEqual(dict(backend.subscriptions), {})
+
+    def test_slow_subscriber_drops_events(self):
+        """Test a full queue drops events instead of growing."""
+        backend = LocalBackend(maxsize=2)
+
+        async def run():
+            subscription = backend.subscribe(['child:1'])
+            for n in range(5):
+                backend.publish('child:1', n)
+            await asyncio.sleep(0)
+            return subscription.queue.qsize()
+
+        self.assertEqual(asyncio.run(run()), 2)
+
+
+class PostgresBackendTests(TestCase):
+    """Tests for the LISTEN/NOTIFY backend without a PostgreSQL server."""
+
+    def test_publish_notifies(self):
+        backend = PostgresBackend()
+        connections = mock.MagicMock()
+        cursor = connections['default'].cursor.return_value.__enter__()
+        with mock.patch('core.events.connections', connections):
+            backend.publish('child:1', {'type': 'child.saved'})
+
+        sql, params = cursor.execute.call_args.args
+        self.assertEqual(sql, 'SELECT pg_notify(%s, %s)')
+        self.assertEqual(params[0], PostgresBackend.NOTIFY_CHANNEL)
+        self.assertEqual(json.loads(params[1]), {
+            'channel': 'child:1', 'event': {'type': 'child.saved'}})
+
+    def test_notifications_delivered_locally(self):
+        """Test notifications reach the subscribers of their channel."""
+        backend = PostgresBackend()
+
+        async def run():
+            with mock.patch.object(backend, 'start'):
+                subscription = backend.subscribe(['child:1'])
+            backend.deliver(json.dumps(
+                {'channel': 'child:1', 'event': {'type': 'child.saved'}}))
+            backend.deliver(json.dumps(
+                {'channel': 'child:2', 'event': {'type': 'child.saved'}}))
+            received = await subscription.get(1), await subscription.get(0.01)
+            subscription.close()
+            return received
+
+        self.assertEqual(asyncio.run(run()),
+                         ({'type': 'child.saved'}, None))
+
+
+class StreamTicketTests(TestCase):
+    """Tests for signed stream tickets."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', name='newuser', password='testpass',
+            role='Parent')
+
+    def test_ticket_identifies_user(self):
+        ticket = stream_ticket(self.user)
+
+        self.assertEqual(ticket_user(ticket), self.user)
+        self.assertIsNone(ticket_user(ticket + 'x'))
+        self.assertIsNone(ticket_user(None))
+
+    def test_ticket_expires(self):
+        ticket = stream_ticket(self.user)
+
+        with self.settings(EVENTS_TICKET_MAX_AGE=-1):
+            self.assertIsNone(ticket_user(ticket))
+
+    def test_ticket_endpoint_needs_token(self):
+        url = reverse('user:events-ticket')
+        self.assertEqual(self.client.post(url).status_code, 401)
+
+        token = Token.objects.create(user=self.user)
+        response = self.client.post(
+            url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(ticket_user(response.json()['ticket']), self.user)
+
+
+class ChangeEventTests(TestCase):
+    """Tests for events published by model signals."""
+
+    def test_events_published_on_commit(self):
+        """Test saves publish to the child's channel after commit."""
+        backend = mock.Mock()
+        with mock.patch('core.events.get_backend', return_value=backend):
+            with self.captureOnCommitCallbacks(execute=True):
+                child = Child.objects.create(
+                    name='Mike', birthday=datetime.date(2022, 1, 1))
+                comment = Comments.objects.create(child=child,
+                                                  comment='Walks')
+                self.assertFalse(backend.publish.called)
+
+        backend.publish.assert_any_call(f'child:{child.id}', {
+            'type': 'comments.saved', 'id': comment.id, 'child': child.id})
+
+
+class EventStreamTests(TransactionTestCase):
+    """Tests for the server-sent events endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', name='newuser', password='testpass',
+            role='Parent')
+        self.token = Token.objects.create(user=self.user)
+        self.child = Child.objects.create(
+            name='Mike', birthday=datetime.date(2022, 1, 1))
+        self.user.child.add(self.child)
+        self.url = reverse('user:child-events', args=[self.child.id])
+
+    def test_stream_pushes_changes(self):
+        """Test a change to the child is streamed to the client."""
+        async def run():
+            response = await AsyncClient().get(
+                self.url, headers={'Authorization': f'Token {self.token.key}'})
+            stream = response.streaming_content
+            first = await anext(stream)
+            await sync_to_async(Comments.objects.create)(
+                child=self.child, comment='Walks')
+            event = await asyncio.wait_for(anext(stream), 5)
+            await stream.aclose()
+            return response, first, event
+
+        response, first, event = asyncio.run(run())
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(first, b'retry: 3000\n\n')
+        name, data = event.decode().strip().split('\n')
+        self.assertEqual(name, 'event: comments.saved')
+        self.assertEqual(json.loads(data[len('data: '):])['child'],
+                         self.child.id)
+
+    def test_stream_of_other_child(self):
+        """Test streams of another user's child are not allowed."""
+        child = Child.objects.create(name='Other',
+                                     birthday=datetime.date(2022, 1, 1))
+        url = reverse('user:child-events', args=[child.id])
+
+        response = asyncio.run(AsyncClient().get(
+            url, {'ticket': stream_ticket(self.user)}))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_rejects_token_in_url(self):
+        """Test API tokens are not accepted in the query string."""
+        response = asyncio.run(AsyncClient().get(
+            self.url, {'token': self.token.key}))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_needs_asgi(self):
+        """Test the WSGI server refuses streams."""
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.assertEqual(response.status_code, 501)
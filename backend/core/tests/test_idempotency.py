@@ -0,0 +1,146 @@
+"""
+Tests for idempotency keys.
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Child, IdempotencyKey
+from core.throttling import local_store
+
+CREATE_USER_URL = reverse('user:create')
+PROFILE_URL = reverse('user:profile')
+
+
+class IdempotencyTests(TestCase):
+    """Tests for replaying retried write requests."""
+
+    def setUp(self):
+        local_store.clear()
+        self.client = APIClient()
+        self.payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+            'role': 'Parent',
+        }
+
+    def post(self, payload, key='retry-1'):
+        return self.client.post(CREATE_USER_URL, payload, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_response(self):
+        """Test a retry returns the first response without writing."""
+        first = self.post(self.payload)
+        with self.assertNumQueries(1):
+            retry = self.post(self.payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_child_update_retry(self):
+        """Test a retried profile update adds the child once."""
+        user = get_user_model().objects.create_user(**self.payload)
+        self.client.force_authenticate(user=user)
+        payload = {'child': [{'name': 'Mike', 'birthday': '2022-01-01'}]}
+
+        for _ in range(2):
+            response = self.client.patch(PROFILE_URL, payload, format='json',
+                                         HTTP_IDEMPOTENCY_KEY='update-1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Child.objects.count(), 1)
+
+    def test_key_reused_for_other_payload(self):
+        """Test a key can't be reused for a different request."""
+        self.post(self.payload)
+        self.payload['email'] = 'other@example.com'
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_key_running(self):
+        """Test a retry while the first request runs is rejected."""
+        self.post(self.payload)
+        IdempotencyKey.objects.update(status_code=None)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_stale_claim_taken_over(self):
+        """Test a retry takes over a claim whose request never finished."""
+        self.post(self.payload)
+        get_user_model().objects.all().delete()
+        IdempotencyKey.objects.update(
+            status_code=None, expires=timezone.now() - timedelta(seconds=1))
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_unauthorized_response_released(self):
+        """Test responses that may change on retry are not stored."""
+        response = self.client.patch(PROFILE_URL, {'name': 'x'},
+                                     format='json',
+                                     HTTP_IDEMPOTENCY_KEY='update-1')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_validation_error_stored(self):
+        """Test a deterministic client error is replayed."""
+        del self.payload['email']
+        self.post(self.payload)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+
+    def test_expired_key_runs_again(self):
+        """Test requests with an expired key run again."""
+        self.post(self.payload)
+        IdempotencyKey.objects.update(
+            expires=timezone.now() - timedelta(seconds=1))
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_without_key(self):
+        """Test requests without a key are not stored."""
+        self.client.post(CREATE_USER_URL, self.payload, format='json')
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_clear_expired_keys(self):
+        """Test the sweeper deletes only expired keys."""
+        self.post(self.payload)
+        self.post(self.payload, key='retry-2')
+        IdempotencyKey.objects.filter(id=IdempotencyKey.objects.first().id) \
+            .update(expires=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+
+        call_command('clearidempotencykeys', stdout=out)
+
+        self.assertIn('Deleted 1 expired', out.getvalue())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
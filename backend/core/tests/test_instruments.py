@@ -0,0 +1,78 @@
+"""
+Tests for the compact instrument definitions.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from assessment.serializers import AssessmentDetailSerializer
+from core.db.routers import replica_reads
+from core.instruments import build_instruments, dense_curve, get_instrument
+from core.models import Tests, Categories, Items, Percentages
+
+
+class InstrumentsTests(TestCase):
+    """Tests for building and refreshing the instruments."""
+
+    def setUp(self):
+        cache.clear()
+        self.test = Tests.objects.create(name='Denver II')
+        motor = Categories.objects.create(test=self.test, name='Motor')
+        Categories.objects.create(test=self.test, name='Language')
+        self.item = Items.objects.create(
+            test=self.test, category=motor, step=1, instruction='walks')
+        Items.objects.create(test=self.test, category=motor, step=2,
+                             instruction='runs', description='Runs')
+        Percentages.objects.create(item=self.item, month=10, percent=40)
+        Percentages.objects.create(item=self.item, month=14, percent=95)
+
+    def test_payload_matches_serializer(self):
+        """Test instruments give the detail serializer's payload."""
+        instrument = build_instruments()[self.test.id]
+
+        self.assertEqual(instrument.as_dict(),
+                         AssessmentDetailSerializer(self.test).data)
+
+    def test_curve_is_dense_bytes(self):
+        """Test curves hold the percent of every month."""
+        item = build_instruments()[self.test.id].categories[0].items[0]
+
+        self.assertEqual(item.curve.typecode, 'B')
+        self.assertEqual(item.curve[9], 0)
+        self.assertEqual(item.curve[12], 40)
+        self.assertEqual(item.curve[72], 95)
+        self.assertEqual(len(dense_curve({}, max_month=5)), 6)
+
+    def test_rebuilt_on_change(self):
+        """Test the instruments are reloaded after a change."""
+        self.assertEqual(get_instrument(self.test.id).name, 'Denver II')
+        with self.assertNumQueries(0):
+            get_instrument(self.test.id)
+
+        self.test.name = 'Denver III'
+        self.test.save()
+
+        self.assertEqual(get_instrument(self.test.id).name, 'Denver III')
+
+    def test_rebuilt_when_generation_lost_or_expired(self):
+        """Test stale copies are rebuilt without a change signal."""
+        Tests.objects.filter(id=self.test.id).update(name='Denver III')
+        get_instrument(self.test.id)
+        Tests.objects.filter(id=self.test.id).update(name='Denver IV')
+
+        cache.clear()
+        self.assertEqual(get_instrument(self.test.id).name, 'Denver IV')
+
+        Tests.objects.filter(id=self.test.id).update(name='Denver V')
+        with self.settings(CATALOG_MAX_AGE=-1):
+            self.assertEqual(get_instrument(self.test.id).name, 'Denver V')
+
+    @override_settings(REPLICA_DATABASES=['replica_0'])
+    def test_built_from_primary_inside_replica_reads(self):
+        """Test a rebuild during a replica read doesn't use the replica."""
+        self.test.name = 'Denver III'
+        self.test.save()
+
+        with replica_reads():
+            self.assertEqual(get_instrument(self.test.id).name,
+                             'Denver III')
@@ -0,0 +1,82 @@
+"""
+Tests for the age based item index.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core import item_index
+from core.models import Tests, Categories, Items, Percentages
+
+
+class ItemIndexTests(TestCase):
+    """Tests for building and querying the item index."""
+
+    def setUp(self):
+        cache.clear()
+        item_index._index = None
+        self.test = Tests.objects.create(name="Denver II")
+        self.category = Categories.objects.create(test=self.test,
+                                                  name="Motor")
+        self.items = []
+        for step, curve in enumerate([{6: 50, 10: 95}, {6: 20, 12: 60},
+                                      {12: 30}]):
+            item = Items.objects.create(test=self.test,
+                                        category=self.category,
+                                        step=step, instruction=f"i{step}")
+            for month, percent in curve.items():
+                Percentages.objects.create(item=item, month=month,
+                                           percent=percent)
+            self.items.append(item)
+
+    def test_select_band(self):
+        """Test items in the band at a month are returned by percent."""
+        index = item_index.get_item_index()
+
+        selected = index.select(self.test.id, 12, 25, 90)
+
+        self.assertEqual(selected[self.category.id],
+                         [(self.items[2].id, 30), (self.items[1].id, 60)])
+        self.assertEqual(index.select(self.test.id, 8, 25, 90),
+                         {self.category.id: [(self.items[0].id, 50)]})
+
+    def test_select_excludes_completed(self):
+        index = item_index.get_item_index()
+
+        selected = index.select(self.test.id, 12, 25, 90,
+                                exclude={self.items[1].id})
+
+        self.assertEqual(selected[self.category.id],
+                         [(self.items[2].id, 30)])
+
+    def test_index_rebuilt_on_change(self):
+        """Test the index is reused until percentages change."""
+        index = item_index.get_item_index()
+        self.assertIs(item_index.get_item_index(), index)
+
+        Percentages.objects.create(item=self.items[0], month=12, percent=80)
+
+        rebuilt = item_index.get_item_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertIn((self.items[0].id, 80),
+                      rebuilt.select(self.test.id, 12, 25, 90)
+                      [self.category.id])
+
+    def test_fresh_index_reads_only_generation(self):
+        """Test the norms version is cached with the index."""
+        item_index.get_item_index()
+
+        with self.assertNumQueries(0):
+            item_index.get_item_index()
+
+    def test_index_rebuilt_when_generation_lost(self):
+        index = item_index.get_item_index()
+        cache.delete(item_index.GENERATION_KEY)
+
+        self.assertIsNot(item_index.get_item_index(), index)
+
+    def test_index_expires(self):
+        index = item_index.get_item_index()
+
+        with self.settings(CATALOG_MAX_AGE=-1):
+            self.assertIsNot(item_index.get_item_index(), index)
@@ -0,0 +1,105 @@
+"""
+Tests for norms recomputation.
+"""
+
+import io
+import shutil
+import tempfile
+from datetime import date, datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.jobs import claim_jobs, enqueue, run_job
+from core.models import (Child, Clinic, Job, Tests, Categories, Items,
+                         Records, Norms, NormsVersion)
+from core.norms import partition_items, recompute_norms
+
+
+class NormsRecomputeTests(TestCase):
+    """Tests for recomputing norms from records."""
+
+    def setUp(self):
+        test = Tests.objects.create(name="Denver II")
+        category = Categories.objects.create(test=test, name="Motor")
+        self.items = [
+            Items.objects.create(test=test, category=category, step=step,
+                                 instruction=f"item{step}")
+            for step in range(3)
+        ]
+        checkout = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        # Ages at checkout: 12, 12, 12 and 6 months.
+        children = [
+            Child.objects.create(name=f"c{i}", birthday=birthday)
+            for i, birthday in enumerate([date(2022, 1, 6), date(2022, 1, 6),
+                                          date(2022, 1, 6), date(2022, 7, 5)])
+        ]
+        results = [
+            (children[0], self.items[0], True),
+            (children[1], self.items[0], True),
+            (children[2], self.items[0], False),
+            (children[3], self.items[0], False),
+            (children[0], self.items[1], True),
+            (children[3], self.items[2], True),
+        ]
+        for child, item, complete in results:
+            record = Records.objects.create(child=child, item=item,
+                                            is_complete=complete)
+            Records.objects.filter(id=record.id).update(
+                last_checkout=checkout)
+
+    def norms(self, version):
+        return {
+            (n.item_id, n.month): (n.passed, n.total, n.percent)
+            for n in Norms.objects.filter(version=version)
+        }
+
+    def test_recompute_counts_per_item_and_month(self):
+        version = recompute_norms(chunk_size=2)
+
+        self.assertTrue(version.is_complete)
+        self.assertEqual(version.record_count, 6)
+        self.assertEqual(self.norms(version), {
+            (self.items[0].id, 12): (2, 3, 67),
+            (self.items[0].id, 6): (0, 1, 0),
+            (self.items[1].id, 12): (1, 1, 100),
+            (self.items[2].id, 6): (1, 1, 100),
+        })
+
+    def test_partitions_match_single_run(self):
+        single = recompute_norms()
+        partitioned = recompute_norms(partitions=2)
+
+        self.assertEqual(self.norms(single), self.norms(partitioned))
+
+    def test_partitions_are_item_id_ranges(self):
+        """Test partitions split the ordered item ids without overlap."""
+        partitions = [partition_items(n, 2) for n in range(2)]
+
+        self.assertEqual(partitions[0] + partitions[1],
+                         sorted(item.id for item in self.items))
+        self.assertLess(max(partitions[0]), min(partitions[1]))
+        self.assertEqual(partition_items(0, 5), [])
+
+    def test_command_creates_version(self):
+        call_command('recomputenorms', min_count=2, stdout=io.StringIO())
+
+        version = NormsVersion.objects.get()
+        self.assertEqual(list(self.norms(version)),
+                         [(self.items[0].id, 12)])
+
+    def test_job_reads_every_clinic(self):
+        """Test the job of a staff user in a clinic uses all records."""
+        clinic = Clinic.objects.create(name='North', slug='north')
+        owner = get_user_model().objects.create_user(
+            email='staff@example.com', name='staff', password='testpass',
+            role='Parent', is_staff=True, clinic=clinic)
+        job = enqueue('recompute_norms', owner=owner)
+        claim_jobs(1)
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+
+        with override_settings(MEDIA_ROOT=media):
+            self.assertEqual(run_job(job.id), Job.DONE)
+        self.assertEqual(NormsVersion.objects.get().record_count, 6)
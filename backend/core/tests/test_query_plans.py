@@ -0,0 +1,110 @@
+"""
+Query plan tests of the registered queries.
+"""
+
+import datetime
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (AuditEvent, Categories, Child, Clinic, Items,
+                         Percentages, Records, Tests)
+from core.queryplans import QUERIES, QueryPlanTestMixin, parse_plan
+
+
+class QueryPlanTests(QueryPlanTestMixin, TestCase):
+    """Tests the registered queries read through indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        clinic = Clinic.objects.create(name='North', slug='north')
+        user = get_user_model().objects.create_user(
+            email='test@example.com', name='newuser', password='testpass',
+            role='Parent')
+        children = Child.objects.bulk_create([
+            Child(name=f'Child{n}', birthday=datetime.date(2022, 1, 1),
+                  clinic=clinic if n % 2 else None)
+            for n in range(200)
+        ])
+        user.child.add(*children[:150])
+        tests = [Tests.objects.create(name=f'Test{n}') for n in range(3)]
+        categories = Categories.objects.bulk_create([
+            Categories(test=test, name=f'Category{n}')
+            for test in tests for n in range(50)
+        ])
+        items = Items.objects.bulk_create([
+            Items(test=category.test, category=category, step=step,
+                  instruction=f'item{step}')
+            for category in categories for step in range(4)
+        ])
+        Percentages.objects.bulk_create([
+            Percentages(item=item, month=month, percent=50)
+            for item in items for month in (6, 12)
+        ])
+        Records.objects.bulk_create([
+            Records(child=child, item=item)
+            for child in children[:20] for item in items[:20]
+        ])
+        AuditEvent.objects.bulk_create([
+            AuditEvent(created=timezone.now(), action='view', model='child',
+                       object_id=child.id, child_id=child.id)
+            for child in children
+        ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        cls.fixture = {
+            'user': user,
+            'child': children[1],
+            'clinic': clinic,
+            'test': tests[0],
+            'category_ids': [c.id for c in categories[:50]],
+            'item': items[0],
+        }
+
+    def test_registered_queries(self):
+        """Test every registered query uses its indexes."""
+        for name in QUERIES:
+            with self.subTest(name):
+                self.assertQueryPlan(name, self.fixture)
+
+    def test_full_scan_fails_with_diff(self):
+        """Test a full scan of a large table fails with the plan diff."""
+        QUERIES['unindexed'] = (
+            lambda fixture: Items.objects.filter(instruction='item1'), ())
+        self.addCleanup(QUERIES.pop, 'unindexed')
+
+        with mock.patch.dict(os.environ, {'UPDATE_QUERY_PLANS': ''}), \
+                self.assertRaises(AssertionError) as failure:
+            self.assertQueryPlan('unindexed', self.fixture)
+
+        self.assertIn('full scan of core_items', str(failure.exception))
+        self.assertIn('No baseline', str(failure.exception))
+
+    def test_parse_postgres_plan(self):
+        """Test index and sequential scans are read from Postgres plans."""
+        plan = '\n'.join([
+            'Nested Loop',
+            '  ->  Index Only Scan using core_cu_child_uniq on '
+            'core_customuser_child',
+            '  ->  Seq Scan on core_child',
+            '  ->  Bitmap Heap Scan on core_items',
+            '        ->  Bitmap Index Scan on core_items_category_id',
+            '  ->  Index Scan using core_records_item_id on core_records '
+            'child_records',
+        ])
+
+        accesses = parse_plan(plan, 'postgresql')
+
+        self.assertEqual([(a.table, a.index) for a in accesses], [
+            ('core_customuser_child', 'core_cu_child_uniq'),
+            ('core_child', None),
+            ('core_items', 'core_items_category_id'),
+            ('core_records', 'core_records_item_id'),
+        ])
+        self.assertTrue(accesses[-1].reads('child_records'))
@@ -0,0 +1,60 @@
+"""
+Tests for query inspection.
+"""
+
+import logging
+
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+
+from core.middleware import QueryInspectionMiddleware
+from core.models import Tests, Categories
+from core.querylog import QueryCollector, NPlusOneTestMixin, normalize_sql
+
+
+def categories_per_test(request):
+    """View with an N+1 over tests."""
+    for test in Tests.objects.all():
+        list(test.categories.all())
+    return HttpResponse()
+
+
+class QueryLogTests(NPlusOneTestMixin, TestCase):
+    """Tests for the N+1 detector and slow query log."""
+
+    def setUp(self):
+        for number in range(4):
+            test = Tests.objects.create(name=f"Test{number}")
+            Categories.objects.create(test=test, name="Motor")
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3)\n"
+                          " AND name = 'x''y' AND n = 2.5"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? AND n = ?")
+
+    def test_collector_groups_templates(self):
+        with QueryCollector() as collector:
+            categories_per_test(None)
+
+        self.assertEqual(len(collector.queries), 5)
+        self.assertEqual(list(collector.repeated(3).values()), [4])
+        self.assertIn('test_querylog.py', collector.report(3))
+
+    def test_assert_no_n_plus_one_fails(self):
+        with self.assertRaises(AssertionError):
+            with self.assertNoNPlusOne():
+                categories_per_test(None)
+
+        with self.assertNoNPlusOne():
+            list(Tests.objects.prefetch_related('categories'))
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3, SLOW_QUERY_MS=0)
+    def test_middleware_logs(self):
+        middleware = QueryInspectionMiddleware(categories_per_test)
+
+        with self.assertLogs('core.queries', logging.WARNING) as logs:
+            middleware(RequestFactory().get('/tests/'))
+
+        self.assertIn('Possible N+1 in GET /tests/', logs.output[0])
+        self.assertIn('Slow query', logs.output[1])
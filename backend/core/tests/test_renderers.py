@@ -0,0 +1,69 @@
+"""
+Tests for the JSON renderers and response compression.
+"""
+
+import gzip
+import io
+import json
+import unittest
+from decimal import Decimal
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.middleware import CompressionMiddleware, brotli
+
+
+@unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+class ORJSONRendererTests(SimpleTestCase):
+    """Tests for the orjson renderer and parser."""
+
+    def test_render_matches_stdlib(self):
+        data = {'id': 1, 'name': 'Denver II', 'score': Decimal('1.5'),
+                'categories': [{'name': 'Motor', 'items': []}]}
+        content = renderers.ORJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(content),
+                         json.loads(JSONRenderer().render(data)))
+
+    def test_parse(self):
+        parser = renderers.ORJSONParser()
+        data = parser.parse(io.BytesIO(b'{"email": "a@example.com"}'))
+
+        self.assertEqual(data, {'email': 'a@example.com'})
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100, COMPRESSION_BROTLI_QUALITY=5)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Tests for the compression middleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.content = b'{"name": "item"}' * 100
+
+    def get_response(self, content, encoding):
+        middleware = CompressionMiddleware(lambda r: HttpResponse(content))
+        return middleware(self.factory.get(
+            '/', HTTP_ACCEPT_ENCODING=encoding))
+
+    def test_small_response_not_compressed(self):
+        response = self.get_response(b'{}', 'gzip, br')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip(self):
+        response = self.get_response(self.content, 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        response = self.get_response(self.content, 'gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
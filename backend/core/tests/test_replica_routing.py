@@ -0,0 +1,136 @@
+"""
+Tests for read replica routing.
+"""
+
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (SimpleTestCase, TestCase, RequestFactory,
+                         override_settings)
+
+from core.db.routers import PrimaryReplicaRouter, replica_reads
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Tests
+
+
+@override_settings(REPLICA_DATABASES=['replica_0'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Tests for the router and the routing middleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.route_read)
+
+    def route_read(self, request):
+        """Fake view returning the alias reads would use."""
+        return HttpResponse(self.router.db_for_read(Tests))
+
+    def test_reads_default_outside_requests(self):
+        self.assertEqual(self.router.db_for_read(Tests), 'default')
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Tests), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Tests), 'default')
+
+    def test_safe_request_reads_replica(self):
+        response = self.middleware(self.factory.get('/'))
+
+        self.assertEqual(response.content, b'replica_0')
+
+    def test_read_your_writes_after_post(self):
+        """Test a client is pinned to the primary after writing."""
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+        post_response = self.middleware(self.factory.post('/', **auth))
+        response = self.middleware(self.factory.get('/', **auth))
+        other_response = self.middleware(self.factory.get(
+            '/', HTTP_AUTHORIZATION='Token other'))
+
+        self.assertEqual(post_response.content, b'default')
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(other_response.content, b'replica_0')
+
+    @override_settings(REPLICA_DATABASES=['replica_0', 'replica_1'])
+    def test_one_replica_per_request(self):
+        for _ in range(5):
+            with replica_reads():
+                aliases = {self.router.db_for_read(Tests) for _ in range(20)}
+            self.assertEqual(len(aliases), 1)
+
+    def test_no_migrations_on_replica(self):
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA], REPLICA_PIN_SECONDS=5)
+class ReplicaDatabaseTests(TestCase):
+    """Tests for routing against a second SQLite database.
+
+    The alias is added when the class is set up, so the test runner
+    doesn't try to create a test database for it.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.databases = {'default', REPLICA}
+        fd, cls.replica_name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        connections.settings[REPLICA] = {
+            **connections['default'].settings_dict,
+            'NAME': cls.replica_name}
+        with connections[REPLICA].schema_editor() as editor:
+            editor.create_model(Tests)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        os.remove(cls.replica_name)
+
+    def setUp(self):
+        cache.clear()
+        Tests.objects.create(name='primary')
+        Tests.objects.using(REPLICA).create(name='replica')
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.list_tests)
+
+    def list_tests(self, request):
+        """Fake view returning the names of the tests it reads."""
+        names = Tests.objects.values_list('name', flat=True)
+        return HttpResponse(','.join(names))
+
+    def test_safe_request_reads_replica(self):
+        response = self.middleware(self.factory.get('/'))
+
+        self.assertEqual(response.content, b'replica')
+
+    def test_pin_cookie_reads_primary(self):
+        """Test the signed cookie set by a write pins later reads."""
+        post_response = self.middleware(self.factory.post('/'))
+        cache.clear()
+        request = self.factory.get('/')
+        request.COOKIES = {
+            name: morsel.value
+            for name, morsel in post_response.cookies.items()}
+        response = self.middleware(request)
+
+        self.assertIn(settings.REPLICA_PIN_COOKIE, post_response.cookies)
+        self.assertEqual(response.content, b'primary')
+
+    def test_forged_pin_cookie_ignored(self):
+        request = self.factory.get('/')
+        request.COOKIES = {settings.REPLICA_PIN_COOKIE: '1'}
+        response = self.middleware(request)
+
+        self.assertEqual(response.content, b'replica')
@@ -0,0 +1,50 @@
+"""
+Tests for the lazy schema views and start up profiling.
+"""
+
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.management.commands.profilestartup import parse_importtime
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Tests for serving the API schema."""
+
+    def test_serves_pregenerated_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.yml', delete=False) as f:
+            f.write(b'openapi: 3.0.3\n')
+        self.addCleanup(os.remove, f.name)
+
+        with override_settings(API_SCHEMA_FILE=f.name):
+            response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response['Content-Type'],
+                         'application/vnd.oai.openapi')
+        self.assertEqual(b''.join(response.streaming_content),
+                         b'openapi: 3.0.3\n')
+
+    @override_settings(API_SCHEMA_FILE='/nonexistent/schema.yml')
+    def test_generates_without_file(self):
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'openapi', response.content)
+
+
+class ParseImportTimeTests(SimpleTestCase):
+
+    def test_parse(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _io\n'
+            'import time:      1500 |      42000 | django\n'
+        )
+
+        self.assertEqual(parse_importtime(stderr),
+                         [('_io', 120, 120), ('django', 1500, 42000)])
@@ -0,0 +1,120 @@
+"""
+Tests for clinic scoping.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Clinic, Child, Records, Tests, Categories, Items
+from core.tenancy import clinic_scope, tenant_cache_key
+from user.views import (ChildGrowthView, ChildNextItemsView, ChildReportView,
+                        ChildRetrieveUpdateDestroyView)
+import datetime
+
+
+class TenancyTests(TestCase):
+    """Tests for TenantManager and clinic assignment."""
+
+    def setUp(self):
+        self.north = Clinic.objects.create(name='North', slug='north')
+        self.south = Clinic.objects.create(name='South', slug='south')
+        self.north_child = Child.objects.create(
+            name='Ada', birthday=datetime.date(2022, 1, 1), clinic=self.north)
+        self.south_child = Child.objects.create(
+            name='Bo', birthday=datetime.date(2022, 1, 1), clinic=self.south)
+
+    def test_queries_scoped_to_clinic(self):
+        """Test only rows of the current clinic are returned."""
+        with clinic_scope(self.north.id):
+            self.assertEqual(list(Child.objects.all()), [self.north_child])
+        with clinic_scope(None):
+            self.assertEqual(Child.objects.count(), 2)
+        self.assertEqual(Child.objects.count(), 2)
+        with clinic_scope(self.north.id):
+            self.assertEqual(Child.all_objects.count(), 2)
+
+    def test_new_rows_take_clinic(self):
+        """Test children get the current clinic and records the child's."""
+        with clinic_scope(self.south.id):
+            child = Child.objects.create(
+                name='Cy', birthday=datetime.date(2022, 1, 1))
+        self.assertEqual(child.clinic, self.south)
+
+        test = Tests.objects.create(name='Denver II')
+        category = Categories.objects.create(test=test, name='Motor')
+        item = Items.objects.create(test=test, category=category, step=1,
+                                    instruction='walks')
+        record = Records.objects.create(child=self.north_child, item=item)
+        self.assertEqual(record.clinic, self.north)
+
+    def test_cache_keys_per_clinic(self):
+        """Test cache keys differ between clinics."""
+        with clinic_scope(self.north.id):
+            north = tenant_cache_key('key')
+        with clinic_scope(self.south.id):
+            south = tenant_cache_key('key')
+        self.assertNotEqual(north, south)
+
+
+class TenantMiddlewareTests(TestCase):
+    """Tests for scoping API requests to the user's clinic."""
+
+    def setUp(self):
+        self.north = Clinic.objects.create(name='North', slug='north')
+        self.south = Clinic.objects.create(name='South', slug='south')
+        self.user = get_user_model().objects.create_user(
+            email='staff@example.com',
+            name='staff',
+            password='testpass',
+            role='Staff',
+            is_staff=True,
+            clinic=self.north,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.test = Tests.objects.create(name='Denver II')
+
+    def test_staff_assigns_only_own_clinic_children(self):
+        """Test staff can't reach children of another clinic."""
+        own = Child.objects.create(name='Ada', clinic=self.north,
+                                   birthday=datetime.date(2022, 1, 1))
+        other = Child.objects.create(name='Bo', clinic=self.south,
+                                     birthday=datetime.date(2022, 1, 1))
+        url = reverse('assessment:assign')
+
+        response = self.client.post(url, {
+            'child_ids': [own.id, other.id], 'test_ids': [self.test.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['child_ids'], [other.id])
+        self.assertFalse(other.tests.exists())
+
+    def test_child_views_scoped_per_request(self):
+        """Test child views build their querysets in the request's clinic."""
+        parent = get_user_model().objects.create_user(
+            email='parent@example.com', name='parent', password='testpass',
+            role='Parent', clinic=self.north)
+        own = Child.objects.create(name='Ada', clinic=self.north,
+                                   birthday=datetime.date(2022, 1, 1))
+        other = Child.objects.create(name='Bo', clinic=self.south,
+                                     birthday=datetime.date(2022, 1, 1))
+        parent.child.add(own, other)
+        self.client.force_authenticate(user=parent)
+
+        for view in (ChildRetrieveUpdateDestroyView, ChildReportView,
+                     ChildNextItemsView, ChildGrowthView):
+            with self.subTest(view.__name__), clinic_scope(self.north.id):
+                self.assertEqual(list(view().get_queryset()), [own])
+        for name in ('user:child-detail', 'user:child-report',
+                     'user:child-growth'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[other.id]))
+                self.assertEqual(response.status_code,
+                                 status.HTTP_401_UNAUTHORIZED)
+                response = self.client.get(reverse(name, args=[own.id]))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
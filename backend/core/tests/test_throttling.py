@@ -0,0 +1,133 @@
+"""
+Tests for token bucket throttles.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.throttling import LocalBucketStore, parse_rate, local_store
+
+TOKEN_URL = reverse('user:token')
+CREATE_USER_URL = reverse('user:create')
+
+
+class BucketStoreTests(TestCase):
+    """Tests for the bucket store."""
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('6/min'), (6, 0.1))
+        self.assertEqual(parse_rate(None), (None, None))
+
+    def test_bucket_empties_and_refills(self):
+        """Test bucket allows capacity requests then refills over time."""
+        store = LocalBucketStore()
+        for _ in range(3):
+            self.assertEqual(store.consume('k', 3, 1, now=100), 0)
+
+        self.assertAlmostEqual(store.consume('k', 3, 1, now=100), 1)
+        self.assertEqual(store.consume('k', 3, 1, now=101), 0)
+
+    def test_store_is_bounded(self):
+        """Test the least recently used buckets are evicted."""
+        store = LocalBucketStore(max_buckets=2)
+        store.consume('a', 1, 1, now=100)
+        store.consume('b', 1, 1, now=100)
+        store.consume('a', 1, 1, now=100)
+        store.consume('c', 1, 1, now=100)
+        self.assertEqual(len(store), 2)
+        self.assertGreater(store.consume('a', 1, 1, now=100), 0)
+        self.assertEqual(store.consume('b', 1, 1, now=100), 0)
+
+
+class ThrottledEndpointsTests(TestCase):
+    """Tests for throttling on the public user endpoints."""
+
+    def setUp(self):
+        local_store.clear()
+        self.client = APIClient()
+
+    def test_token_throttled_per_email(self):
+        """Test token endpoint returns 429 without hashing passwords."""
+        payload = {'email': 'Test@example.com', 'password': 'wrongpass'}
+        rates = {'token_ip': '100/min', 'token_email': '2/min'}
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates), \
+                mock.patch('user.serializers.authenticate',
+                           return_value=None) as authenticate:
+            for _ in range(2):
+                response = self.client.post(TOKEN_URL, payload)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+            payload['email'] = 'test@example.com'
+            response = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_create_user_throttled_per_ip(self):
+        """Test signup endpoint is limited per client IP."""
+        rates = {'create_user_ip': '1/hour', 'create_user_email': '5/hour'}
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates):
+            self.client.post(CREATE_USER_URL, {'email': 'a@example.com'})
+            response = self.client.post(CREATE_USER_URL,
+                                        {'email': 'b@example.com'})
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_forwarded_for_not_trusted(self):
+        """Test a spoofed X-Forwarded-For doesn't get new IP buckets."""
+        rates = {'token_ip': '2/min'}
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates, clear=True):
+            codes = [
+                self.client.post(TOKEN_URL, {'email': 'a@example.com'},
+                                 HTTP_X_FORWARDED_FOR=f'10.0.0.{n}')
+                .status_code
+                for n in range(4)
+            ]
+
+        self.assertEqual(codes[2:], [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+
+    def test_forwarded_for_behind_proxy(self):
+        """Test the client IP is read from the header behind a proxy."""
+        rates = {'token_ip': '1/min'}
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates, clear=True), \
+                mock.patch.object(api_settings, 'NUM_PROXIES', 1):
+            codes = [
+                self.client.post(TOKEN_URL, {'email': 'a@example.com'},
+                                 HTTP_X_FORWARDED_FOR=f'10.0.0.{n}')
+                .status_code
+                for n in range(2)
+            ]
+
+        self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, codes)
+
+    @override_settings(THROTTLE_BUCKET_STORE='cache')
+    def test_cache_store_shared(self):
+        """Test the shared cache store throttles the same way."""
+        cache.clear()
+        rates = {'token_ip': '1/min'}
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates, clear=True):
+            self.client.post(TOKEN_URL, {'email': 'a@example.com'})
+            response = self.client.post(TOKEN_URL, {'email': 'a@example.com'})
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
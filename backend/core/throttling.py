@@ -0,0 +1,169 @@
+"""
+Token bucket throttles for the public APIs.
+"""
+
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse a '<num>/<period>' rate into (capacity, refill per second)."""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """Lock-free per process bucket store of at most max_buckets buckets.
+
+    Buckets are (tokens, timestamp) tuples kept in least recently used
+    order. Going over the size evicts the least recently used bucket,
+    so random keys can't grow the store without limit. A key under
+    attack is used on every attempt and stays at the recent end, so
+    only max_buckets other keys between two attempts could reset it.
+
+    Without a lock, threads consuming the same key at once may both
+    take the last token, so a limit may be exceeded by the number of
+    threads of the worker.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, refill_rate, now):
+        """Take a token from the bucket and return seconds to wait."""
+        tokens, stamp = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / refill_rate
+        self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+        while len(self._buckets) > self.max_buckets:
+            try:
+                self._buckets.popitem(last=False)
+            except KeyError:
+                # Emptied by another thread.
+                break
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Bucket store shared between workers through the Django cache.
+
+    The bucket is read and written back without a lock, so workers
+    consuming the same key at once may each take the last token: a
+    limit may be exceeded by up to the number of workers.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def consume(self, key, capacity, refill_rate, now):
+        """Take a token from the bucket and return seconds to wait."""
+        key = f'throttle:{key}'
+        tokens, stamp = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+        timeout = int(capacity / refill_rate) + 1
+        if tokens < 1:
+            self.cache.set(key, (tokens, now), timeout)
+            return (1 - tokens) / refill_rate
+        self.cache.set(key, (tokens - 1, now), timeout)
+        return 0
+
+
+local_store = LocalBucketStore(
+    getattr(settings, 'THROTTLE_LOCAL_MAX_BUCKETS', 10000))
+
+
+def get_bucket_store():
+    """Return the bucket store selected by THROTTLE_BUCKET_STORE."""
+    name = getattr(settings, 'THROTTLE_BUCKET_STORE', 'local')
+    if name == 'local':
+        return local_store
+    if name == 'cache':
+        return CacheBucketStore(
+            getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default'))
+    raise ImproperlyConfigured(f'Unknown throttle bucket store "{name}".')
+
+
+class BucketThrottle(BaseThrottle):
+    """Base token bucket throttle.
+
+    The rate is looked up as '<view.throttle_scope>_<kind>' in
+    DEFAULT_THROTTLE_RATES, so each endpoint gets its own limits.
+    Views without a throttle_scope or without a configured rate are
+    not throttled.
+    """
+    kind = None
+
+    def __init__(self):
+        self.wait_time = 0
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{self.kind}')
+
+    def allow_request(self, request, view):
+        capacity, refill_rate = parse_rate(self.get_rate(view))
+        if capacity is None:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+        key = f'{view.throttle_scope}_{self.kind}:{ident}'
+        self.wait_time = get_bucket_store().consume(
+            key, capacity, refill_rate, time.time())
+        return self.wait_time == 0
+
+    def wait(self):
+        return self.wait_time or None
+
+
+class IPBucketThrottle(BucketThrottle):
+    """Throttle requests per client IP address.
+
+    X-Forwarded-For is only trusted for the NUM_PROXIES proxies in front
+    of the app; with the default of 0 the address is REMOTE_ADDR.
+    """
+    kind = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class EmailBucketThrottle(BucketThrottle):
+    """Throttle requests per email address in the request body."""
+    kind = 'email'
+
+    def get_ident_key(self, request):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not email:
+            return None
+        return str(email).strip().lower()
@@ -0,0 +1,64 @@
+"""
+Project level views.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authtoken.models import Token
+
+SCHEMA_CONTENT_TYPES = {
+    '.json': 'application/vnd.oai.openapi+json',
+    '.yml': 'application/vnd.oai.openapi',
+    '.yaml': 'application/vnd.oai.openapi',
+}
+
+
+def lazy_view(import_path, **initkwargs):
+    """Return a view importing the class based view on its first call.
+
+    Keeps heavy modules, like the schema generator, out of worker start up.
+    """
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(import_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+_generated_schema_view = lazy_view(
+    'drf_spectacular.views.SpectacularAPIView')
+
+
+def schema_view(request, *args, **kwargs):
+    """Serve the pre-generated schema file, or generate it if missing."""
+    path = Path(settings.API_SCHEMA_FILE)
+    if path.is_file():
+        return FileResponse(
+            path.open('rb'),
+            content_type=SCHEMA_CONTENT_TYPES.get(path.suffix),
+        )
+    return _generated_schema_view(request, *args, **kwargs)
+
+
+def token_user(request):
+    """Return the active user of the request's token, or None.
+
+    Only the Authorization header is read; tokens in URLs would be
+    logged.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    key = header[len('Token '):] if header.startswith('Token ') else None
+    if not key:
+        return None
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
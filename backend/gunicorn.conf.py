@@ -0,0 +1,78 @@
+"""
+Gunicorn configuration, loaded from the working directory by default.
+
+    gunicorn -c gunicorn.conf.py
+
+Every setting comes from the environment:
+
+    WEB_CONCURRENCY   worker processes (default 2 x cores + 1, 1 x cores
+                      + 1 for uvicorn and gthread workers)
+    WEB_THREADS       threads per gthread worker (default 4)
+    WEB_WORKER_CLASS  sync, gthread or uvicorn (default gthread)
+    WEB_PRELOAD       load the app before forking (default true)
+    PORT              port to bind (default 8000)
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE',
+                      'backend.settings_production')
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+cores = multiprocessing.cpu_count()
+kind = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+if kind not in WORKER_CLASSES:
+    raise RuntimeError(
+        f'WEB_WORKER_CLASS must be one of {list(WORKER_CLASSES)}')
+
+worker_class = WORKER_CLASSES[kind]
+wsgi_app = 'backend.asgi:application' if kind == 'uvicorn' \
+    else 'backend.wsgi:application'
+default_workers = 2 * cores + 1 if kind == 'sync' else cores + 1
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('WEB_THREADS', 4)) if kind == 'gthread' else 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Importing Django once in the master lets workers share those pages
+# copy-on-write.
+preload_app = os.environ.get('WEB_PRELOAD', 'true').lower() in \
+    ('1', 'true', 'yes')
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+keepalive = 5
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+
+
+def when_ready(server):
+    """Keep the GC from touching the preloaded app's pages after the
+    fork, so workers go on sharing them."""
+    if not preload_app:
+        return
+    import gc
+
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    """Close DB connections the master opened while preloading, so no
+    socket is shared between workers."""
+    from django.db import connections
+
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    """Write the audit events still queued."""
+    from core.audit import get_queue
+
+    try:
+        get_queue().flush()
+    except Exception:
+        server.log.exception('Could not write audit events')
@@ -0,0 +1,28 @@
+"""
+Serializers for the Jobs APIs.
+"""
+
+from django.utils.translation import gettext as _
+from rest_framework import serializers
+
+from core.jobs import registry, staff_jobs
+from core.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background jobs."""
+
+    class Meta:
+        model = Job
+        fields = ["id", "name", "params", "status", "error",
+                  "created", "started", "finished"]
+        read_only_fields = ["status", "error", "created", "started",
+                            "finished"]
+
+    def validate_name(self, value):
+        if value not in registry:
+            raise serializers.ValidationError(_('Unknown job.'))
+        user = self.context['request'].user
+        if value in staff_jobs and not user.is_staff:
+            raise serializers.ValidationError(_('Only staff can run this.'))
+        return value
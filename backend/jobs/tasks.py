@@ -0,0 +1,107 @@
+"""
+Report and export jobs.
+"""
+
+import csv
+import json
+
+from assessment.snapshots import publish_snapshots
+from core.archive import archived_records, item_labels
+from core.jobs import register_job
+from core.models import Child, Records
+from core.norms import recompute_norms
+from core.reports import category_report
+
+
+def children_for(job):
+    """Return the children a job may read, limited to job.params."""
+    owner = job.owner
+    if owner is None or owner.is_staff:
+        children = Child.objects.all()
+    else:
+        children = owner.child.all()
+    if job.params.get('children'):
+        children = children.filter(id__in=job.params['children'])
+    return children
+
+
+class Echo:
+    """Writer returning what is written, for csv.writer to yield rows."""
+
+    def write(self, value):
+        return value
+
+
+@register_job('records_export')
+def records_export(job):
+    """Export records of the job's children as CSV.
+
+    Archived records follow the recent ones unless the job's
+    include_archived param is false. Rows are written to storage one by
+    one as they are read.
+    """
+    queryset = children_for(job)
+    children = dict(queryset.values_list('id', 'name'))
+    # The children are a subquery, their ids may be too many parameters.
+    records = Records.objects.filter(
+        child__in=queryset,
+    ).values_list(
+        'child_id', 'child__name', 'item__test__name',
+        'item__category__name', 'item__step', 'is_complete',
+        'last_checkout',
+    ).order_by('child_id', 'item_id')
+    include_archived = job.params.get('include_archived', True)
+
+    def rows():
+        writer = csv.writer(Echo())
+        yield writer.writerow(['child_id', 'child', 'test', 'category',
+                               'step', 'is_complete', 'last_checkout',
+                               'archived']).encode()
+        for row in records.iterator(chunk_size=2000):
+            yield writer.writerow(row + (False,)).encode()
+
+        if include_archived:
+            items = item_labels()
+            for child_id, item_id, is_complete, last_checkout in \
+                    archived_records(queryset):
+                yield writer.writerow((
+                    child_id, children[child_id], *items[item_id],
+                    is_complete, last_checkout, True)).encode()
+    return 'records.csv', rows()
+
+
+@register_job('cohort_report')
+def cohort_report(job):
+    """Build the category report for each of the job's children."""
+    report = []
+    for child in children_for(job).iterator():
+        report.append({
+            'child': child.id,
+            'age_in_months': child.age_in_months,
+            'categories': [
+                {
+                    'test': category.test.name,
+                    'category': category.name,
+                    'items_total': category.items_total,
+                    'items_passed': category.items_passed,
+                    'highest_step': category.highest_step,
+                    'age_equivalent': category.age_equivalent,
+                }
+                for category in category_report(child)
+            ],
+        })
+    return 'cohort_report.json', json.dumps(report).encode()
+
+
+@register_job('recompute_norms', staff_only=True, scoped=False)
+def recompute_norms_job(job):
+    """Recompute norms into a new version from every clinic's records."""
+    version = recompute_norms(note=f'job {job.id}', **job.params)
+    summary = {'version': version.id, 'records': version.record_count}
+    return 'norms.json', json.dumps(summary).encode()
+
+
+@register_job('publish_snapshots', staff_only=True)
+def publish_snapshots_job(job):
+    """Publish the assessment snapshots and return the manifest."""
+    return 'manifest.json', json.dumps(publish_snapshots()).encode()
@@ -0,0 +1,179 @@
+"""
+Tests for the Jobs APIs.
+"""
+
+import csv
+import io
+import json
+import shutil
+import tempfile
+from concurrent.futures import Future
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.jobs import claim_jobs, run_job, enqueue
+from core.models import Child, Job, Tests, Categories, Items, Records
+import datetime
+
+JOBS_URL = reverse('jobs:create')
+
+
+def detail_url(job_id):
+    return reverse('jobs:detail', args=[job_id])
+
+
+def result_url(job_id):
+    return reverse('jobs:result', args=[job_id])
+
+
+class InlineExecutor:
+    """Executor running jobs in the test process and transaction."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+class JobsAPITests(TestCase):
+    """Tests for queueing, running and downloading jobs."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.child = Child.objects.create(
+            name="Mike", birthday=datetime.date(2022, 1, 1))
+        other = Child.objects.create(
+            name="Other", birthday=datetime.date(2022, 1, 1))
+        self.user.child.add(self.child)
+        test = Tests.objects.create(name="Denver II")
+        category = Categories.objects.create(test=test, name="Motor")
+        item = Items.objects.create(test=test, category=category, step=1,
+                                    instruction="walks")
+        Records.objects.create(child=self.child, item=item,
+                               is_complete=True)
+        Records.objects.create(child=other, item=item, is_complete=True)
+
+    def test_unknown_job_error(self):
+        response = self.client.post(JOBS_URL, {'name': 'nope'},
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_records_export_job(self):
+        """Test job is queued, run and its result only has own children."""
+        response = self.client.post(JOBS_URL, {'name': 'records_export'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        job_id = response.data['id']
+
+        response = self.client.get(result_url(job_id))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(claim_jobs(5), [job_id])
+        self.assertEqual(run_job(job_id), Job.DONE)
+
+        response = self.client.get(detail_url(job_id))
+        self.assertEqual(response.data['status'], Job.DONE)
+        response = self.client.get(result_url(job_id))
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], "Mike")
+
+    def test_records_export_selects_children_in_subquery(self):
+        """Test the children are not sent as one parameter each."""
+        job = enqueue('records_export', owner=self.user)
+        claim_jobs(1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(run_job(job.id), Job.DONE)
+
+        records = [q['sql'] for q in queries.captured_queries
+                   if 'FROM "core_records"' in q['sql']]
+        self.assertTrue(records)
+        for sql in records:
+            self.assertIn('IN (SELECT', sql)
+
+    def test_failed_job_records_error(self):
+        job = enqueue('cohort_report', owner=self.user)
+        Job.objects.filter(id=job.id).update(name='missing')
+        claim_jobs(1)
+
+        with self.assertLogs('core.jobs', 'ERROR') as logs:
+            self.assertEqual(run_job(job.id), Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.error, 'KeyError, see the worker log.')
+        self.assertIn('Traceback', logs.output[0])
+
+    def test_stale_running_job_reclaimed(self):
+        """Test a job whose lease expired is claimed again, then failed."""
+        job = enqueue('cohort_report', owner=self.user)
+        self.assertEqual(claim_jobs(1), [job.id])
+        self.assertEqual(claim_jobs(1), [])
+
+        expired = timezone.now() - datetime.timedelta(minutes=5)
+        Job.objects.filter(id=job.id).update(heartbeat=expired)
+        self.assertEqual(claim_jobs(1), [job.id])
+
+        with override_settings(JOBS_MAX_ATTEMPTS=2):
+            Job.objects.filter(id=job.id).update(heartbeat=expired)
+            self.assertEqual(claim_jobs(1), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_other_users_job_not_found(self):
+        job = enqueue('cohort_report')
+
+        response = self.client.get(detail_url(job.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_runworker_once(self):
+        """Test the worker command runs queued jobs and exits."""
+        job = enqueue('cohort_report', owner=self.user)
+
+        with mock.patch(
+                'core.management.commands.runworker.ProcessPoolExecutor',
+                InlineExecutor):
+            call_command('runworker', processes=1, once=True,
+                         stdout=io.StringIO())
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, Job.DONE)
+        with open(f'{self.media}/{job.result_file}') as f:
+            report = json.load(f)
+        self.assertEqual(report[0]['child'], self.child.id)
@@ -0,0 +1,14 @@
+"""
+URLs for the JOBS APIs.
+"""
+
+from django.urls import path
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', views.JobCreateView.as_view(), name='create'),
+    path('<int:pk>/', views.JobDetailView.as_view(), name='detail'),
+    path('<int:pk>/result/', views.JobResultView.as_view(), name='result'),
+]
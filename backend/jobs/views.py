@@ -0,0 +1,48 @@
+"""
+Views for Jobs APIs.
+"""
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+
+from rest_framework import generics, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import Job
+
+from .serializers import JobSerializer
+
+
+class JobCreateView(generics.CreateAPIView):
+    """Queue a new job for the auth user."""
+    serializer_class = JobSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """Retrieve status of the auth user's job."""
+    serializer_class = JobSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user)
+
+
+class JobResultView(JobDetailView):
+    """Download the result file of a finished job."""
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        if job.status != Job.DONE:
+            return Response(self.get_serializer(job).data,
+                            status=status.HTTP_409_CONFLICT)
+        return FileResponse(default_storage.open(job.result_file),
+                            as_attachment=True)
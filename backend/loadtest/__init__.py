@@ -0,0 +1,5 @@
+"""
+Load testing tools for the API.
+
+Run from the backend directory, for example ``python -m loadtest.tune``.
+"""
@@ -0,0 +1,156 @@
+"""
+Threaded HTTP load generator using only the standard library.
+
+Each virtual user runs a scenario in a loop on its own keep-alive
+connection until the duration is over. Every request's latency and
+status is recorded per label, so one run reports throughput, latency
+percentiles and error rate for each step of a scenario.
+"""
+
+import http.client
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+def percentile(values, percent):
+    """Return the percent-th percentile of sorted values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+@dataclass
+class Stats:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'rps': count / elapsed if elapsed else 0.0,
+            'error_rate': self.errors / count if count else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+
+
+class Session:
+    """Keep-alive connection of one virtual user."""
+
+    def __init__(self, base_url, timeout=30):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = timeout
+        self.headers = {}
+        self.stats = defaultdict(Stats)
+        self._connection = None
+
+    def connection(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def request(self, method, path, data=None, label=None, expect=(200,)):
+        """Send a request and return (status, decoded JSON or None)."""
+        headers = dict(self.headers)
+        body = None
+        if data is not None:
+            body = json.dumps(data)
+            headers['Content-Type'] = 'application/json'
+        stats = self.stats[label or f'{method} {path}']
+        start = time.perf_counter()
+        try:
+            connection = self.connection()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            stats.latencies.append(time.perf_counter() - start)
+            stats.errors += 1
+            self.close()
+            return None, None
+        stats.latencies.append(time.perf_counter() - start)
+        if response.status not in expect:
+            stats.errors += 1
+        try:
+            return response.status, json.loads(content) if content else None
+        except ValueError:
+            return response.status, None
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, data, **kwargs):
+        return self.request('POST', path, data, **kwargs)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def run(base_url, scenario, concurrency=10, duration=10.0, setup=None):
+    """Run scenario(session) for each virtual user until duration ends.
+
+    setup(session, user_number) runs once per user before the clock
+    starts, e.g. to log in. Returns ({label: summary}, total summary).
+    """
+    sessions = [Session(base_url) for _ in range(concurrency)]
+    if setup is not None:
+        for number, session in enumerate(sessions):
+            setup(session, number)
+            session.stats.clear()
+
+    deadline = None
+    started = threading.Event()
+
+    def user(session):
+        started.wait()
+        while time.perf_counter() < deadline:
+            scenario(session)
+        session.close()
+
+    threads = [threading.Thread(target=user, args=(s,)) for s in sessions]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    deadline = start + duration
+    started.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    per_label = defaultdict(Stats)
+    total = Stats()
+    for session in sessions:
+        for label, stats in session.stats.items():
+            per_label[label].merge(stats)
+            total.merge(stats)
+    return ({label: stats.summary(elapsed)
+             for label, stats in sorted(per_label.items())},
+            total.summary(elapsed))
+
+
+def format_table(rows):
+    """Format {label: summary} rows as a text table."""
+    lines = [f'{"":<32}{"reqs":>8}{"req/s":>9}{"err %":>7}'
+             f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}']
+    for label, s in rows.items():
+        lines.append(
+            f'{label[:32]:<32}{s["requests"]:>8}{s["rps"]:>9.1f}'
+            f'{s["error_rate"] * 100:>7.2f}{s["p50_ms"]:>9.1f}'
+            f'{s["p95_ms"]:>9.1f}{s["p99_ms"]:>9.1f}')
+    return '\n'.join(lines)
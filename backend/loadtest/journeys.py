@@ -0,0 +1,62 @@
+"""
+User journeys against the public API.
+
+Users are the ones created by ``manage.py seedloadtest``.
+"""
+
+import random
+
+EMAIL = 'loadtest{}@example.com'
+PASSWORD = 'loadtest-password'
+
+
+class ParentJourney:
+    """A parent logging in and browsing their children and tests."""
+
+    def __init__(self, users, relogin_every=0):
+        self.users = users
+        self.relogin_every = relogin_every
+
+    def login(self, session, number):
+        """Get a token for a seeded user, raising if the login fails."""
+        if not self.relogin(session, number):
+            raise RuntimeError(
+                f'Login failed for {EMAIL.format(session.user_number)}, '
+                'run manage.py seedloadtest first.')
+
+    def relogin(self, session, number):
+        """Get a new token for a seeded user and return whether it worked.
+
+        A failed login, e.g. throttled by token_ip, is counted as an
+        error of POST token and the session keeps its previous token.
+        """
+        session.user_number = number % self.users
+        session.iterations = 0
+        _, data = session.post('/api/user/token/', {
+            'email': EMAIL.format(session.user_number),
+            'password': PASSWORD,
+        }, label='POST token')
+        if not data or 'token' not in data:
+            return False
+        session.headers['Authorization'] = f'Token {data["token"]}'
+        return True
+
+    def __call__(self, session):
+        session.iterations += 1
+        if self.relogin_every and \
+                session.iterations % self.relogin_every == 0:
+            self.relogin(session, session.user_number)
+
+        _, profile = session.get('/api/user/profile/', label='GET profile')
+        children = (profile or {}).get('child') or []
+        if not children:
+            return
+        child = random.choice(children)
+        _, detail = session.get(f'/api/user/child/{child["id"]}/',
+                                label='GET child')
+        tests = (detail or {}).get('tests') or []
+        session.get('/api/assessment/view/', label='GET assessment list')
+        if tests:
+            test = random.choice(tests)
+            session.get(f'/api/assessment/view/{test["id"]}/',
+                        label='GET assessment detail')
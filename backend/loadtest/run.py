@@ -0,0 +1,59 @@
+"""
+Run the API user journeys and report throughput and latency.
+
+Against a local server seeded with ``manage.py seedloadtest``:
+
+    python manage.py seedloadtest --users 50
+    python -m loadtest.run --base-url http://127.0.0.1:8000 \\
+        --concurrency 20 --duration 30 --max-p95 250
+
+Exits with status 1 when --max-p95 or --max-error-rate is exceeded, so
+it can gate a deploy.
+"""
+
+import argparse
+import json
+import sys
+
+from loadtest.client import run, format_table
+from loadtest.journeys import ParentJourney
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--users', type=int, default=50,
+                        help='number of seeded users')
+    parser.add_argument('--relogin-every', type=int, default=0,
+                        help='log in again every N journeys')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--max-p95', type=float,
+                        help='fail if total p95 latency (ms) is higher')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    journey = ParentJourney(args.users, args.relogin_every)
+    rows, total = run(args.base_url, journey, args.concurrency,
+                      args.duration, setup=journey.login)
+    rows['total'] = total
+    print(format_table(rows))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+    failures = []
+    if args.max_p95 is not None and total['p95_ms'] > args.max_p95:
+        failures.append(f'p95 {total["p95_ms"]:.1f} ms > {args.max_p95} ms')
+    if total['error_rate'] > args.max_error_rate:
+        failures.append(f'error rate {total["error_rate"]:.2%} > '
+                        f'{args.max_error_rate:.2%}')
+    for failure in failures:
+        print(f'FAILED: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
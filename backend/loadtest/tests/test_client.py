@@ -0,0 +1,72 @@
+"""
+Tests for the load generator.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from loadtest.client import percentile, run
+from loadtest.tune import configurations, rank
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status = 200 if self.path == '/ok' else 500
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadClientTests(TestCase):
+    """Tests for running scenarios and summarizing them."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_run_reports_per_label(self):
+        def scenario(session):
+            session.get('/ok', label='ok')
+            session.get('/fail', label='fail')
+
+        rows, total = run(self.base_url, scenario, concurrency=2,
+                          duration=0.2)
+
+        self.assertEqual(rows['ok']['error_rate'], 0)
+        self.assertEqual(rows['fail']['error_rate'], 1)
+        self.assertEqual(total['requests'],
+                         rows['ok']['requests'] + rows['fail']['requests'])
+        self.assertGreater(total['rps'], 0)
+
+    def test_configurations(self):
+        self.assertEqual(
+            list(configurations(['sync', 'gthread'], [2], [2, 4])),
+            [('sync', 2, 1), ('gthread', 2, 2), ('gthread', 2, 4)])
+
+    def test_rank_puts_failing_runs_last(self):
+        results = {
+            'slow': {'rps': 100, 'error_rate': 0.0},
+            'failing': {'rps': 900, 'error_rate': 0.2},
+            'fast': {'rps': 300, 'error_rate': 0.005},
+        }
+
+        self.assertEqual(list(rank(results, 0.01)),
+                         ['fast', 'slow', 'failing'])
@@ -0,0 +1,50 @@
+"""
+Tests for the API user journeys against a live server.
+"""
+
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase
+
+from core.throttling import local_store
+from loadtest.client import run
+from loadtest.journeys import ParentJourney
+
+
+class ParentJourneyTests(LiveServerTestCase):
+    """Tests running the parent journey on seeded data."""
+
+    def setUp(self):
+        local_store.clear()
+        call_command('seedloadtest', users=2, children=1, tests=1,
+                     categories=2, items=3, stdout=io.StringIO())
+
+    def test_journey_without_errors(self):
+        journey = ParentJourney(users=2)
+
+        rows, total = run(self.live_server_url, journey, concurrency=2,
+                          duration=0.5, setup=journey.login)
+
+        self.assertEqual(total['error_rate'], 0)
+        self.assertEqual(set(rows), {
+            'GET profile', 'GET child', 'GET assessment list',
+            'GET assessment detail'})
+
+    def test_failed_relogin_counted_as_error(self):
+        """Test throttled logins are errors and users keep running."""
+        journey = ParentJourney(users=1, relogin_every=1)
+        rates = {'token_ip': '2/min'}
+
+        with mock.patch.dict(
+                'rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES',
+                rates, clear=True):
+            rows, total = run(self.live_server_url, journey, concurrency=1,
+                              duration=1, setup=journey.login)
+
+        # Each journey goes on after its login, failed or not.
+        self.assertGreater(rows['POST token']['error_rate'], 0)
+        self.assertEqual(rows['GET profile']['requests'],
+                         rows['POST token']['requests'])
+        self.assertEqual(rows['GET profile']['error_rate'], 0)
@@ -0,0 +1,110 @@
+"""
+Find the best gunicorn worker model for this machine.
+
+Starts gunicorn with each combination of worker class, worker count
+and thread count, loads it with the load generator and prints the
+configurations ranked by throughput. Configurations failing more than
+--max-error-rate of their requests rank after all others. Run from the
+backend directory with the production environment variables set:
+
+    python -m loadtest.tune --classes sync,gthread,uvicorn \\
+        --workers 2,4,8 --threads 2,4 --concurrency 32 --duration 15
+
+Use the winning values for WEB_WORKER_CLASS, WEB_CONCURRENCY and
+WEB_THREADS.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from loadtest.client import run, format_table
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not start on port {port}')
+
+
+def configurations(classes, workers, threads):
+    """Yield (class, workers, threads), threads only varying for gthread."""
+    for kind, count in itertools.product(classes, workers):
+        for thread_count in (threads if kind == 'gthread' else [1]):
+            yield kind, count, thread_count
+
+
+def rank(results, max_error_rate):
+    """Return results sorted by rps, those over max_error_rate last."""
+    return dict(sorted(results.items(), key=lambda r: (
+        r[1]['error_rate'] > max_error_rate, -r[1]['rps'])))
+
+
+def benchmark(kind, workers, threads, args):
+    env = dict(os.environ, WEB_WORKER_CLASS=kind,
+               WEB_CONCURRENCY=str(workers), WEB_THREADS=str(threads),
+               PORT=str(args.port))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+        def scenario(session):
+            session.get(args.path)
+
+        run(base_url, scenario, args.concurrency, min(args.duration, 3))
+        _, total = run(base_url, scenario, args.concurrency, args.duration)
+        return total
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    cores = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--classes', default='sync,gthread,uvicorn')
+    parser.add_argument('--workers', default=f'{cores},{2 * cores + 1}')
+    parser.add_argument('--threads', default='2,4,8')
+    parser.add_argument('--concurrency', type=int, default=4 * cores)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', default='/api/assessment/view/')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for kind, workers, threads in configurations(
+            args.classes.split(','),
+            [int(w) for w in args.workers.split(',')],
+            [int(t) for t in args.threads.split(',')]):
+        label = f'{kind} w={workers} t={threads}'
+        print(f'Running {label} ...', file=sys.stderr)
+        results[label] = benchmark(kind, workers, threads, args)
+
+    ranked = rank(results, args.max_error_rate)
+    print(f'{cores} cores, {args.concurrency} concurrent users, '
+          f'GET {args.path}')
+    print(format_table(ranked))
+    best, summary = next(iter(ranked.items()))
+    if summary['error_rate'] > args.max_error_rate:
+        print(f'No configuration stayed under '
+              f'{args.max_error_rate:.2%} errors')
+    else:
+        print(f'Best: {best}')
+
+
+if __name__ == '__main__':
+    main()
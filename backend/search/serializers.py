@@ -0,0 +1,16 @@
+"""
+Serializers for the Search APIs.
+"""
+
+from rest_framework import serializers
+from core.models import SearchDocument
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for a ranked search result."""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ["kind", "object_id", "child", "text", "rank"]
@@ -0,0 +1,113 @@
+"""
+Tests for the Search APIs.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import (Child, Clinic, Comments, Tests, Categories, Items,
+                         SearchDocument)
+import datetime
+import io
+
+SEARCH_URL = reverse('search:search')
+
+
+class SearchAPITests(TestCase):
+    """Tests for searching items and comments."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        test = Tests.objects.create(name="Denver II")
+        category = Categories.objects.create(test=test, name="Motor")
+        self.walks = Items.objects.create(
+            test=test, category=category, step=1,
+            instruction="Walks holding furniture",
+            description="Child walks while holding on")
+        Items.objects.create(test=test, category=category, step=2,
+                             instruction="Throws ball")
+        self.child = Child.objects.create(
+            name="Mike", birthday=datetime.date(2022, 1, 1))
+        self.user.child.add(self.child)
+        other = Child.objects.create(
+            name="Other", birthday=datetime.date(2022, 1, 1))
+        Comments.objects.create(child=self.child,
+                                comment="Started walking last week")
+        Comments.objects.create(child=other, comment="Walking well")
+
+    def test_search_ranked_and_scoped(self):
+        """Test results match prefixes and skip other users' comments."""
+        response = self.client.get(SEARCH_URL, {'q': 'walk'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        results = response.data['results']
+        self.assertEqual(results[0]['object_id'], self.walks.id)
+        self.assertEqual({r['kind'] for r in results},
+                         {SearchDocument.ITEM, SearchDocument.COMMENT})
+        self.assertGreaterEqual(results[0]['rank'], results[1]['rank'])
+
+    def test_staff_search_scoped_to_clinic(self):
+        """Test staff find items and only their clinic's comments."""
+        north = Clinic.objects.create(name='North', slug='north')
+        south = Clinic.objects.create(name='South', slug='south')
+        Child.objects.filter(id=self.child.id).update(clinic=north)
+        Comments.objects.filter(child=self.child).update(clinic=north)
+        call_command('rebuildsearchindex', stdout=io.StringIO())
+        staff = get_user_model().objects.create_user(
+            email='staff@example.com', name='staff', password='testpass',
+            role='Parent', is_staff=True, clinic=south)
+        self.client.force_authenticate(user=staff)
+
+        response = self.client.get(SEARCH_URL, {'q': 'walk'})
+
+        self.assertEqual([r['kind'] for r in response.data['results']],
+                         [SearchDocument.ITEM])
+        self.assertEqual(
+            SearchDocument.objects.get(kind=SearchDocument.COMMENT,
+                                       child=self.child).clinic, north)
+
+    def test_index_updated_by_signals(self):
+        """Test edits and deletes are reflected in results."""
+        self.walks.instruction = "Climbs stairs"
+        self.walks.description = ""
+        self.walks.save()
+        response = self.client.get(SEARCH_URL, {'q': 'stairs'})
+        self.assertEqual(response.data['count'], 1)
+
+        self.walks.delete()
+        response = self.client.get(SEARCH_URL, {'q': 'stairs'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_search_syntax_is_escaped(self):
+        response = self.client.get(SEARCH_URL, {'q': 'ball" OR *'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pagination(self):
+        response = self.client.get(SEARCH_URL, {'q': 'walk', 'page_size': 1})
+
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_rebuild_index_command(self):
+        SearchDocument.objects.all().delete()
+
+        call_command('rebuildsearchindex', stdout=io.StringIO())
+
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        response = self.client.get(SEARCH_URL, {'q': 'throws'})
+        self.assertEqual(response.data['count'], 1)
@@ -0,0 +1,40 @@
+"""
+Views for Search APIs.
+"""
+
+from django.db.models import Q
+
+from rest_framework import generics
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+
+from core.models import SearchDocument
+from core.search import search
+
+from .serializers import SearchResultSerializer
+
+
+class SearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SearchView(generics.ListAPIView):
+    """Search items and the auth user's children's comments."""
+    serializer_class = SearchResultSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            return SearchDocument.objects.none()
+        queryset = SearchDocument.objects.all()
+        user = self.request.user
+        if not user.is_staff:
+            queryset = queryset.filter(
+                Q(kind=SearchDocument.ITEM) | Q(child__user=user))
+        return search(queryset, text)
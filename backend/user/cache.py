@@ -0,0 +1,76 @@
+"""
+Per-user cache of the profile response.
+
+The cache key holds the clinic, the user id, a version token and the UTC
+date. The token is replaced on every change to the user, their children
+or the child M2M, and the date rolls the key over at midnight UTC since
+ages in months depend on the day.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Child
+from core.tenancy import tenant_cache_key
+
+
+def version_key(user_id):
+    return f'profile_version:{user_id}'
+
+
+def profile_cache_key(user_id):
+    """Return the cache key of the user's current profile response."""
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(version_key(user_id), version, None)
+    today = datetime.now(timezone.utc).date()
+    return tenant_cache_key(f'profile:{user_id}:{version}:{today}')
+
+
+def seconds_until_midnight():
+    """Return seconds left in the current UTC day."""
+    now = datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1),
+                                datetime.min.time(), tzinfo=timezone.utc)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def invalidate(*user_ids):
+    """Drop the cached profiles of the users."""
+    cache.delete_many([version_key(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=get_user_model().child.through)
+def user_children_changed(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if action == 'pre_clear' and reverse:
+        # After clearing from the child side the users are unknown.
+        invalidate(*instance.user.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            invalidate(instance.pk)
+        elif pk_set:
+            invalidate(*pk_set)
+
+
+@receiver(post_save, sender=Child)
+@receiver(pre_delete, sender=Child)
+def child_changed(sender, instance, **kwargs):
+    """Invalidate the users linked to a changed child.
+
+    Runs before deletes, while the M2M rows still exist.
+    """
+    if kwargs.get('created'):
+        return
+    invalidate(*instance.user.values_list('id', flat=True))
@@ -5,7 +5,7 @@ Serializers for the User APIs.
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import gettext as _
 from rest_framework import serializers
-from core.models import Child
+from core.models import Child, Categories
 from assessment.serializers import AssesmentsListSerializer
 
 
@@ -27,6 +27,77 @@ class ChildDetailSerializer(ChildSerializer):
         fields = ChildSerializer.Meta.fields + ["tests"]
 
 
+class CategoryReportSerializer(serializers.ModelSerializer):
+    """Serializer for a category row of a child's report."""
+
+    items_total = serializers.IntegerField(read_only=True)
+    items_passed = serializers.IntegerField(read_only=True)
+    highest_step = serializers.IntegerField(read_only=True)
+    age_equivalent = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Categories
+        fields = ["id", "name", "items_total", "items_passed",
+                  "highest_step", "age_equivalent"]
+
+
+class NextItemSerializer(serializers.Serializer):
+    """Serializer for an item to administer next."""
+    id = serializers.IntegerField()
+    step = serializers.IntegerField()
+    instruction = serializers.CharField()
+    description = serializers.CharField()
+    percent = serializers.IntegerField()
+
+
+class NextItemsCategorySerializer(serializers.Serializer):
+    """Serializer for the next items of a category."""
+    id = serializers.IntegerField()
+    items = NextItemSerializer(many=True)
+
+
+class NextItemsSerializer(serializers.Serializer):
+    """Serializer for the next items of a child in a test."""
+    child = serializers.IntegerField()
+    test = serializers.IntegerField()
+    age_in_months = serializers.IntegerField()
+    categories = NextItemsCategorySerializer(many=True)
+
+
+class GrowthCheckpointSerializer(serializers.Serializer):
+    """Serializer for a child's milestones at an age."""
+    age_in_months = serializers.IntegerField()
+    milestones = serializers.IntegerField()
+    percentile = serializers.FloatField()
+
+
+class GrowthCategorySerializer(serializers.Serializer):
+    """Serializer for the growth curve of a category."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    norm = serializers.ListField(child=serializers.FloatField())
+    checkpoints = GrowthCheckpointSerializer(many=True)
+
+
+class GrowthTestSerializer(serializers.Serializer):
+    """Serializer for the growth curves of a test."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    categories = GrowthCategorySerializer(many=True)
+
+
+class GrowthSerializer(serializers.Serializer):
+    """Serializer for the growth curves of a child."""
+    child = serializers.IntegerField()
+    tests = GrowthTestSerializer(many=True)
+
+
+class EventTicketSerializer(serializers.Serializer):
+    """Serializer for event stream tickets."""
+    ticket = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user objects."""
 
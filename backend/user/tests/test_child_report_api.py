@@ -0,0 +1,138 @@
+"""
+Tests for the child report API.
+"""
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import (Child, Tests, Categories, Items,
+                         Percentages, Records)
+import datetime
+
+
+def report_url(child_id):
+    """Create and return url for a child's report."""
+    return reverse('user:child-report', args=[child_id])
+
+
+class ChildReportAPITests(TestCase):
+    """Tests for the child report endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.child = Child.objects.create(
+            name="Mike",
+            birthday=datetime.date(2022, 1, 1)
+        )
+        self.user.child.add(self.child)
+
+        self.test = Tests.objects.create(name="Denver II")
+        self.child.tests.add(self.test)
+        self.motor = Categories.objects.create(test=self.test, name="Motor")
+        self.language = Categories.objects.create(test=self.test,
+                                                  name="Language")
+        items = [
+            Items.objects.create(test=self.test, category=self.motor,
+                                 step=step, instruction=f"item{step}")
+            for step in range(1, 4)
+        ]
+        Items.objects.create(test=self.test, category=self.language,
+                             step=1, instruction="talks")
+        for item, months in zip(items, [(6, 8), (9, 11), (12, 14)]):
+            Percentages.objects.create(item=item, month=months[0],
+                                       percent=25)
+            Percentages.objects.create(item=item, month=months[1],
+                                       percent=60)
+        Records.objects.create(child=self.child, item=items[0],
+                               is_complete=True)
+        Records.objects.create(child=self.child, item=items[1],
+                               is_complete=True)
+        Records.objects.create(child=self.child, item=items[2],
+                               is_complete=False)
+
+    def test_report_aggregates(self):
+        """Test report counts passed items, steps and age equivalent."""
+        with self.assertNumQueries(3):
+            response = self.client.get(report_url(self.child.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        test = response.data['tests'][0]
+        self.assertEqual(test['name'], "Denver II")
+        motor, language = test['categories']
+        self.assertEqual(motor['items_total'], 3)
+        self.assertEqual(motor['items_passed'], 2)
+        self.assertEqual(motor['highest_step'], 2)
+        self.assertEqual(motor['age_equivalent'], 11)
+        self.assertEqual(language['items_passed'], 0)
+        self.assertIsNone(language['highest_step'])
+        self.assertIsNone(language['age_equivalent'])
+
+    def test_report_not_authorized(self):
+        """Test report of another user's child is not allowed."""
+        other = Child.objects.create(name="Other",
+                                     birthday=datetime.date(2022, 1, 1))
+        response = self.client.get(report_url(other.id))
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+
+class ChildNextItemsAPITests(TestCase):
+    """Tests for the next items endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.child = Child.objects.create(
+            name="Mike",
+            birthday=datetime.date.today() - datetime.timedelta(days=360)
+        )
+        self.user.child.add(self.child)
+        self.test = Tests.objects.create(name="Denver II")
+        category = Categories.objects.create(test=self.test, name="Motor")
+        self.walks = Items.objects.create(test=self.test, category=category,
+                                          step=1, instruction="walks")
+        self.runs = Items.objects.create(test=self.test, category=category,
+                                         step=2, instruction="runs")
+        Percentages.objects.create(item=self.walks, month=12, percent=50)
+        Percentages.objects.create(item=self.runs, month=12, percent=30)
+        Records.objects.create(child=self.child, item=self.walks,
+                               is_complete=True)
+
+    def url(self, test_id):
+        return reverse('user:child-next-items',
+                       args=[self.child.id, test_id])
+
+    def test_next_items(self):
+        """Test completed items are left out of the selection."""
+        self.child.tests.add(self.test)
+
+        response = self.client.get(self.url(self.test.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        items = response.data['categories'][0]['items']
+        self.assertEqual([i['instruction'] for i in items], ["runs"])
+        self.assertEqual(items[0]['percent'], 30)
+
+    def test_test_not_assigned(self):
+        response = self.client.get(self.url(self.test.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,121 @@
+"""
+Tests for the growth curve API.
+"""
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+import numpy as np
+
+from core.growth import dense_curves, passed_distribution, percentiles
+from core.models import (Child, Tests, Categories, Items,
+                         Percentages, Records)
+import datetime
+
+
+def growth_url(child_id):
+    """Create and return url for a child's growth curves."""
+    return reverse('user:child-growth', args=[child_id])
+
+
+class GrowthComputationTests(TestCase):
+    """Tests for the vectorized growth computations."""
+
+    def test_dense_curves_carry_forward(self):
+        """Test months without data take the earlier month's rate."""
+        curves = dense_curves([1, 2], [(1, 2, 50), (1, 4, 90), (2, 0, 10)],
+                              max_month=5)
+        np.testing.assert_allclose(curves[0], [0, 0, .5, .5, .9, .9])
+        np.testing.assert_allclose(curves[1], [.1] * 6)
+
+    def test_percentile_of_poisson_binomial(self):
+        """Test percentiles match the distribution of items passed."""
+        rates = np.array([[.5], [.5]])
+        dist = passed_distribution(rates)
+        np.testing.assert_allclose(dist, [[.25, .5, .25]])
+        pct = percentiles(dist, np.array([1]))
+        self.assertAlmostEqual(pct[0], 50.0)
+
+
+class ChildGrowthAPITests(TestCase):
+    """Tests for the growth curve endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.child = Child.objects.create(
+            name="Mike",
+            birthday=datetime.date(2022, 1, 1)
+        )
+        self.user.child.add(self.child)
+
+        self.test = Tests.objects.create(name="Denver II")
+        self.child.tests.add(self.test)
+        self.motor = Categories.objects.create(test=self.test, name="Motor")
+        self.items = [
+            Items.objects.create(test=self.test, category=self.motor,
+                                 step=step, instruction=f"item{step}")
+            for step in range(1, 3)
+        ]
+        for item, month in zip(self.items, (6, 12)):
+            Percentages.objects.create(item=item, month=month, percent=50)
+            Percentages.objects.create(item=item, month=month + 3,
+                                       percent=100)
+
+    def record(self, item, birthday_days, is_complete=True):
+        record = Records.objects.create(child=self.child, item=item,
+                                        is_complete=is_complete)
+        checkout = timezone.make_aware(datetime.datetime.combine(
+            self.child.birthday + datetime.timedelta(days=birthday_days),
+            datetime.time()))
+        Records.objects.filter(id=record.id).update(last_checkout=checkout)
+
+    def test_growth_checkpoints(self):
+        """Test milestones and percentiles at each passed age."""
+        self.record(self.items[0], 180)
+        self.record(self.items[1], 360)
+        self.record(self.items[1], 300, is_complete=False)
+
+        with self.assertNumQueries(5):
+            response = self.client.get(growth_url(self.child.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        test = response.data['tests'][0]
+        self.assertEqual(test['name'], "Denver II")
+        motor = test['categories'][0]
+        self.assertEqual(motor['name'], "Motor")
+        self.assertEqual(motor['norm'][6], 0.5)
+        self.assertEqual(motor['norm'][15], 2.0)
+        self.assertEqual(motor['checkpoints'], [
+            {'age_in_months': 6, 'milestones': 1, 'percentile': 75.0},
+            {'age_in_months': 12, 'milestones': 2, 'percentile': 75.0},
+        ])
+
+    def test_growth_without_records(self):
+        """Test categories have no checkpoints without passed items."""
+        response = self.client.get(growth_url(self.child.id))
+
+        motor = response.data['tests'][0]['categories'][0]
+        self.assertEqual(motor['checkpoints'], [])
+        self.assertEqual(len(motor['norm']), 73)
+
+    def test_growth_of_other_child(self):
+        """Test growth of a child of another user is not allowed."""
+        child = Child.objects.create(name="Other",
+                                     birthday=datetime.date(2022, 1, 1))
+
+        response = self.client.get(growth_url(child.id))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,84 @@
+"""
+Tests for the profile response cache.
+"""
+
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Child
+import datetime as dt
+
+PROFILE_URL = reverse('user:profile')
+
+
+class ProfileCacheTests(TestCase):
+    """Tests for caching and invalidating the profile."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            name='newuser',
+            password='testpass',
+            role='Parent'
+        )
+        self.child = Child.objects.create(name="Mike",
+                                          birthday=dt.date(2022, 1, 1))
+        self.user.child.add(self.child)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def names(self):
+        response = self.client.get(PROFILE_URL)
+        return [child['name'] for child in response.data['child']]
+
+    def test_cached_profile_skips_queries(self):
+        self.client.get(PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(PROFILE_URL)
+
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_invalidated_by_child_changes(self):
+        """Test child updates, M2M changes and deletes bump the cache."""
+        self.assertEqual(self.names(), ["Mike"])
+
+        self.child.name = "Michael"
+        self.child.save()
+        self.assertEqual(self.names(), ["Michael"])
+
+        other = Child.objects.create(name="Anna",
+                                     birthday=dt.date(2022, 1, 1))
+        other.user.add(self.user)
+        self.assertEqual(self.names(), ["Michael", "Anna"])
+
+        self.child.delete()
+        self.assertEqual(self.names(), ["Anna"])
+
+        other.user.clear()
+        self.assertEqual(self.names(), [])
+
+    def test_invalidated_by_profile_update(self):
+        self.client.get(PROFILE_URL)
+
+        self.client.patch(PROFILE_URL, {'name': 'Renamed'})
+
+        self.assertEqual(self.client.get(PROFILE_URL).data['name'],
+                         'Renamed')
+
+    def test_rolls_over_at_midnight_utc(self):
+        self.client.get(PROFILE_URL)
+        tomorrow = datetime(2100, 1, 1, 0, 0, 1, tzinfo=timezone.utc)
+
+        with mock.patch('user.cache.datetime') as mocked:
+            mocked.now.return_value = tomorrow
+            with self.assertNumQueries(1):
+                self.client.get(PROFILE_URL)
@@ -10,6 +10,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Child
+from core.throttling import local_store
 from user.serializers import UserSerializer, ChildDetailSerializer
 import datetime
 
@@ -32,6 +33,7 @@ class PublicUserAPITests(TestCase):
     """Tests for public features of the user APIs."""
 
     def setUp(self):
+        local_store.clear()
         self.client = APIClient()
 
     def test_create_new_user(self):
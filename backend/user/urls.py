@@ -13,4 +13,15 @@ urlpatterns = [
     path('profile/', views.ManageUserView.as_view(), name='profile'),
     path('child/<int:pk>/', views.ChildRetrieveUpdateDestroyView.as_view(),
          name='child-detail'),
+    path('child/<int:pk>/report/', views.ChildReportView.as_view(),
+         name='child-report'),
+    path('child/<int:pk>/growth/', views.ChildGrowthView.as_view(),
+         name='child-growth'),
+    path('child/<int:pk>/events/', views.ChildEventsView.as_view(),
+         name='child-events'),
+    path('events/', views.ClinicEventsView.as_view(), name='clinic-events'),
+    path('events/ticket/', views.EventTicketView.as_view(),
+         name='events-ticket'),
+    path('child/<int:pk>/tests/<int:test_pk>/next-items/',
+         views.ChildNextItemsView.as_view(), name='child-next-items'),
 ]
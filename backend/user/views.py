@@ -2,7 +2,13 @@
 Views for user API.
 """
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views import View
 
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
@@ -11,23 +17,80 @@ from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework.response import Response
 
-from core.models import Child
+from core import audit
+from core.events import (channels_for, event_stream, get_backend,
+                         stream_ticket, ticket_user)
+from core.growth import growth_curves
+from core.item_index import get_item_index
+from core.models import AuditEvent, Child, Records
+from core.reports import category_report
+from core.throttling import IPBucketThrottle, EmailBucketThrottle
+from core.views import token_user
 
+from .cache import profile_cache_key, seconds_until_midnight
 from .serializers import (
     UserSerializer,
     AuthTokenSerializer,
-    ChildDetailSerializer)
+    ChildDetailSerializer,
+    CategoryReportSerializer,
+    NextItemsSerializer,
+    GrowthSerializer,
+    EventTicketSerializer)
+
+
+def owned_children(user, child_id):
+    """Return the user's children with id child_id, to check ownership."""
+    return user.child.filter(id=child_id)
+
+
+def completed_items(child, test_id):
+    """Return the ids of the items the child completed in a test."""
+    return Records.objects.filter(
+        child=child, item__test_id=test_id, is_complete=True,
+    ).values_list('item_id', flat=True)
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user."""
     serializer_class = UserSerializer
+    # No authentication, so throttles run before any password hashing.
+    authentication_classes = []
+    throttle_classes = [IPBucketThrottle, EmailBucketThrottle]
+    throttle_scope = 'create_user'
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    authentication_classes = []
+    throttle_classes = [IPBucketThrottle, EmailBucketThrottle]
+    throttle_scope = 'token'
+
+
+class AuditViewMixin:
+    """Record successful reads of the child in the audit trail."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if request.method == 'GET' and \
+                status.is_success(response.status_code):
+            pk = self.kwargs['pk']
+            audit.record(AuditEvent.VIEW, 'child', pk, pk,
+                         request.user.clinic_id, request.path)
+        return response
+
+
+class ChildQuerysetMixin:
+    """Children of the request's clinic.
+
+    TenantManager filters when the queryset is built, so it is built per
+    request: a class level queryset would be built at import, unscoped.
+    """
+
+    def get_queryset(self):
+        return Child.objects.all()
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -40,10 +103,19 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         """Retrieve and return the auth user object."""
         return self.request.user
 
+    def retrieve(self, request, *args, **kwargs):
+        """Return the profile from the per-user cache when possible."""
+        key = profile_cache_key(request.user.id)
+        data = cache.get(key)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            cache.set(key, data, seconds_until_midnight())
+        return Response(data)
+
 
-class ChildRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ChildRetrieveUpdateDestroyView(ChildQuerysetMixin, AuditViewMixin,
+                                     generics.RetrieveUpdateDestroyAPIView):
     """Manage child object for authorized users."""
-    queryset = Child.objects.all()
     serializer_class = ChildDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
@@ -55,21 +127,208 @@ class ChildRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get(self, request, *args, **kwargs):
         # If child object in users' child field.
-        if request.user.child.filter(id=self.kwargs.get('pk')).exists():
+        if owned_children(request.user, self.kwargs.get('pk')).exists():
             return super().get(request, *args, **kwargs)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     def update(self, request, *args, **kwargs):
         # If child object in users' child field.
-        if request.user.child.filter(id=self.kwargs.get('pk')).exists():
+        if owned_children(request.user, self.kwargs.get('pk')).exists():
             return super().update(request, *args, **kwargs)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     def delete(self, request, *args, **kwargs):
         # If child object in users' child field.
-        if request.user.child.filter(id=self.kwargs.get('pk')).exists():
+        if owned_children(request.user, self.kwargs.get('pk')).exists():
             return super().delete(request, *args, **kwargs)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+
+class ChildReportView(ChildQuerysetMixin, AuditViewMixin,
+                      generics.GenericAPIView):
+    """Developmental report of a child per test and category."""
+    serializer_class = CategoryReportSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # If child object in users' child field.
+        if not owned_children(request.user, self.kwargs.get('pk')).exists():
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        child = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+
+        tests = {}
+        for category in category_report(child):
+            test = tests.setdefault(category.test_id, {
+                'id': category.test_id,
+                'name': category.test.name,
+                'categories': [],
+            })
+            test['categories'].append(
+                self.get_serializer(category).data)
+
+        return Response({
+            'child': child.id,
+            'age_in_months': child.age_in_months,
+            'tests': list(tests.values()),
+        })
+
+
+class ChildNextItemsView(ChildQuerysetMixin, AuditViewMixin,
+                         generics.GenericAPIView):
+    """Items to administer next for a child in a test.
+
+    Returns per category the items whose pass percent at the child's age
+    lies between the low and high query params, leaving out completed
+    items.
+    """
+    serializer_class = NextItemsSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    band = (25, 90)
+
+    def get(self, request, *args, **kwargs):
+        # If child object in users' child field.
+        if not owned_children(request.user, self.kwargs.get('pk')).exists():
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        child = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        test_id = self.kwargs['test_pk']
+        if not child.tests.filter(id=test_id).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        try:
+            low = int(request.query_params.get('low', self.band[0]))
+            high = int(request.query_params.get('high', self.band[1]))
+        except ValueError:
+            return Response({'detail': 'low and high must be integers.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        completed = set(completed_items(child, test_id))
+        index = get_item_index()
+        selected = index.select(test_id, child.age_in_months, low, high,
+                                exclude=completed)
+
+        categories = []
+        for category_id, items in selected.items():
+            categories.append({
+                'id': category_id,
+                'items': [
+                    {
+                        'id': item_id,
+                        'step': index.items[item_id][0],
+                        'instruction': index.items[item_id][1],
+                        'description': index.items[item_id][2],
+                        'percent': percent,
+                    }
+                    for item_id, percent in items
+                ],
+            })
+        return Response({
+            'child': child.id,
+            'test': test_id,
+            'age_in_months': child.age_in_months,
+            'categories': categories,
+        })
+
+
+class ChildGrowthView(ChildQuerysetMixin, AuditViewMixin,
+                      generics.GenericAPIView):
+    """Milestones of a child over age against the norm curves.
+
+    For each category, norm is the expected number of items passed at
+    each month and checkpoints hold the child's milestones and
+    percentile at each age they passed an item.
+    """
+    serializer_class = GrowthSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # If child object in users' child field.
+        if not owned_children(request.user, self.kwargs.get('pk')).exists():
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        child = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+
+        return Response({
+            'child': child.id,
+            'tests': growth_curves(child),
+        })
+
+
+class EventTicketView(generics.GenericAPIView):
+    """Issue a short-lived ticket for opening event streams.
+
+    EventSource can't send the Authorization header, so streams take
+    the ticket in the ticket query param instead of the API token.
+    """
+    serializer_class = EventTicketSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer({
+            'ticket': stream_ticket(request.user),
+            'expires_in': settings.EVENTS_TICKET_MAX_AGE,
+        })
+        return Response(serializer.data)
+
+
+class EventStreamView(View):
+    """Server-sent events of changes, served by the ASGI application.
+
+    Clients authenticate with their token in the Authorization header or
+    with a ticket from EventTicketView in the ticket query param.
+    """
+
+    def get_channels(self, user):
+        """Return the channels to stream, or an error response."""
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'Event streams need the ASGI server.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED)
+        user = await sync_to_async(self.stream_user)(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED)
+        channels = await sync_to_async(self.get_channels)(user)
+        if isinstance(channels, JsonResponse):
+            return channels
+
+        subscription = get_backend().subscribe(channels)
+        response = StreamingHttpResponse(
+            event_stream(subscription, settings.EVENTS_KEEPALIVE),
+            content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stream_user(self, request):
+        return token_user(request) or ticket_user(request.GET.get('ticket'))
+
+
+class ChildEventsView(EventStreamView):
+    """Changes to a child, its records and comments."""
+
+    def get_channels(self, user):
+        # If child object in users' child field.
+        if not owned_children(user, self.kwargs['pk']).exists():
+            return JsonResponse({}, status=status.HTTP_401_UNAUTHORIZED)
+        return channels_for(self.kwargs['pk'])
+
+
+class ClinicEventsView(EventStreamView):
+    """Changes to every child of the staff user's clinic."""
+
+    def get_channels(self, user):
+        if not user.is_staff:
+            return JsonResponse({}, status=status.HTTP_403_FORBIDDEN)
+        if user.clinic_id is None:
+            return JsonResponse({'detail': 'User has no clinic.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        return [f'clinic:{user.clinic_id}']